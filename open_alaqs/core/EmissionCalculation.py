@@ -1,5 +1,11 @@
+import multiprocessing
+import multiprocessing.util
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, List, TypedDict
+from functools import wraps
+from itertools import islice
+from typing import Any, Callable, Iterator, List, Optional, TypedDict
 
 from qgis.PyQt import QtCore, QtWidgets
 
@@ -8,18 +14,57 @@ from open_alaqs.core.interfaces.AmbientCondition import (
     AmbientCondition,
     AmbientConditionStore,
 )
-from open_alaqs.core.interfaces.Emissions import Emission
+from open_alaqs.core.interfaces.Emissions import Emission, EmissionBatch
 from open_alaqs.core.interfaces.InventoryTimeSeries import InventoryTimeSeriesStore
 from open_alaqs.core.interfaces.Source import Source
+from open_alaqs.core.interfaces.SourceModule import SourceModule
 from open_alaqs.core.modules.ModuleManager import (
     DispersionModuleRegistry,
+    OutputAnalysisModuleRegistry,
     SourceModuleRegistry,
 )
+from open_alaqs.core.tools import sql_interface
+from open_alaqs.core.tools.emission_cache import CachedSource
 from open_alaqs.core.tools.Grid3D import Grid3D
+from open_alaqs.core.tools.inventory_context import InventoryContext, activate
 from open_alaqs.core.tools.iterator import pairwise
 
 logger = get_logger(__name__)
 
+defaultEmissions = {
+    "fuel_kg": 0.0,
+    "co_g": 0.0,
+    "co2_g": 0.0,
+    "hc_g": 0.0,
+    "nox_g": 0.0,
+    "sox_g": 0.0,
+    "pm10_g": 0.0,
+    "p1_g": 0.0,
+    "p2_g": 0.0,
+    "pm10_prefoa3_g": 0.0,
+    "pm10_nonvol_g": 0.0,
+    "pm10_sul_g": 0.0,
+    "pm10_organic_g": 0.0,
+    "nvpm_g": 0.0,
+    "nvpm_number": 0.0,
+}
+
+# The emission calculation of a worker process (see EmissionCalculation.run)
+_worker_emission_calculation: Optional["EmissionCalculation"] = None
+
+
+def _inContext(method: Callable) -> Callable:
+    """
+    Run a method of an EmissionCalculation with the stores of its inventory.
+    """
+
+    @wraps(method)
+    def wrapper(self: "EmissionCalculation", *args: Any, **kwargs: Any) -> Any:
+        with activate(self._context):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class GridConfig(TypedDict):
     x_cells: int
@@ -41,21 +86,35 @@ class EmissionCalculation:
         start_dt: datetime,
         end_dt: datetime,
         time_interval: timedelta,
+        context: Optional[InventoryContext] = None,
     ) -> None:
+        """
+        :param context: the context that owns the stores of the inventory, the
+         stores of the process are used if None
+        """
         assert db_path
 
         self._database_path = db_path
+        self._context = context
+        self._grid_config = grid_config
         self._grid = Grid3D(self._database_path, grid_config)
 
         # Get the time series for this inventory
         self._start_dt = start_dt
         self._end_dt = end_dt
         self._time_interval = time_interval
-        self._inventoryTimeSeriesStore = InventoryTimeSeriesStore(self._database_path)
+        with activate(self._context):
+            self._inventoryTimeSeriesStore = InventoryTimeSeriesStore(
+                self._database_path
+            )
+            self._ambient_conditions_store = AmbientConditionStore(self._database_path)
         self._emissions = {}
         self._source_modules = {}
+        self._source_module_configs = {}
         self._dispersion_modules = {}
-        self._ambient_conditions_store = AmbientConditionStore(self._database_path)
+        self._output_modules = {}
+        self._output_results = {}
+        self._period_ambient_condition = (None, None)
 
     @staticmethod
     def ProgressBarWidget(dispersion_enabled=False):
@@ -81,6 +140,25 @@ class EmissionCalculation:
         progressbar.show()
         return progressbar
 
+    @classmethod
+    def QtProgressCallback(
+        cls, dispersion_enabled: bool = False
+    ) -> Callable[[int, int], None]:
+        """
+        Build a progress callback that reports to a QProgressDialog and
+        processes the pending Qt events. Raises StopIteration when the user
+        cancels the dialog.
+        """
+        progressbar = cls.ProgressBarWidget(dispersion_enabled=dispersion_enabled)
+
+        def callback(count: int, total_count: int) -> None:
+            progressbar.setValue(int(100 * count / max(total_count, 1)))
+            QtCore.QCoreApplication.instance().processEvents()
+            if progressbar.wasCanceled():
+                raise StopIteration("Operation canceled by user")
+
+        return callback
+
     def getAmbientCondition(self, t_):
         # Get the ambient conditions
         ac_ = self._ambient_conditions_store.getAmbientConditions(scenario="")
@@ -91,15 +169,28 @@ class EmissionCalculation:
     def add_source_module(
         self, module_name: str, module_config: dict[str, Any]
     ) -> None:
-        EmissionSourceModule = SourceModuleRegistry().get_module(module_name)
+        self._addSourceModule(
+            module_name, SourceModuleRegistry().get_module(module_name), module_config
+        )
+
+    @_inContext
+    def _addSourceModule(
+        self,
+        module_name: str,
+        EmissionSourceModule: type[SourceModule],
+        module_config: dict[str, Any],
+    ) -> None:
+        self._source_module_configs[module_name] = module_config
 
         self._source_modules[module_name] = EmissionSourceModule(
             values_dict={
                 "database_path": self._database_path,
+                "context": self._context,
                 **module_config,
             }
         )
 
+    @_inContext
     def add_dispersion_modules(
         self, module_names: list[str], module_config: dict[str, Any]
     ):
@@ -113,28 +204,167 @@ class EmissionCalculation:
                 }
             )
 
-    def run(self, source_names: List, vertical_limit_m: float):
+    @_inContext
+    def add_output_module(
+        self, module_name: str, module_config: dict[str, Any]
+    ) -> None:
+        """
+        Add an output module as sink: its process(..) is called with the
+        emissions of each period as soon as they are calculated.
+        """
+        OutputModule = OutputAnalysisModuleRegistry().get_module(module_name)
+
+        self._output_modules[module_name] = OutputModule(
+            values_dict={
+                "database_path": self._database_path,
+                "grid": self._grid,
+                **module_config,
+            }
+        )
+
+    def _getPeriodAmbientCondition(self, start_dt: datetime) -> AmbientCondition:
+        # the source and dispersion modules ask for the same period in a row
+        if self._period_ambient_condition[0] == start_dt:
+            return self._period_ambient_condition[1]
+
+        # ToDo: only run on (start_, end_) with emission sources?
+        try:
+            ambient_condition = self.getAmbientCondition(start_dt.timestamp())
+        except Exception as error:
+            logger.warning(
+                "Couldn't load the ambient condition, so "
+                "default conditions are used:\n%s",
+                error,
+            )
+            ambient_condition = AmbientCondition()
+
+        self._period_ambient_condition = (start_dt, ambient_condition)
+        return ambient_condition
+
+    @_inContext
+    def _calculatePeriodEmissions(
+        self,
+        start_dt: datetime,
+        end_dt: datetime,
+        source_names: List,
+        vertical_limit_m: float,
+    ) -> EmissionBatch:
+        """
+        Calculate the emissions of all source modules for a single period.
+        """
+        ambient_condition = self._getPeriodAmbientCondition(start_dt)
+
+        period_batches = []
+
+        # calculate emissions per source, the sources without emissions get a
+        # generic (zero) emission
+        for mod_name, mod_obj in self.getModules().items():
+            logger.debug(f"{mod_name}: {start_dt}")
+
+            period_batches.append(
+                mod_obj.processBatch(
+                    start_dt,
+                    end_dt,
+                    source_names=source_names,
+                    ambient_conditions=ambient_condition,
+                    vertical_limit_m=vertical_limit_m,
+                    default_emission=Emission(defaultEmissions, defaultEmissions),
+                )
+            )
+
+        return EmissionBatch.concatenate(period_batches)
+
+    def _calculatePeriodEmissionsInPool(
+        self,
+        periods: list[tuple[datetime, datetime]],
+        source_names: List,
+        vertical_limit_m: float,
+        workers: int,
+        chunk_size: int,
+    ) -> Iterator[tuple[datetime, datetime, EmissionBatch]]:
+        """
+        Calculate the emissions of chunks of periods in a process pool and yield
+        them in time order. At most two chunks per worker are in flight.
+        """
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initWorker,
+            initargs=(
+                self._database_path,
+                self._grid_config,
+                self._start_dt,
+                self._end_dt,
+                self._time_interval,
+                {
+                    module_name: (
+                        type(module),
+                        self._source_module_configs[module_name],
+                    )
+                    for module_name, module in self.getModules().items()
+                },
+            ),
+        )
+        chunks = iter(
+            [periods[i : i + chunk_size] for i in range(0, len(periods), chunk_size)]
+        )
+        pending = deque()
+        try:
+            for chunk in islice(chunks, 2 * workers):
+                pending.append(
+                    executor.submit(
+                        _calculateChunkEmissions, chunk, source_names, vertical_limit_m
+                    )
+                )
+
+            while pending:
+                chunk_results = pending.popleft().result()
+
+                for chunk in islice(chunks, 1):
+                    pending.append(
+                        executor.submit(
+                            _calculateChunkEmissions,
+                            chunk,
+                            source_names,
+                            vertical_limit_m,
+                        )
+                    )
+
+                yield from chunk_results
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @_inContext
+    def run(
+        self,
+        source_names: List,
+        vertical_limit_m: float,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        keep_emissions: bool = True,
+        workers: int = 1,
+        chunk_size: int = 24,
+    ) -> bool:
+        """
+        Calculate the emissions (and dispersion input) for every period.
+
+        :param source_names: the names of the sources to include (empty for all)
+        :param vertical_limit_m: the vertical limit of the study (in m)
+        :param progress_callback: called as ``progress_callback(count, total)``
+         before each period; may raise StopIteration to cancel the run. Defaults
+         to a QProgressDialog.
+        :param keep_emissions: keep the emissions of all periods in memory (see
+         getEmissions()). Set to False to stream each period to the dispersion
+         and output modules only, so memory is bounded by a single period.
+        :param workers: number of worker processes that calculate the emissions
+         of the source modules. The dispersion and output modules still receive
+         the periods in time order, in this process.
+        :param chunk_size: number of periods per worker task
+        :return: True if all periods were calculated, False if the run was
+         canceled
+        """
         if source_names is None:
             source_names = []
 
-        default_emissions = {
-            "fuel_kg": 0.0,
-            "co_g": 0.0,
-            "co2_g": 0.0,
-            "hc_g": 0.0,
-            "nox_g": 0.0,
-            "sox_g": 0.0,
-            "pm10_g": 0.0,
-            "p1_g": 0.0,
-            "p2_g": 0.0,
-            "pm10_prefoa3_g": 0.0,
-            "pm10_nonvol_g": 0.0,
-            "pm10_sul_g": 0.0,
-            "pm10_organic_g": 0.0,
-            "nvpm_g": 0.0,
-            "nvpm_number": 0.0,
-        }
-
         # check if a dispersion module is enabled
         dispersion_enabled = len(self.getDispersionModules()) > 0
 
@@ -149,10 +379,11 @@ class EmissionCalculation:
             ),
         )
 
-        # execute beginJob(..) of SourceModules
-        logger.debug("Execute beginJob(..) of source modules")
-        for mod_name, mod_obj in self.getModules().items():
-            mod_obj.beginJob()
+        # execute beginJob(..) of SourceModules (the workers run their own)
+        if workers <= 1:
+            logger.debug("Execute beginJob(..) of source modules")
+            for mod_name, mod_obj in self.getModules().items():
+                mod_obj.beginJob()
 
         # execute beginJob(..) of dispersion modules
         logger.debug("Execute beginJob(..) of dispersion modules")
@@ -162,91 +393,104 @@ class EmissionCalculation:
         ) in self.getDispersionModules().items():
             dispersion_mod_obj.beginJob()
 
+        # execute beginJob(..) of output modules
+        logger.debug("Execute beginJob(..) of output modules")
+        for output_mod_name, output_mod_obj in self.getOutputModules().items():
+            output_mod_obj.beginJob()
+
         # execute process(..)
         logger.debug("Execute process(..)")
+        periods = list(pairwise(self.getTimeSeries()))
+        if workers > 1:
+            logger.info("Calculate the emissions with %i worker processes", workers)
+            period_results = self._calculatePeriodEmissionsInPool(
+                periods, source_names, vertical_limit_m, workers, chunk_size
+            )
+        else:
+            period_results = (
+                (
+                    start_dt,
+                    end_dt,
+                    self._calculatePeriodEmissions(
+                        start_dt, end_dt, source_names, vertical_limit_m
+                    ),
+                )
+                for start_dt, end_dt in periods
+            )
+
+        completed = False
         try:
             # configure the progress bar
-            progressbar = self.ProgressBarWidget(dispersion_enabled=dispersion_enabled)
-            count_ = 0
-            total_count_ = len(list(self.getTimeSeries())) - 1
+            if progress_callback is None:
+                progress_callback = self.QtProgressCallback(
+                    dispersion_enabled=dispersion_enabled
+                )
+            total_count_ = len(periods)
 
             # loop on complete period
-            for start_dt, end_dt in pairwise(self.getTimeSeries()):
-                logger.debug(f"start {start_dt}, end {end_dt}")
+            for count_ in range(total_count_):
+                # update the progress
+                progress_callback(count_, total_count_)
 
-                # update the progress bar
-                progressbar.setValue(int(100 * count_ / total_count_))
-                count_ += +1
-                QtCore.QCoreApplication.instance().processEvents()
-                if progressbar.wasCanceled():
-                    raise StopIteration("Operation canceled by user")
-
-                # get the ambient condition
-                # ToDo: only run on (start_, end_) with emission sources?
-                try:
-                    ambient_condition = self.getAmbientCondition(start_dt.timestamp())
-                except Exception as error:
-                    logger.warning(
-                        "Couldn't load the ambient condition, so "
-                        "default conditions are used:\n%s",
-                        error,
-                    )
-                    ambient_condition = AmbientCondition()
-
-                period_emissions = []
-
-                # calculate emissions per source
-                for mod_name, mod_obj in self.getModules().items():
-                    logger.debug(mod_name)
-
-                    # process() returns a list of tuples for each specific
-                    # time interval (start_, end_)
-                    for timestamp_, source_, emission_ in mod_obj.process(
-                        start_dt,
-                        end_dt,
-                        source_names=source_names,
-                        ambient_conditions=ambient_condition,
-                        vertical_limit_m=vertical_limit_m,
-                    ):
-
-                        logger.debug(f"{mod_name}: {timestamp_}")
-
-                        if emission_ is not None:
-                            period_emissions.append((source_, emission_))
-                        else:
-                            period_emissions.append(
-                                (
-                                    source_,
-                                    [Emission(default_emissions, default_emissions)],
-                                )
-                            )
+                start_dt, end_dt, period_batch = next(period_results)
+                logger.debug(f"start {start_dt}, end {end_dt}")
 
                 # calculate dispersion per model
+                if dispersion_enabled:
+                    ambient_condition = self._getPeriodAmbientCondition(start_dt)
+
                 for (
                     dispersion_mod_name,
                     dispersion_mod_obj,
                 ) in self.getDispersionModules().items():
                     logger.debug(f"{dispersion_mod_name}: {start_dt}")
-                    dispersion_mod_obj.process(
-                        start_dt, end_dt, period_emissions, ambient_condition
+                    if period_batch.fitsLayout():
+                        dispersion_mod_obj.processBatch(
+                            start_dt, end_dt, period_batch, ambient_condition
+                        )
+                    else:
+                        dispersion_mod_obj.process(
+                            start_dt, end_dt, period_batch.toResult(), ambient_condition
+                        )
+
+                # add a generic (zero) emission if there are no sources
+                if len(period_batch.getSources()) == 0:
+                    period_batch = EmissionBatch.fromResult(
+                        [(Source(), [Emission(defaultEmissions, defaultEmissions)])]
                     )
 
-                # add a generic (zero) emission if the list is empty
-                if len(period_emissions) == 0:
-                    period_emissions.append(
-                        (Source(), [Emission(default_emissions, default_emissions)])
-                    )
+                # pass the emissions to the output modules
+                for output_mod_name, output_mod_obj in self.getOutputModules().items():
+                    if period_batch.fitsLayout():
+                        output_mod_obj.processBatch(start_dt, period_batch)
+                    else:
+                        output_mod_obj.process(start_dt, period_batch.toResult())
 
                 # add the emissions to the dict
-                self._emissions[start_dt] = period_emissions
+                if keep_emissions:
+                    self._emissions[start_dt] = period_batch.toResult()
 
+            completed = True
         except StopIteration as e:
             logger.info("Iteration stopped. %s", e)
+        finally:
+            period_results.close()
+
+            # the modules end their job also if the run fails
+            self._endJobs(workers)
+
+        return completed
 
+    def _endJobs(self, workers: int = 1) -> None:
+        """
+        Execute endJob(..) of the source (unless calculated by workers),
+        dispersion and output modules.
+        """
         # execute endJob(..)
-        logger.debug("Execute endJob(..)")
-        for mod_name, mod_obj in self.getModules().items():
-            mod_obj.endJob()
+        if workers <= 1:
+            logger.debug("Execute endJob(..)")
+            for mod_name, mod_obj in self.getModules().items():
+                mod_obj.endJob()
 
         # execute endJob(..) of dispersion modules
         logger.debug("Execute endJob(..) of dispersion modules")
@@ -256,15 +500,29 @@ class EmissionCalculation:
         ) in self.getDispersionModules().items():
             dispersion_mod_obj.endJob()
 
+        # execute endJob(..) of output modules
+        logger.debug("Execute endJob(..) of output modules")
+        for output_mod_name, output_mod_obj in self.getOutputModules().items():
+            self._output_results[output_mod_name] = output_mod_obj.endJob()
+
     def getModules(self):
         return self._source_modules
 
     def getDispersionModules(self):
         return self._dispersion_modules
 
+    def getOutputModules(self):
+        return self._output_modules
+
+    def getOutputResults(self):
+        return self._output_results
+
     def getEmissions(self):
         return self._emissions
 
+    def setEmissions(self, emissions):
+        self._emissions = emissions
+
     def sortEmissionsByTime(self):
         # sort emissions by index (which is a timestamp)
         self._emissions = dict(
@@ -274,6 +532,9 @@ class EmissionCalculation:
     def getDatabasePath(self):
         return self._database_path
 
+    def getContext(self) -> Optional[InventoryContext]:
+        return self._context
+
     def getTimeSeries(self):
         dt = self._start_dt
         while dt >= self._start_dt and dt <= self._end_dt:
@@ -283,3 +544,86 @@ class EmissionCalculation:
 
     def get3DGrid(self):
         return self._grid
+
+
+def _initWorker(
+    db_path: str,
+    grid_config: GridConfig,
+    start_dt: datetime,
+    end_dt: datetime,
+    time_interval: timedelta,
+    source_modules: dict[str, tuple[type[SourceModule], dict[str, Any]]],
+) -> None:
+    """
+    Set up the source modules of a worker process once. The classes of the
+    modules are passed, as modules registered at runtime (e.g. by plugins) are
+    not registered in a new process. The workers only read the inventory.
+    """
+    global _worker_emission_calculation
+
+    sql_interface.set_read_only(True)
+
+    _worker_emission_calculation = EmissionCalculation(
+        db_path,
+        grid_config,
+        start_dt,
+        end_dt,
+        time_interval,
+        context=InventoryContext(db_path),
+    )
+    for module_name, (module_class, module_config) in source_modules.items():
+        _worker_emission_calculation._addSourceModule(
+            module_name, module_class, module_config
+        )
+
+    for mod_name, mod_obj in _worker_emission_calculation.getModules().items():
+        mod_obj.beginJob()
+
+    # end the job of the source modules when the worker process exits
+    multiprocessing.util.Finalize(None, _endWorker, exitpriority=10)
+
+
+def _endWorker() -> None:
+    """
+    Execute endJob(..) of the source modules of a worker process.
+    """
+    global _worker_emission_calculation
+
+    if _worker_emission_calculation is None:
+        return
+
+    for mod_name, mod_obj in _worker_emission_calculation.getModules().items():
+        mod_obj.endJob()
+
+    _worker_emission_calculation = None
+
+
+def _calculateChunkEmissions(
+    periods: list[tuple[datetime, datetime]],
+    source_names: List,
+    vertical_limit_m: float,
+) -> list[tuple[datetime, datetime, EmissionBatch]]:
+    """
+    Calculate the emissions of a chunk of periods in a worker process. The
+    sources are replaced by lightweight copies to keep the results small.
+    """
+    chunk_results = []
+    sources = {}
+    for start_dt, end_dt in periods:
+        period_batch = _worker_emission_calculation._calculatePeriodEmissions(
+            start_dt, end_dt, source_names, vertical_limit_m
+        )
+        for source in period_batch.getSources():
+            if id(source) not in sources:
+                sources[id(source)] = (source, CachedSource.fromSource(source))
+
+        chunk_results.append(
+            (
+                start_dt,
+                end_dt,
+                period_batch.withSources(
+                    [sources[id(source)][1] for source in period_batch.getSources()]
+                ),
+            )
+        )
+    return chunk_results
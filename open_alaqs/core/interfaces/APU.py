@@ -3,7 +3,7 @@ from collections import OrderedDict
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 # defaultEI={
@@ -113,7 +113,7 @@ class APU:
     #     return val
 
 
-class APUStore(Store, metaclass=Singleton):
+class APUStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'APU' objects
     """
@@ -190,7 +190,7 @@ class APUStore(Store, metaclass=Singleton):
             return None
 
 
-class APUDatabase(SQLSerializable, metaclass=Singleton):
+class APUDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to apu emissions as stored in the database
     """
@@ -234,7 +234,7 @@ class APUDatabase(SQLSerializable, metaclass=Singleton):
             self.deserialize()
 
 
-class APUtimes(SQLSerializable, metaclass=Singleton):
+class APUtimes(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to apu emissions as stored in the database
     """
@@ -14,7 +14,7 @@ from open_alaqs.core.interfaces.EngineDatabases import (
 from open_alaqs.core.interfaces.EngineStore import EngineStore, HeliEngineStore
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 from open_alaqs.core.utils.utils import fuzzy_match
 
 logger = get_logger(__name__)
@@ -173,7 +173,7 @@ class Aircraft:
         return val
 
 
-class AircraftStore(Store, metaclass=Singleton):
+class AircraftStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'Aircraft' objects
     """
@@ -394,7 +394,7 @@ class AircraftStore(Store, metaclass=Singleton):
         return HeliEngineStore(self._db_path)
 
 
-class AircraftDatabase(SQLSerializable, metaclass=Singleton):
+class AircraftDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to default_aircraft table in the spatialite database
     """
@@ -8,7 +8,7 @@ from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.tools import conversion
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -404,7 +404,7 @@ class AircraftTrajectoryPoint(TrajectoryPoint):
         return val
 
 
-class AircraftTrajectoryStore(Store, metaclass=Singleton):
+class AircraftTrajectoryStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'Runway' objects
     """
@@ -483,7 +483,7 @@ class AircraftTrajectoryStore(Store, metaclass=Singleton):
     #     return pd.DataFrame.from_dict(store.getAircraftTrajectoryDatabase().getEntries(), orient='index')
 
 
-class AircraftTrajectoryDatabase(SQLSerializable, metaclass=Singleton):
+class AircraftTrajectoryDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to runway shape file in the spatialite database
     """
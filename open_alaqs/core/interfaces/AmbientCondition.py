@@ -6,7 +6,7 @@ from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.tools import conversion
 from open_alaqs.core.tools.csv_interface import read_csv_to_dict
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -161,7 +161,7 @@ class AmbientCondition:
         return val
 
 
-class AmbientConditionStore(Store, metaclass=Singleton):
+class AmbientConditionStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'AmbientCondition' objects
     """
@@ -266,7 +266,7 @@ class AmbientConditionStore(Store, metaclass=Singleton):
             )
 
 
-class AmbientConditionDatabaseSQL(SQLSerializable, metaclass=Singleton):
+class AmbientConditionDatabaseSQL(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to ambient conditions table in the spatialite database
     """
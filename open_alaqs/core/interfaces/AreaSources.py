@@ -7,7 +7,7 @@ from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.tools import spatial
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 loaded_color_logger = False
 try:
@@ -71,7 +71,7 @@ class AreaSources(Source):
         return val
 
 
-class AreaSourcesStore(Store, metaclass=Singleton):
+class AreaSourcesStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'AreaSources' objects
     """
@@ -109,7 +109,7 @@ class AreaSourcesStore(Store, metaclass=Singleton):
         return self._area_db
 
 
-class AreaSourcesDatabase(SQLSerializable, metaclass=Singleton):
+class AreaSourcesDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to area shape file in the spatialite database
     """
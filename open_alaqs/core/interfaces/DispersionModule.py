@@ -51,5 +51,16 @@ class DispersionModule:
         # result is of format [(Source, Emission)]
         return NotImplemented
 
+    def processBatch(self, start_dt, end_dt, batch, ambient_conditions, **kwargs):
+        """
+        Process the emissions of a period as a batch (see EmissionBatch).
+
+        The default implementation passes the (source, emissions) list of the
+        batch to process(), modules can override it to use the batch directly.
+        """
+        return self.process(
+            start_dt, end_dt, batch.toResult(), ambient_conditions, **kwargs
+        )
+
     def endJob(self):
         return NotImplemented
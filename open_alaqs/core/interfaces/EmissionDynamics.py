@@ -5,7 +5,7 @@ from typing import TypedDict, cast
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -80,7 +80,7 @@ class EmissionDynamics:
         return val
 
 
-class EmissionDynamicsStore(Store, metaclass=Singleton):
+class EmissionDynamicsStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'APU' objects
     """
@@ -126,7 +126,7 @@ class EmissionDynamicsStore(Store, metaclass=Singleton):
         return result
 
 
-class EmissionDynamicsDatabase(SQLSerializable, metaclass=Singleton):
+class EmissionDynamicsDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to emission dynamics as stored in the database
     """
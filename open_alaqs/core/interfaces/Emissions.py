@@ -1,6 +1,8 @@
+from collections import defaultdict
 from enum import Enum
-from typing import Literal, Tuple
+from typing import Iterable, Literal, Optional, Tuple, Union
 
+import numpy as np
 from shapely.geometry import GeometryCollection
 from shapely.wkt import loads
 
@@ -131,16 +133,16 @@ class Emission(Store):
             self._vertical_ext.update(var)
 
     def transposeToKilograms(self):
-        emissions_ = Emission()
-        emissions_.setGeometryText(self.getGeometryText())
-        emissions_.setVerticalExtent(self.getVerticalExtent())
-
-        for key in list(self.getObjects().keys()):
+        values = {}
+        for key, value in self.getObjects().items():
             if "_g" in key and key.index("_g") == len(key) - 2:
                 # add new key
-                emissions_.addObject("%s_kg" % (key[:-2]), self.getObject(key) / 1000.0)
-            else:
-                emissions_.addObject(key, self.getObject(key))
+                key, value = "%s_kg" % (key[:-2]), value / 1000.0
+            values[key] = values[key] + value if key in values else value
+
+        emissions_ = Emission(values)
+        emissions_.setGeometryText(self.getGeometryText())
+        emissions_.setVerticalExtent(self.getVerticalExtent())
         return emissions_
 
     def add(self, emission_index_: EmissionIndex, time_s_in_mode: float):
@@ -222,3 +224,559 @@ class Emission(Store):
     def rreplace(self, s, old, new, occurrence):
         li = s.rsplit(old, occurrence)
         return new.join(li)
+
+
+# The fixed layout of emission vectors: the fuel, the mass of each pollutant (in
+# grams and in kilograms) and the nvPM number
+EMISSION_KEYS: Tuple[str, ...] = (
+    "fuel_kg",
+    *(f"{p.value}_{PollutantUnit.GRAM.value}" for p in PollutantType),
+    "nvpm_g",
+    *(f"{p.value}_{PollutantUnit.KG.value}" for p in PollutantType),
+    "nvpm_kg",
+    "nvpm_number",
+)
+
+# The unit of each key of the layout
+EMISSION_UNITS: Tuple[str, ...] = tuple(key.rsplit("_", 1)[1] for key in EMISSION_KEYS)
+
+EMISSION_COLUMNS = {key: column for column, key in enumerate(EMISSION_KEYS)}
+
+
+class EmissionVector:
+    """
+    Emissions as a float64 vector over the fixed layout EMISSION_KEYS, with the
+     mask of the keys that are set. Missing values (None) are stored as NaN, so
+     that the arithmetic matches the one of Emission.
+    """
+
+    __slots__ = ("_values", "_present")
+
+    def __init__(self, values: Optional[dict] = None):
+        self._values = np.zeros(len(EMISSION_KEYS))
+        self._present = np.zeros(len(EMISSION_KEYS), dtype=bool)
+        for key, value in (values or {}).items():
+            self.setValue(key, value)
+
+    @classmethod
+    def fromArrays(cls, values: np.ndarray, present: np.ndarray) -> "EmissionVector":
+        vector = cls()
+        vector._values = np.where(present, values, 0.0)
+        vector._present = np.asarray(present, dtype=bool).copy()
+        return vector
+
+    @classmethod
+    def fromEmission(cls, emission: Store) -> Optional["EmissionVector"]:
+        """
+        Get the vector of an emission, or None if the emission has keys or
+         values that do not fit the layout.
+        """
+        stacked = cls.stack([emission])
+        if stacked is None:
+            return None
+        return cls.fromArrays(stacked[0][0], stacked[1][0])
+
+    def toEmission(self) -> Emission:
+        return Emission(self.getObjects())
+
+    def getValues(self) -> np.ndarray:
+        return self._values
+
+    def getPresent(self) -> np.ndarray:
+        return self._present
+
+    def hasKey(self, key: str) -> bool:
+        return key in EMISSION_COLUMNS and bool(self._present[EMISSION_COLUMNS[key]])
+
+    def getObjects(self) -> dict:
+        return {
+            EMISSION_KEYS[column]: (None if np.isnan(value) else float(value))
+            for column, value in zip(
+                np.flatnonzero(self._present), self._values[self._present]
+            )
+        }
+
+    def getValue(self, key: str) -> Optional[float]:
+        if not self.hasKey(key):
+            return None
+        value = self._values[EMISSION_COLUMNS[key]]
+        return None if np.isnan(value) else float(value)
+
+    def setValue(self, key: str, value: Optional[float]) -> None:
+        column = EMISSION_COLUMNS[key]
+        self._values[column] = np.nan if value is None else value
+        self._present[column] = True
+
+    def addValue(self, key: str, val: float) -> bool:
+        if self.hasKey(key):
+            self._values[EMISSION_COLUMNS[key]] += val
+            return True
+        else:
+            return False
+
+    def add_value(
+        self, pollutant_type: PollutantType, unit: PollutantUnit, value: float
+    ) -> None:
+        self._values[EMISSION_COLUMNS[f"{pollutant_type.value}_{unit.value}"]] += value
+
+    def get_value(self, pollutant_type: PollutantType, unit: PollutantUnit) -> float:
+        key = f"{pollutant_type.value}_{unit.value}"
+        multiplier = 1
+
+        # as Emission.get_value(), look for the other unit if not present
+        if not self.hasKey(key):
+            if unit == PollutantUnit.GRAM:
+                key = f"{pollutant_type.value}_{PollutantUnit.KG.value}"
+                multiplier = 0.001
+            elif unit == PollutantUnit.KG:
+                key = f"{pollutant_type.value}_{PollutantUnit.GRAM.value}"
+                multiplier = 1000
+            if not self.hasKey(key):
+                raise KeyError(key)
+
+        return self._values[EMISSION_COLUMNS[key]] * multiplier
+
+    def isZero(self) -> bool:
+        return not np.any(self._values[~np.isnan(self._values)])
+
+    def __add__(self, other: "EmissionVector") -> "EmissionVector":
+        if not isinstance(other, EmissionVector):
+            raise TypeError(f"cannot add '{type(other)}' to '{type(self)}' objects")
+        return EmissionVector.fromArrays(
+            self._values + other._values, self._present | other._present
+        )
+
+    def __radd__(self, other) -> "EmissionVector":
+        # python's "sum" method starts with a 0
+        if isinstance(other, (int, float)) and other == 0:
+            return EmissionVector.fromArrays(self._values, self._present)
+        return self + other
+
+    def __iadd__(self, other: "EmissionVector") -> "EmissionVector":
+        if not isinstance(other, EmissionVector):
+            raise TypeError(f"cannot add '{type(other)}' to '{type(self)}' objects")
+        self._values += other._values
+        self._present |= other._present
+        return self
+
+    def __mul__(self, other: float) -> "EmissionVector":
+        return EmissionVector.fromArrays(self._values * other, self._present)
+
+    def __rmul__(self, other: float) -> "EmissionVector":
+        return self * other
+
+    @staticmethod
+    def stack(
+        emissions: Iterable[Union[Store, "EmissionVector"]],
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Stack emissions into a (emissions, EMISSION_KEYS) array of values and
+         the mask of the keys that are set. Returns None if an emission has keys
+         or values that do not fit the layout.
+        """
+        emissions = list(emissions)
+        values = np.zeros((len(emissions), len(EMISSION_KEYS)))
+        present = np.zeros((len(emissions), len(EMISSION_KEYS)), dtype=bool)
+
+        # emissions with the same keys are stacked together
+        groups = defaultdict(list)
+        rows = []
+        for row, emission in enumerate(emissions):
+            if isinstance(emission, EmissionVector):
+                values[row] = emission._values
+                present[row] = emission._present
+                rows.append(None)
+                continue
+            objects = emission.getObjects()
+            groups[tuple(objects)].append(row)
+            rows.append(list(objects.values()))
+
+        for keys, group_rows in groups.items():
+            try:
+                columns = [EMISSION_COLUMNS[key] for key in keys]
+                group_values = np.array([rows[row] for row in group_rows], dtype=float)
+            except (KeyError, TypeError, ValueError):
+                return None
+            index = np.ix_(group_rows, columns)
+            values[index] = group_values.reshape(len(group_rows), len(columns))
+            present[index] = True
+        return values, present
+
+
+def sum_emissions(emissions: Iterable[Emission]) -> Union[Emission, int]:
+    """
+    Sum emissions as `sum(emissions)`, over the stacked vectors of the emissions.
+     Returns 0 if there are no emissions.
+    """
+    emissions = list(emissions)
+    if not emissions:
+        return 0
+
+    stacked = EmissionVector.stack(emissions)
+    if stacked is None:
+        return sum(emissions)
+
+    values, present = stacked
+    return EmissionVector.fromArrays(
+        values.sum(axis=0), present.any(axis=0)
+    ).toEmission()
+
+
+class EmissionBatch:
+    """
+    The emissions of a period in columns, as an alternative to the list of
+     (source, emissions) tuples returned by the source modules.
+
+    Each row is an emission, with the position of its source in getSources(),
+     the position of its geometry (WKT) in getGeometries(), its values over
+     EMISSION_KEYS (with the mask of the keys that are set) and its vertical
+     extent (z_min, z_max).
+
+    A batch of emissions that do not fit the layout (see fromList()) keeps the
+     list instead, and has no rows in the arrays. Its modules get the list
+     (see fitsLayout()).
+    """
+
+    def __init__(
+        self,
+        sources: list,
+        source_ids: np.ndarray,
+        geometries: list[Optional[str]],
+        geometry_ids: np.ndarray,
+        values: np.ndarray,
+        present: np.ndarray,
+        vertical_extents: np.ndarray,
+    ):
+        self._sources = sources
+        self._source_ids = np.asarray(source_ids, dtype=np.int64)
+        self._geometries = geometries
+        self._geometry_ids = np.asarray(geometry_ids, dtype=np.int64)
+        self._values = np.asarray(values, dtype=float).reshape(-1, len(EMISSION_KEYS))
+        self._present = np.asarray(present, dtype=bool).reshape(self._values.shape)
+        self._vertical_extents = np.asarray(vertical_extents, dtype=float).reshape(
+            -1, 2
+        )
+        self._result = None
+        self._fits_layout = True
+
+    @classmethod
+    def fromResult(
+        cls, result: Iterable[tuple], default: Optional[Emission] = None
+    ) -> "EmissionBatch":
+        """
+        Get the batch of a list of (source, emissions) tuples. The sources
+         without emissions (None) get the default emission, if any.
+
+        Raises a ValueError if an emission has keys or values that do not fit
+         the layout.
+        """
+        sources = []
+        source_ids = []
+        emissions_ = []
+        for source, emissions in result:
+            if emissions is None:
+                emissions = [] if default is None else [default]
+            source_ids.extend([len(sources)] * len(emissions))
+            sources.append(source)
+            emissions_.extend(emissions)
+
+        stacked = EmissionVector.stack(emissions_)
+        if stacked is None:
+            raise ValueError("The emissions do not fit the layout of EMISSION_KEYS")
+
+        geometries = {}
+        geometry_ids = [
+            geometries.setdefault(emission.getGeometryText(), len(geometries))
+            for emission in emissions_
+        ]
+        vertical_extents = [
+            (extent["z_min"], extent["z_max"])
+            for extent in (emission.getVerticalExtent() for emission in emissions_)
+        ]
+        return cls(
+            sources,
+            source_ids,
+            list(geometries),
+            geometry_ids,
+            *stacked,
+            vertical_extents,
+        )
+
+    @classmethod
+    def fromList(
+        cls, result: Iterable[tuple], default: Optional[Emission] = None
+    ) -> "EmissionBatch":
+        """
+        Get the batch that keeps a list of (source, emissions) tuples, e.g. if
+         the emissions do not fit the layout. The sources without emissions
+         (None) get the default emission, if any.
+        """
+        result_ = [
+            (
+                source,
+                list(
+                    emissions
+                    if emissions is not None
+                    else ([] if default is None else [default])
+                ),
+            )
+            for source, emissions in result
+        ]
+        batch = cls(
+            [source for source, _ in result_],
+            np.empty(0, dtype=np.int64),
+            [],
+            np.empty(0, dtype=np.int64),
+            _EMPTY_VALUES,
+            _EMPTY_VALUES.astype(bool),
+            np.empty((0, 2)),
+        )
+        batch._result = result_
+        batch._fits_layout = False
+        return batch
+
+    @classmethod
+    def concatenate(cls, batches: Iterable["EmissionBatch"]) -> "EmissionBatch":
+        """
+        Concatenate the rows and the sources of batches.
+        """
+        batches = list(batches)
+        if not all(batch.fitsLayout() for batch in batches):
+            return cls.fromList(item for batch in batches for item in batch.toResult())
+
+        sources = []
+        source_ids = []
+        for batch in batches:
+            source_ids.append(batch._source_ids + len(sources))
+            sources.extend(batch._sources)
+        return cls._join(sources, batches, source_ids)
+
+    @classmethod
+    def fromBlocks(
+        cls, result: Iterable[tuple[object, list["EmissionBatch"]]]
+    ) -> "EmissionBatch":
+        """
+        Get the batch of a list of (source, blocks) tuples, where the rows of
+         the blocks (batches) all belong to the source. The same block can be
+         shared by several sources.
+        """
+        sources = []
+        blocks = []
+        source_ids = []
+        for source, source_blocks in result:
+            for block in source_blocks:
+                blocks.append(block)
+                source_ids.append(np.full(len(block), len(sources), dtype=np.int64))
+            sources.append(source)
+        return cls._join(sources, blocks, source_ids)
+
+    @classmethod
+    def _join(
+        cls, sources: list, batches: list["EmissionBatch"], source_ids: list
+    ) -> "EmissionBatch":
+        # the geometries of a batch that occurs several times are remapped once
+        geometries = {}
+        geometry_ids = []
+        remapped = {}
+        for batch in batches:
+            if id(batch) not in remapped:
+                remapped[id(batch)] = np.array(
+                    [
+                        geometries.setdefault(geometry, len(geometries))
+                        for geometry in batch._geometries
+                    ],
+                    dtype=np.int64,
+                )
+            geometry_ids.append(remapped[id(batch)][batch._geometry_ids])
+
+        return cls(
+            sources,
+            np.concatenate(source_ids + [np.empty(0, dtype=np.int64)]),
+            list(geometries),
+            np.concatenate(geometry_ids + [np.empty(0, dtype=np.int64)]),
+            np.concatenate([batch._values for batch in batches] + [_EMPTY_VALUES]),
+            np.concatenate(
+                [batch._present for batch in batches] + [_EMPTY_VALUES.astype(bool)]
+            ),
+            np.concatenate(
+                [batch._vertical_extents for batch in batches] + [np.empty((0, 2))]
+            ),
+        )
+
+    def __len__(self) -> int:
+        if not self._fits_layout:
+            return sum(len(emissions) for _, emissions in self._result)
+        return len(self._values)
+
+    def fitsLayout(self) -> bool:
+        """
+        Whether the emissions are in the arrays, else only in toResult().
+        """
+        return self._fits_layout
+
+    def getSources(self) -> list:
+        return self._sources
+
+    def getSourceIds(self) -> np.ndarray:
+        return self._source_ids
+
+    def getGeometries(self) -> list[Optional[str]]:
+        return self._geometries
+
+    def getGeometryIds(self) -> np.ndarray:
+        return self._geometry_ids
+
+    def getValues(self) -> np.ndarray:
+        return self._values
+
+    def getPresent(self) -> np.ndarray:
+        return self._present
+
+    def getVerticalExtents(self) -> np.ndarray:
+        return self._vertical_extents
+
+    def withSources(self, sources: list) -> "EmissionBatch":
+        """
+        Get the same rows with other sources (e.g. lightweight copies).
+        """
+        if len(sources) != len(self._sources):
+            raise ValueError("The number of sources does not match")
+        if not self._fits_layout:
+            return EmissionBatch.fromList(
+                zip(sources, (emissions for _, emissions in self._result))
+            )
+        return EmissionBatch(
+            sources,
+            self._source_ids,
+            self._geometries,
+            self._geometry_ids,
+            self._values,
+            self._present,
+            self._vertical_extents,
+        )
+
+    def transposeToKilograms(self) -> "EmissionBatch":
+        """
+        Convert the values in grams to kilograms, as
+         Emission.transposeToKilograms().
+        """
+        values = np.where(self._present, self._values, 0.0)
+        present = self._present.copy()
+        values[:, _KG_COLUMNS] += values[:, _GRAM_COLUMNS] / 1000.0
+        present[:, _KG_COLUMNS] |= present[:, _GRAM_COLUMNS]
+        values[:, _GRAM_COLUMNS] = 0.0
+        present[:, _GRAM_COLUMNS] = False
+        return EmissionBatch(
+            self._sources,
+            self._source_ids,
+            self._geometries,
+            self._geometry_ids,
+            values,
+            present,
+            self._vertical_extents,
+        )
+
+    def get_values(
+        self, pollutant_type: PollutantType, unit: PollutantUnit
+    ) -> np.ndarray:
+        """
+        Get the values of a pollutant of each row, as Emission.get_value().
+        """
+        key = f"{pollutant_type.value}_{unit.value}"
+        column = EMISSION_COLUMNS[key]
+        values = self._values[:, column].copy()
+        missing = ~self._present[:, column]
+
+        # as Emission.get_value(), look for the other unit if not present
+        if missing.any():
+            if unit == PollutantUnit.GRAM:
+                other_key = f"{pollutant_type.value}_{PollutantUnit.KG.value}"
+                multiplier = 0.001
+            elif unit == PollutantUnit.KG:
+                other_key = f"{pollutant_type.value}_{PollutantUnit.GRAM.value}"
+                multiplier = 1000
+            else:
+                raise KeyError(key)
+
+            other_column = EMISSION_COLUMNS[other_key]
+            if not self._present[missing, other_column].all():
+                raise KeyError(other_key)
+            values[missing] = self._values[missing, other_column] * multiplier
+
+        return values
+
+    def sum(self) -> Union[Emission, int]:
+        """
+        Sum the emissions of all rows, as sum_emissions(). Returns 0 if there
+         are no rows.
+        """
+        if not self._fits_layout:
+            return sum_emissions(e for _, emissions in self._result for e in emissions)
+        if len(self) == 0:
+            return 0
+        return EmissionVector.fromArrays(
+            self._values.sum(axis=0), self._present.any(axis=0)
+        ).toEmission()
+
+    def sumBySource(self) -> list[tuple[object, Union[Emission, int]]]:
+        """
+        Sum the emissions of the rows of each source, as sum_emissions().
+        """
+        if not self._fits_layout:
+            return [
+                (source, sum_emissions(emissions)) for source, emissions in self._result
+            ]
+
+        values = np.zeros((len(self._sources), len(EMISSION_KEYS)))
+        present = np.zeros(values.shape, dtype=bool)
+        np.add.at(values, self._source_ids, self._values)
+        np.logical_or.at(present, self._source_ids, self._present)
+        counts = np.bincount(self._source_ids, minlength=len(self._sources))
+
+        return [
+            (
+                source,
+                (
+                    EmissionVector.fromArrays(values[i], present[i]).toEmission()
+                    if counts[i]
+                    else 0
+                ),
+            )
+            for i, source in enumerate(self._sources)
+        ]
+
+    def toResult(self) -> list[tuple[object, list[Emission]]]:
+        """
+        Get the list of (source, emissions) tuples of the batch, as returned by
+         the source modules. The list is created once.
+        """
+        if self._result is not None:
+            return self._result
+
+        emissions_by_source = [[] for _ in self._sources]
+        for row, (source_id, geometry_id) in enumerate(
+            zip(self._source_ids.tolist(), self._geometry_ids.tolist())
+        ):
+            emission = EmissionVector.fromArrays(
+                self._values[row], self._present[row]
+            ).toEmission()
+            emission.setGeometryText(self._geometries[geometry_id])
+            z_min, z_max = self._vertical_extents[row].tolist()
+            emission.setVerticalExtent({"z_min": z_min, "z_max": z_max})
+            emissions_by_source[source_id].append(emission)
+
+        self._result = list(zip(self._sources, emissions_by_source))
+        return self._result
+
+
+_EMPTY_VALUES = np.empty((0, len(EMISSION_KEYS)))
+
+# The columns of the values in grams and the matching columns in kilograms
+_GRAM_COLUMNS = [
+    column
+    for column, unit in enumerate(EMISSION_UNITS)
+    if unit == PollutantUnit.GRAM.value
+]
+_KG_COLUMNS = [
+    EMISSION_COLUMNS[EMISSION_KEYS[column][:-2] + "_kg"] for column in _GRAM_COLUMNS
+]
@@ -3,10 +3,8 @@ from typing import Optional
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.Emissions import EmissionIndex, PollutantType
 from open_alaqs.core.interfaces.Store import Store
-from open_alaqs.core.tools.bffm2 import calculate_emission_index
-from open_alaqs.core.tools.twin_quadratic_fit_method import (
-    calculate_fuel_flow_from_power_setting,
-)
+from open_alaqs.core.tools.bffm2 import BFFM2Model
+from open_alaqs.core.tools.twin_quadratic_fit_method import TwinQuadraticFuelFlow
 
 logger = get_logger(__name__)
 
@@ -163,8 +161,16 @@ class EngineEmissionIndex(Store):
             "Idle": 0.07,  # Idle
         }
 
+        # The BFFM2 models, by installation corrections
+        self._bffm2_models: dict[tuple, BFFM2Model] = {}
+
+        # The twin-quadratic fuel flow curve, created on first use
+        self._fuel_flow_curve: Optional[TwinQuadraticFuelFlow] = None
+        self._has_fuel_flow_curve = False
+
     def setModePowerSetting(self, mode, power_setting):
         self._modes_powersetting_map[mode] = power_setting
+        self._has_fuel_flow_curve = False
 
     def getPowerSettingByMode(self, mode):
         return self._modes_powersetting_map.get(mode)
@@ -336,9 +342,7 @@ class EngineEmissionIndex(Store):
         elif method["name"] == "BFFM2":
 
             # get map power-setting [%]:fuel flow [kg/s]
-            fuel_flow = calculate_fuel_flow_from_power_setting(
-                power_setting, self.getICAOEngineEmissionsDB(True, "fuel_kg_sec")
-            )
+            fuel_flow = self.getFuelFlow(power_setting)
             if fuel_flow is None:
                 return None
 
@@ -396,6 +400,48 @@ class EngineEmissionIndex(Store):
             #         title=title
             #     )
 
+    def getFuelFlowCurve(self) -> Optional[TwinQuadraticFuelFlow]:
+        """
+        Get the twin-quadratic fuel flow curve of the engine, created once from
+         the power settings and fuel flows of the ICAO EEDB. Returns None if the
+         ICAO EEDB is incomplete.
+        """
+        if not self._has_fuel_flow_curve:
+            self._has_fuel_flow_curve = True
+            try:
+                self._fuel_flow_curve = TwinQuadraticFuelFlow(
+                    self.getICAOEngineEmissionsDB(True, "fuel_kg_sec")
+                )
+            except ValueError as exc_:
+                logger.error(exc_)
+                self._fuel_flow_curve = None
+        return self._fuel_flow_curve
+
+    def getFuelFlow(self, power_settings):
+        """
+        Get the fuel flows (kg/s) of power settings (a float or an array in
+         interval [0.,1.]) with the twin-quadratic fit method. Returns None if
+         the ICAO EEDB is incomplete.
+        """
+        fuel_flow_curve = self.getFuelFlowCurve()
+        if fuel_flow_curve is None:
+            return None
+        return fuel_flow_curve.fuel_flow(power_settings)
+
+    def getBFFM2Model(self, installation_corrections: dict = None) -> BFFM2Model:
+        """
+        Get the BFFM2 model of the engine for the installation corrections. The
+         model is created once from the non-adjusted reference points of the
+         ICAO EEDB.
+        """
+        key = tuple(sorted((installation_corrections or {}).items()))
+        if key not in self._bffm2_models:
+            self._bffm2_models[key] = BFFM2Model(
+                self.getICAOEngineEmissionsDB(format="BFFM2"),
+                installation_corrections,
+            )
+        return self._bffm2_models[key]
+
     def getEmissionIndexByFuelFlow(
         self, fuel_flow, method={"name": "BFFM2", "config": {}}
     ):
@@ -446,22 +492,14 @@ class EngineEmissionIndex(Store):
                     ac = ambient_conditions
                 ambient_conditions.update(ac)
 
-            # Non-adjusted reference from EEDB at ISA conditions
-            # maps fuel flow and emission indices
-            icao_eedb_bffm2 = self.getICAOEngineEmissionsDB(format="BFFM2")
-            # TODO OPENGIS.ch: this list is defined twice, once here and once in `getICAOEngineEmissionsDB`
-            bffm2_keys = [PollutantType.NOx, PollutantType.CO, PollutantType.HC]
+            # The model of the engine, prepared once per installation corrections
+            bffm2_model = self.getBFFM2Model(installation_corrections)
 
             # Do the calculation
             emission_index.setObject("fuel_kg_sec", fuel_flow)
-            for pollutant in bffm2_keys:
-                val = calculate_emission_index(
-                    pollutant,
-                    fuel_flow,
-                    icao_eedb_bffm2,
-                    ambient_conditions=ambient_conditions,
-                    installation_corrections=installation_corrections,
-                )
+            for pollutant, val in bffm2_model.calculate_emission_indices(
+                fuel_flow, ambient_conditions
+            ).items():
                 if "co" in pollutant.lower() and "co2" not in pollutant.lower():
                     emission_index.setObject("co_g_kg", val)
                 if "nox" in pollutant.lower():
@@ -523,6 +561,10 @@ class EngineEmissionIndex(Store):
             "technology_age": val.get("technology_age", ""),
         }
 
+        # The reference points have changed
+        self._bffm2_models.clear()
+        self._has_fuel_flow_curve = False
+
         # Update the mode if provided
         if "thrust" in val:
             self.setModePowerSetting(mode, val["thrust"])
@@ -6,12 +6,12 @@ from open_alaqs.core.interfaces.Engine import (
     HelicopterEngineEmissionIndex,
 )
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
 
-class EngineEmissionFactorsStartDatabase(SQLSerializable, metaclass=Singleton):
+class EngineEmissionFactorsStartDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to emission factors that are related to an engine start
     """
@@ -53,7 +53,7 @@ class EngineEmissionFactorsStartDatabase(SQLSerializable, metaclass=Singleton):
             self.deserialize()
 
 
-class EngineModeDatabase(SQLSerializable, metaclass=Singleton):
+class EngineModeDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to aircraft-engine-emission indices
     """
@@ -88,7 +88,9 @@ class EngineModeDatabase(SQLSerializable, metaclass=Singleton):
             self.deserialize()
 
 
-class HelicopterEngineEmissionIndicesDatabase(SQLSerializable, metaclass=Singleton):
+class HelicopterEngineEmissionIndicesDatabase(
+    SQLSerializable, metaclass=InventorySingleton
+):
     """
     Class that grants access to aircraft-engine-emission indices
     """
@@ -205,7 +207,7 @@ class HelicopterEngineEmissionIndicesDatabase(SQLSerializable, metaclass=Singlet
             return None
 
 
-class EngineEmissionIndicesDatabase(SQLSerializable, metaclass=Singleton):
+class EngineEmissionIndicesDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to aircraft-engine-emission indices
     """
@@ -8,12 +8,12 @@ from open_alaqs.core.interfaces.EngineDatabases import (
     HelicopterEngineEmissionIndicesDatabase,
 )
 from open_alaqs.core.interfaces.Store import Store
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
 
-class EngineStore(Store, metaclass=Singleton):
+class EngineStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'Engine' objects
     """
@@ -93,7 +93,7 @@ class EngineStore(Store, metaclass=Singleton):
         return None
 
 
-class HeliEngineStore(Store, metaclass=Singleton):
+class HeliEngineStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'Engine' objects
     """
@@ -5,7 +5,7 @@ from open_alaqs.core.interfaces.Emissions import EmissionIndex
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.tools import spatial
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -141,7 +141,7 @@ class Gate:
         return val
 
 
-class GateStore(Store, metaclass=Singleton):
+class GateStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'Gate' objects
     """
@@ -182,7 +182,7 @@ class GateStore(Store, metaclass=Singleton):
         return self._gate_db
 
 
-class GateDatabase(SQLSerializable, metaclass=Singleton):
+class GateDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to gate shape file in the spatialite database
     """
@@ -353,7 +353,7 @@ class DefaultGateEmissionProfile:
         return val
 
 
-class DefaultGateEmissionProfileStore(Store, metaclass=Singleton):
+class DefaultGateEmissionProfileStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'DefaultGateEmissionProfile' objects
     """
@@ -381,7 +381,7 @@ class DefaultGateEmissionProfileStore(Store, metaclass=Singleton):
         return self._db
 
 
-class DefaultGateEmissionProfileDatabase(SQLSerializable, metaclass=Singleton):
+class DefaultGateEmissionProfileDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to default gate profiles in the spatialite database
     """
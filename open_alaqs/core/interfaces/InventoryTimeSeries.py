@@ -5,12 +5,12 @@ from datetime import datetime
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
 
-class InventoryTimeSeriesStore(Store, metaclass=Singleton):
+class InventoryTimeSeriesStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'InventoryTimeSeries' objects
     """
@@ -55,7 +55,7 @@ class InventoryTimeSeriesStore(Store, metaclass=Singleton):
             yield ts_
 
 
-class InventoryTimeSeriesDatabase(SQLSerializable, metaclass=Singleton):
+class InventoryTimeSeriesDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to runway shape file in the spatialite database
     """
@@ -3,8 +3,10 @@ import difflib
 import math
 import sys
 from collections import OrderedDict
+from collections.abc import MutableMapping
+from datetime import datetime
 from inspect import currentframe, getframeinfo
-from typing import TypedDict
+from typing import Any, Callable, Iterable, Iterator, Optional, TypedDict
 
 import matplotlib
 import numpy as np
@@ -39,12 +41,13 @@ from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.interfaces.Taxiway import TaxiwayRoutesStore
 from open_alaqs.core.interfaces.Track import TrackStore
-from open_alaqs.core.tools import conversion, spatial
+from open_alaqs.core.tools import conversion, spatial, sql_interface
+from open_alaqs.core.tools.inventory_context import InventoryContext, activate
 from open_alaqs.core.tools.nox_correction_ambient import (
     nox_correction_for_ambient_conditions,
 )
 from open_alaqs.core.tools.ProgressBarStage import ProgressBarStage
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 sys.path.append("..")
 
@@ -250,7 +253,7 @@ class Movement:
         # if self.getAircraft() and self.getAircraft().getRegistration():
         #     return self.getAircraft().getRegistration()
         # else:
-        return "id %s: %s-%s-%s-%s" % (
+        return self.formatName(
             self.getOid(),
             self.getAircraft().getICAOIdentifier(),
             self.getDepartureArrivalFlag(),
@@ -258,6 +261,18 @@ class Movement:
             self.getBlockTime(as_str=True),
         )
 
+    @staticmethod
+    def formatName(
+        oid, icao_identifier, departure_arrival, runway_time, block_time
+    ) -> str:
+        return "id %s: %s-%s-%s-%s" % (
+            oid,
+            icao_identifier,
+            departure_arrival,
+            runway_time,
+            block_time,
+        )
+
     def getEngineThrustLevelTaxiing(self):
         return self._engine_thrust_level_taxiing
 
@@ -433,11 +448,9 @@ class Movement:
         self, geometry_wkt_init, width, height, shift, EPSG_source, EPSG_target
     ):
 
-        (geo_wkt, swap) = spatial.reproject_geometry(
+        (points, swap) = spatial.reproject_points(
             geometry_wkt_init, EPSG_source, EPSG_target
         )
-
-        points = spatial.getAllPoints(geo_wkt, swap)
         lon1, lat1, alt1 = points[0][1], points[0][0], points[0][2]
         lon2, lat2, alt2 = points[1][1], points[1][0], points[1][2]
 
@@ -1191,7 +1204,7 @@ class Movement:
                     ver_shift
                 ) <= abs(ver_shift):
 
-                    (segment_geometry_wkt, swap) = spatial.reproject_geometry(
+                    (segment_points, swap) = spatial.reproject_points(
                         spatial.getLineGeometryText(
                             startPoint_.getGeometryText(), endPoint_.getGeometryText()
                         ),
@@ -1199,8 +1212,8 @@ class Movement:
                         EPSG_id_target,
                     )
 
-                    start_point = spatial.getAllPoints(segment_geometry_wkt, swap)[0]
-                    end_point = spatial.getAllPoints(segment_geometry_wkt, swap)[-1]
+                    start_point = segment_points[0]
+                    end_point = segment_points[-1]
                     inverse_distance_segment = spatial.getInverseDistance(
                         start_point[0], start_point[1], end_point[0], end_point[1]
                     )
@@ -1240,7 +1253,7 @@ class Movement:
                     endPoint_copy.updateGeometryText()
 
                 else:
-                    (segment_geometry_wkt, swap) = spatial.reproject_geometry(
+                    (segment_points, swap) = spatial.reproject_points(
                         spatial.getLineGeometryText(
                             startPoint_.getGeometryText(),
                             self.getTrajectory().getTouchdownPoint(),
@@ -1249,14 +1262,14 @@ class Movement:
                         EPSG_id_target,
                     )
                     start_point, end_point = (
-                        spatial.getAllPoints(segment_geometry_wkt, swap)[0],
-                        spatial.getAllPoints(segment_geometry_wkt, swap)[-1],
+                        segment_points[0],
+                        segment_points[-1],
                     )
                     dist_startPoint_sasPoint = spatial.getInverseDistance(
                         start_point[0], start_point[1], end_point[0], end_point[1]
                     )["s12"]
 
-                    (segment_geometry_wkt, swap) = spatial.reproject_geometry(
+                    (segment_points, swap) = spatial.reproject_points(
                         spatial.getLineGeometryText(
                             self.getTrajectory().getTouchdownPoint(),
                             endPoint_.getGeometryText(),
@@ -1265,8 +1278,8 @@ class Movement:
                         EPSG_id_target,
                     )
                     start_point, end_point = (
-                        spatial.getAllPoints(segment_geometry_wkt, swap)[0],
-                        spatial.getAllPoints(segment_geometry_wkt, swap)[-1],
+                        segment_points[0],
+                        segment_points[-1],
                     )
                     dist_sasPoint_endPoint = spatial.getInverseDistance(
                         start_point[0], start_point[1], end_point[0], end_point[1]
@@ -1311,7 +1324,7 @@ class Movement:
                         .getEmissionDynamics("default")["horizontal_shift"]
                     )
 
-                (segment_geometry_wkt, swap) = spatial.reproject_geometry(
+                (segment_points, swap) = spatial.reproject_points(
                     spatial.getLineGeometryText(
                         startPoint_.getGeometryText(), endPoint_.getGeometryText()
                     ),
@@ -1319,8 +1332,8 @@ class Movement:
                     EPSG_id_target,
                 )
 
-                start_point = spatial.getAllPoints(segment_geometry_wkt, swap)[0]
-                end_point = spatial.getAllPoints(segment_geometry_wkt, swap)[-1]
+                start_point = segment_points[0]
+                end_point = segment_points[-1]
                 inverse_distance_segment = spatial.getInverseDistance(
                     start_point[0], start_point[1], end_point[0], end_point[1]
                 )
@@ -1980,18 +1993,38 @@ class Movement:
         return val
 
 
-class MovementStore(Store, metaclass=Singleton):
+class MovementStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'Movement' objects
     """
 
-    def __init__(self, db_path="", db=None, debug=False):
+    # the attributes of the loaded movements, see getMovementAttributes()
+    movement_attribute_columns = [
+        "name",
+        "runway_time",
+        "gate",
+        "aircraft",
+        "ac_group",
+        "engine",
+        "departure_arrival",
+        "profile_id",
+        "runway",
+    ]
+
+    def __init__(self, db_path="", db=None, debug=False, deserialize=True):
+        """
+        :param deserialize: load all movements, otherwise the movements are
+         loaded per window of runway times with loadMovements(..)
+        """
         if db is None:
             db = {}
         Store.__init__(self, ordered=True)
 
         self._db_path = db_path
 
+        # the movements are created lazily, with the stores of this inventory
+        self._context = InventoryContext.getCurrent()
+
         self._movement_db = None
         # if "movement_db" in db:
         #     if isinstance(db["movement_db"], MovementDatabase):
@@ -2000,37 +2033,98 @@ class MovementStore(Store, metaclass=Singleton):
         #         self._movement_db = MovementDatabase(db["movement_db"])
 
         if self._movement_db is None:
-            self._movement_db = MovementDatabase(db_path)
+            self._movement_db = MovementDatabase(db_path, deserialize=deserialize)
+
+        # the runway times [start, end) of the loaded movements, None if all
+        # movements are loaded
+        self._window = None
+
+        # the resolved attributes of the movements to create, by key
+        self._resolved_movements = {}
+        self._movement_attributes = None
 
         # instantiate all movement objects
-        self.initMovements(debug)
+        if deserialize:
+            self.initMovements(debug)
 
     def getMovementDatabase(self):
         return self._movement_db
 
+    def getContext(self) -> Optional[InventoryContext]:
+        return self._context
+
+    def getWindow(self) -> Optional[tuple[datetime, datetime]]:
+        return self._window
+
+    def loadMovements(
+        self,
+        start_dt: Optional[datetime] = None,
+        end_dt: Optional[datetime] = None,
+        debug: bool = False,
+    ) -> None:
+        """
+        Load the movements with a runway time in [start_dt, end_dt), or all
+        movements if no window is given, in place of the movements loaded
+        before.
+        """
+        self.releaseMovements()
+
+        movement_db = self.getMovementDatabase()
+        if start_dt is None and end_dt is None:
+            movement_db.deserialize()
+        else:
+            movement_db.deserializeRunwayTimeWindow(start_dt, end_dt)
+            self._window = (start_dt, end_dt)
+        logger.debug(
+            "Loaded %i movements between %s and %s",
+            len(movement_db.getEntries()),
+            start_dt,
+            end_dt,
+        )
+        if movement_db.getEntries():
+            self.initMovements(debug)
+
+    def releaseMovements(self) -> None:
+        """
+        Release the loaded movements and their database entries.
+        """
+        self._objects = OrderedDict()
+        self._resolved_movements = {}
+        self._movement_attributes = None
+        self.getMovementDatabase().clearEntries()
+        self._window = None
+
     def getRunwayStore(self):
-        return RunwayStore(self._db_path)
+        with activate(self._context):
+            return RunwayStore(self._db_path)
 
     def getAircraftStore(self):
-        return AircraftStore(self._db_path)
+        with activate(self._context):
+            return AircraftStore(self._db_path)
 
     def getEngineStore(self):
-        return EngineStore(self._db_path)
+        with activate(self._context):
+            return EngineStore(self._db_path)
 
     def getHeliEngineStore(self):
-        return HeliEngineStore(self._db_path)
+        with activate(self._context):
+            return HeliEngineStore(self._db_path)
 
     def getAircraftTrajectoryStore(self):
-        return AircraftTrajectoryStore(self._db_path)
+        with activate(self._context):
+            return AircraftTrajectoryStore(self._db_path)
 
     def getGateStore(self):
-        return GateStore(self._db_path)
+        with activate(self._context):
+            return GateStore(self._db_path)
 
     def getTaxiRouteStore(self):
-        return TaxiwayRoutesStore(self._db_path)
+        with activate(self._context):
+            return TaxiwayRoutesStore(self._db_path)
 
     def getTrackStore(self):
-        return TrackStore(self._db_path)
+        with activate(self._context):
+            return TrackStore(self._db_path)
 
     def ProgressBarWidget(self):
         progressbar = QtWidgets.QProgressDialog("Please wait...", "Cancel", 0, 99)
@@ -2046,6 +2140,8 @@ class MovementStore(Store, metaclass=Singleton):
 
     def initMovements(self, debug=False):  # noqa: C901
 
+        self._movement_attributes = None
+
         # Start a progressbar, since this might take a while to process
         progressbar = self.ProgressBarWidget()
 
@@ -2072,110 +2168,123 @@ class MovementStore(Store, metaclass=Singleton):
             "runway_trajectory",
             "track_id",
         ]
-        eq_mdf = pd.DataFrame(index=mdf.index, columns=df_cols)
-        eq_mdf = eq_mdf.fillna(np.nan)  # fill with None rather than NaNs
+        eq_mdf = pd.DataFrame(index=mdf.index, columns=df_cols, dtype=object)
+
+        # Every attribute is resolved once per unique value and mapped to the
+        # movements, so the cost scales with the number of distinct values
 
         # Check if aircraft exist in the database
         stage_1.nextValue()
 
         aircraft_store = self.getAircraftStore()
-        for acf in mdf["aircraft"].unique():
-            store_has_key = aircraft_store.hasKey(acf)
-            eq_mdf.loc[mdf.aircraft == acf, "aircraft"] = (
-                acf if store_has_key else np.nan
-            )
-            if not store_has_key:
+        known_aircraft = []
+        for acf in mdf["aircraft"].dropna().unique():
+            if aircraft_store.hasKey(acf):
+                known_aircraft.append(acf)
+            else:
                 logger.error(f"Aircraft '{acf}' wasn't found in the DB")
+        eq_mdf["aircraft"] = mdf["aircraft"].where(mdf["aircraft"].isin(known_aircraft))
 
         # Check if engines exist in the database
         stage_1.nextValue()
 
         engine_store = self.getEngineStore()
         heli_engine_store = self.getHeliEngineStore()
-        for eng in mdf["engine_name"].unique():
-
-            indices = mdf["engine_name"] == eng
-
-            if engine_store.hasKey(eng):
-                eq_mdf.loc[indices, "engine_name"] = eng
+        first_aircraft_by_engine = mdf.drop_duplicates("engine_name").set_index(
+            "engine_name"
+        )["aircraft"]
+        engine_names = {}
+        for eng in mdf["engine_name"].dropna().unique():
 
-            elif heli_engine_store.hasKey(eng):
-                eq_mdf.loc[indices, "engine_name"] = eng
+            if engine_store.hasKey(eng) or heli_engine_store.hasKey(eng):
+                engine_names[eng] = eng
 
             else:
                 logger.debug("Engine %s not in ALAQS DB", eng)
 
                 # Get the aircraft
-                def_ac = mdf[mdf["engine_name"] == eng]["aircraft"].iloc[0]
+                def_ac = first_aircraft_by_engine[eng]
 
                 # Check if the aircraft exists in the database
                 if aircraft_store.hasKey(def_ac):
 
                     # Get the default engine for this aircraft
-                    eng = aircraft_store.getObject(def_ac).getDefaultEngine().getName()
+                    def_eng = (
+                        aircraft_store.getObject(def_ac).getDefaultEngine().getName()
+                    )
 
                     logger.debug(
-                        "\t +++ taking default engine %s for aircraft %s", eng, def_ac
+                        "\t +++ taking default engine %s for aircraft %s",
+                        def_eng,
+                        def_ac,
                     )
 
-                    if engine_store.hasKey(eng):
-                        eq_mdf.loc[indices, "engine_name"] = eng
-                    else:
-                        eq_mdf.loc[indices, "engine_name"] = None
+                    engine_names[eng] = (
+                        def_eng if engine_store.hasKey(def_eng) else None
+                    )
+        eq_mdf["engine_name"] = mdf["engine_name"].map(engine_names)
 
         # Check if runways exist in the database
         stage_1.nextValue()
 
         runway_store = self.getRunwayStore()
-        for rwy in mdf["runway"].unique():
-
-            indices = mdf["runway"] == rwy
+        runways = {}
+        runway_directions = {}
+        for rwy in mdf["runway"].dropna().unique():
 
             # Make sure runways are always 2 characters or more
-            rwy = rwy.zfill(2)
+            rwy_dir = rwy.zfill(2)
 
-            if runway_store.isinKey(rwy):
-                eq_mdf.loc[indices, "runway_direction"] = rwy
+            if runway_store.isinKey(rwy_dir):
                 rwy_used = [
-                    key for key in list(runway_store.getObjects().keys()) if rwy in key
+                    key
+                    for key in list(runway_store.getObjects().keys())
+                    if rwy_dir in key
                 ]
                 if len(rwy_used) > 1:
                     logger.warning(
-                        f"Runway {rwy} was found in the DB multiple " "times."
+                        f"Runway {rwy_dir} was found in the DB multiple " "times."
                     )
-                eq_mdf.loc[indices, "runway"] = rwy_used[0]
+                runways[rwy] = rwy_used[0]
+                runway_directions[rwy] = rwy_dir
 
             else:
-                eq_mdf.loc[indices, "runway"] = np.nan
-                logger.warning(f"Runway '{rwy}' wasn't found in the DB")
+                logger.warning(f"Runway '{rwy_dir}' wasn't found in the DB")
+        eq_mdf["runway"] = mdf["runway"].map(runways)
+        eq_mdf["runway_direction"] = mdf["runway"].map(runway_directions)
 
         # Check if gates exist in the database
         stage_1.nextValue()
 
         gate_store = self.getGateStore()
-        for gte in mdf["gate"].unique():
-            store_has_key = gate_store.hasKey(gte)
-            eq_mdf.loc[mdf["gate"] == gte, "gate"] = gte if store_has_key else np.nan
-            if not store_has_key:
+        known_gates = []
+        for gte in mdf["gate"].dropna().unique():
+            if gate_store.hasKey(gte):
+                known_gates.append(gte)
+            else:
                 logger.warning(f"Gate '{gte}' wasn't found in the DB")
+        eq_mdf["gate"] = mdf["gate"].where(mdf["gate"].isin(known_gates))
 
         # Check if taxi routes exist in the database
         stage_1.nextValue()
 
         # Fill empty taxi routes
         empty_tr = (mdf["taxi_route"] == "") | (mdf["taxi_route"].isna())
-        default_tr_columns = ["gate", "runway", "departure_arrival"]
         mdf.loc[empty_tr, "taxi_route"] = (
-            mdf.loc[empty_tr, default_tr_columns].apply("/".join, axis=1) + "/1"
+            mdf.loc[empty_tr, "gate"]
+            + "/"
+            + mdf.loc[empty_tr, "runway"]
+            + "/"
+            + mdf.loc[empty_tr, "departure_arrival"]
+            + "/1"
         )
 
         taxi_route_store = self.getTaxiRouteStore()
-        for txr in mdf["taxi_route"].unique():
-            indices = mdf[mdf["taxi_route"] == txr].index
+        known_taxi_routes = []
+        for txr in mdf["taxi_route"].dropna().unique():
             if taxi_route_store.hasKey(txr):
-                eq_mdf.loc[indices, "taxi_route"] = txr
+                known_taxi_routes.append(txr)
             else:
-                eq_mdf.loc[indices, "taxi_route"] = np.NaN
                 logger.warning(
                     f'Taxiroute "{txr}" was not found in the taxi routes database!'
                 )
@@ -2201,74 +2310,98 @@ class MovementStore(Store, metaclass=Singleton):
             #             txr,
             #         )
             #         eq_mdf.loc[indices, "taxi_route"] = np.NaN
+        eq_mdf["taxi_route"] = mdf["taxi_route"].where(
+            mdf["taxi_route"].isin(known_taxi_routes)
+        )
 
         # Check if track exist in the database
         stage_1.nextValue()
 
         track_store = self.getTrackStore()
-        for trk in mdf["track_id"].unique():
-            store_has_key = track_store.hasKey(trk)
-            eq_mdf.loc[mdf.track_id == trk, "track_id"] = trk if store_has_key else ""
-            if not store_has_key:
-                if not trk:
-                    logger.warning("Track has empty name and will be skipped!")
-                else:
-                    logger.warning(f"Track '{trk}' wasn't found in the DB")
+        known_tracks = []
+        for trk in mdf["track_id"].dropna().unique():
+            if track_store.hasKey(trk):
+                known_tracks.append(trk)
+            elif not trk:
+                logger.warning("Track has empty name and will be skipped!")
+            else:
+                logger.warning(f"Track '{trk}' wasn't found in the DB")
+
+        # unknown tracks are replaced by an empty track, missing ones are kept
+        eq_mdf["track_id"] = (
+            mdf["track_id"]
+            .where(mdf["track_id"].isin(known_tracks), "")
+            .where(mdf["track_id"].notna())
+        )
 
         # Check if profiles exist in the database
         stage_1.nextValue()
 
-        # Get the unique profiles
-        profile_unique = mdf["profile_id"].astype(str).unique()
-
         # Check if the profiles exist in the store
         trajectory_store = self.getAircraftTrajectoryStore()
 
-        # Add a default profile to the eq_mdf
-        for _, airgroup in mdf.groupby(["aircraft", "departure_arrival"]):
-            ij_ = airgroup.index
-            _ac = airgroup["aircraft"].iloc[0]
+        # Add the default profile of each (aircraft, departure/arrival) pair
+        default_profiles = []
+        for _ac, _ad in (
+            mdf[["aircraft", "departure_arrival"]]
+            .dropna()
+            .drop_duplicates()
+            .itertuples(index=False)
+        ):
             _aircraft = aircraft_store.getObject(_ac)
-            if _aircraft is not None:
-                _ad = airgroup["departure_arrival"].iloc[0]
-                if _ad == "A":
-                    profile_id = _aircraft.getDefaultArrivalProfileName()
-                elif _ad == "D":
-                    profile_id = _aircraft.getDefaultDepartureProfileName()
-                else:
-                    logger.debug(
-                        "%s for AC %s is not recognised as either "
-                        "and arrival or departure",
-                        _ad,
-                        _ac,
-                    )
-
-                    # setting to none, e.g. means not possible to set a default value
-                    eq_mdf.loc[ij_, "profile_id"] = None
-
-                    continue
-                eq_mdf.loc[ij_, "profile_id"] = profile_id
-            else:
+            if _aircraft is None:
                 logger.debug("AC %s not in AircraftStore", _ac)
-                continue
-
-        # Add nones if it matches the conditions, e.g. set original profile
-        # if it is among available profiles in trajectory_store
-        for prf in profile_unique:
-            indices = mdf[mdf["profile_id"] == prf].index
-            if (
-                len(indices) != 0
-                and prf
-                and not pd.isna(prf)
-                and trajectory_store.hasKey(prf)
-            ):
-                eq_mdf.loc[indices, "profile_id"] = prf
+            elif _ad == "A":
+                default_profiles.append(
+                    (_ac, _ad, _aircraft.getDefaultArrivalProfileName())
+                )
+            elif _ad == "D":
+                default_profiles.append(
+                    (_ac, _ad, _aircraft.getDefaultDepartureProfileName())
+                )
             else:
-                logger.warning(
-                    f"Lack of profile_id: '{prf}' using default value: '{eq_mdf.loc[indices[0], 'profile_id']}' "
-                    f"for movements: {mdf.loc[indices]['oid'].values}"
+                logger.debug(
+                    "%s for AC %s is not recognised as either "
+                    "and arrival or departure",
+                    _ad,
+                    _ac,
                 )
 
+                # setting to none, e.g. means not possible to set a default value
+                default_profiles.append((_ac, _ad, None))
+        eq_mdf["profile_id"] = (
+            mdf[["aircraft", "departure_arrival"]]
+            .merge(
+                pd.DataFrame(
+                    default_profiles,
+                    columns=["aircraft", "departure_arrival", "profile_id"],
+                    dtype=object,
+                ),
+                how="left",
+                on=["aircraft", "departure_arrival"],
+            )["profile_id"]
+            .to_numpy()
+        )
+
+        # Set the original profile if it is among available profiles in
+        # trajectory_store
+        known_profiles = [
+            prf
+            for prf in mdf["profile_id"].dropna().unique()
+            if prf and trajectory_store.hasKey(prf)
+        ]
+        has_known_profile = mdf["profile_id"].isin(known_profiles)
+        eq_mdf["profile_id"] = mdf["profile_id"].where(
+            has_known_profile, eq_mdf["profile_id"]
+        )
+        for prf, indices in (
+            mdf[~has_known_profile].groupby("profile_id", dropna=False).groups.items()
+        ):
+            logger.warning(
+                f"Lack of profile_id: '{prf}' using default value: '{eq_mdf.loc[indices[0], 'profile_id']}' "
+                f"for movements: {mdf.loc[indices]['oid'].values}"
+            )
+
         # now if remained a profile_id as None in eq_mdf means that:
         # A) profile_id in original mdf is None or
         # B) was not possible to get a default value
@@ -2281,7 +2414,10 @@ class MovementStore(Store, metaclass=Singleton):
                 f'Skip movement "{row.oid}" due to neither a profile "{row.profile_id}" in "default_aircraft_profiles" table, nor a default value for that aircraft!'
             )
 
-        # Get unique combinations of eq_mdf
+        # The trajectory at the runway only depends on these attributes, so it
+        # is calculated once per unique combination
+        # NOTE: as before, the departure/arrival flag of the proxy movement is
+        # only set after its trajectory at the runway has been calculated
         u_columns = [
             "runway",
             "runway_direction",
@@ -2289,79 +2425,64 @@ class MovementStore(Store, metaclass=Singleton):
             "profile_id",
             "track_id",
         ]
-        heli_engine_store = self.getHeliEngineStore()
-        engine_store = self.getEngineStore()
+        combinations = list(
+            eq_mdf.loc[~none_profile_ids, u_columns]
+            .dropna()
+            .drop_duplicates()
+            .itertuples(index=False, name=None)
+        )
 
         # Start the next stage
-        stage_2 = stage_1.nextStage(
-            duration=10, maximum=len(eq_mdf[~none_profile_ids].groupby(u_columns))
-        )
+        stage_2 = stage_1.nextStage(duration=10, maximum=len(combinations))
         logger.debug(
             f"finished stage 1 "
             f"(n={stage_1._max - stage_1._min}) "
             f"in {stage_1._end_time - stage_1._start_time}"
         )
 
-        for (rwy, rwy_dir, tx_route, prf_id, trk_id), mov_df in eq_mdf[
-            ~none_profile_ids
-        ].groupby(u_columns):
-            # Get the indices
-            inds = mov_df.index
-
-            # Loop over all `mov_df` to set the correct aircraft, gate and departure flag
-            # e.g. for all particular value that are not equal due to group by
-            # NOTE: this implementation makes the group by less efficient, but ensures the correct values
-            for eq_mdf_index in inds:
-
-                # Create a proxy movement
-                proxy_mov = Movement()
-
-                fm = eq_mdf.loc[eq_mdf_index]
-                fm_gate = gate_store.getObject(fm["gate"])
-                fm_aircraft = aircraft_store.getObject(fm["aircraft"])
-                fm_runway = runway_store.getObject(fm["runway"])
-                fm_taxi_route = taxi_route_store.getObject(fm["taxi_route"])
-                fm_trajectory = trajectory_store.getObject(fm["profile_id"])
-                fm_track = track_store.getObject(fm["track_id"])
-
-                if engine_store.hasKey(fm["engine_name"]):
-                    fm_engine = engine_store.getObject(fm["engine_name"])
-                elif heli_engine_store.hasKey(fm["engine_name"]):
-                    fm_engine = heli_engine_store.getObject(fm["engine_name"])
-                else:
-                    fm_engine = None
-
-                fm_departure_arrival = mdf.loc[eq_mdf_index]["departure_arrival"]
-
-                # Set the parameters of the proxy movement
-                proxy_mov.setGate(fm_gate)
-                proxy_mov.setAircraft(fm_aircraft)
-                proxy_mov.setAircraftEngine(fm_engine)
-                proxy_mov.setRunway(fm_runway)
-                proxy_mov.setRunwayDirection(fm["runway_direction"])
-                proxy_mov.setTrack(fm_track)
-                proxy_mov.setTaxiRoute(fm_taxi_route)
-                proxy_mov.setTrajectory(fm_trajectory)
-                proxy_mov.updateTrajectoryAtRunway()
-                proxy_mov.setDepartureArrivalFlag(fm_departure_arrival)
-
-                # Update the dataframe
-                eq_mdf.loc[eq_mdf_index, "runway"] = proxy_mov.getRunway()
-                eq_mdf.loc[eq_mdf_index, "taxi_route"] = proxy_mov.getTaxiRoute()
-                eq_mdf.loc[eq_mdf_index, "track"] = proxy_mov.getTrack()
-                eq_mdf.loc[eq_mdf_index, "trajectory"] = proxy_mov.getTrajectory()
-                eq_mdf.loc[eq_mdf_index, "runway_trajectory"] = (
-                    proxy_mov.getTrajectoryAtRunway()
-                )
-                eq_mdf.loc[eq_mdf_index, "departure_arrival"] = (
-                    proxy_mov.getDepartureArrivalFlag()
+        trajectories = []
+        for rwy, rwy_dir, tx_route, prf_id, trk_id in combinations:
+
+            # Create a proxy movement
+            proxy_mov = Movement()
+            proxy_mov.setRunway(runway_store.getObject(rwy))
+            proxy_mov.setRunwayDirection(rwy_dir)
+            proxy_mov.setTrack(track_store.getObject(trk_id))
+            proxy_mov.setTaxiRoute(taxi_route_store.getObject(tx_route))
+            proxy_mov.setTrajectory(trajectory_store.getObject(prf_id))
+            proxy_mov.updateTrajectoryAtRunway()
+
+            trajectories.append(
+                (
+                    rwy,
+                    rwy_dir,
+                    tx_route,
+                    prf_id,
+                    trk_id,
+                    proxy_mov.getTrajectory(),
+                    proxy_mov.getTrajectoryAtRunway(),
                 )
-
-                eq_mdf.loc[eq_mdf_index, "gate_obj"] = proxy_mov.getGate()
-                eq_mdf.loc[eq_mdf_index, "aircraft_obj"] = proxy_mov.getAircraft()
-                eq_mdf.loc[eq_mdf_index, "engine_obj"] = proxy_mov.getAircraftEngine()
+            )
 
             stage_2.nextValue()
+            if progressbar.wasCanceled():
+                logger.warning(
+                    "user canceled initMovements, " "so it might be incomplete"
+                )
+                break
+
+        # Add the trajectories to the movements of each combination
+        movement_trajectories = eq_mdf[u_columns].merge(
+            pd.DataFrame(
+                trajectories,
+                columns=u_columns + ["trajectory", "runway_trajectory"],
+                dtype=object,
+            ),
+            how="left",
+            on=u_columns,
+        )
+        for column in ["trajectory", "runway_trajectory"]:
+            eq_mdf[column] = movement_trajectories[column].to_numpy()
 
         # Get the movements to retain
         # NOTE: not available or not default configurable profiles would have "profile_id" as None
@@ -2376,76 +2497,246 @@ class MovementStore(Store, metaclass=Singleton):
             f"in {stage_2._end_time - stage_2._start_time}"
         )
 
-        # Create a movement for every entry in the database
-        movement_db_entries = self.getMovementDatabase().getEntries()
-        for key, movement_dict in movement_db_entries.items():
+        for key in mdf.index.difference(mdf_retained.index, sort=False):
+            logger.warning(
+                "Operation with 'oid' = %s will not be "
+                "accounted for due to missing data",
+                key,
+            )
 
-            # Create a movement
-            mov = Movement(movement_dict)
+        # The movements are created when they are first asked for, from their
+        # database entry and the resolved attributes
+        self._resolved_movements = dict(
+            zip(
+                mdf_retained.index,
+                mdf_retained[
+                    [
+                        "gate",
+                        "aircraft",
+                        "engine_name",
+                        "runway",
+                        "runway_direction",
+                        "taxi_route",
+                        "track_id",
+                        "trajectory",
+                        "runway_trajectory",
+                    ]
+                ].itertuples(index=False, name=None),
+            )
+        )
+        self._objects = _LazyMovements(self._createMovement, mdf_retained.index)
 
-            # Get the relevant entry from mdf_retained
-            try:
-                mov_df_entry = mdf_retained.loc[key]
-            except KeyError:
-                logger.warning(
-                    "Operation with 'oid' = %s will not be "
-                    "accounted for due to missing data",
-                    key,
-                )
-                continue
+        stage_3.finish()
+        logger.debug(
+            f"finished stage 3 "
+            f"(n={stage_3._max - stage_3._min}) "
+            f"in {stage_3._end_time - stage_3._start_time}"
+        )
 
-            # Get the relevant objects
-            mov_aircraft = mov_df_entry["aircraft_obj"]
+    def _createMovement(self, key) -> "Movement":
+        """
+        Create the movement of a database entry with its resolved attributes.
+        """
+        (
+            gate,
+            aircraft,
+            engine_name,
+            runway,
+            runway_direction,
+            taxi_route,
+            track_id,
+            trajectory,
+            runway_trajectory,
+        ) = self._resolved_movements[key]
+
+        # Create a movement
+        mov = Movement(self.getMovementDatabase().getEntries()[key])
+
+        # Get the relevant objects
+        mov_aircraft = self.getAircraftStore().getObject(aircraft)
+        mov.setAircraft(mov_aircraft)
+
+        # Replace with Default Engine if it can't be found
+        mov_engine = self._getEngine(mov_aircraft, engine_name)
+        if mov_engine is None:
+            mov_engine = mov_aircraft.getDefaultEngine()
+            logger.info(
+                "Engine wasn't found for movement %s. "
+                "Will use default engine (%s).",
+                mov.getName(),
+                mov_engine.getName(),
+            )
 
-            if mov_aircraft.getGroup() == "HELICOPTER":
+        # Add the relevant objects to the movement
+        mov.setGate(self.getGateStore().getObject(gate))
+        mov.setAircraftEngine(mov_engine)
+        mov.setRunway(self.getRunwayStore().getObject(runway))
+        mov.setRunwayDirection(runway_direction)
+        mov.setTaxiRoute(self.getTaxiRouteStore().getObject(taxi_route))
+        mov.setTrack(self.getTrackStore().getObject(track_id))
+        mov.setTrajectory(trajectory)
+        mov.setTrajectoryAtRunway(runway_trajectory)
 
-                # Get the helicopter engine
-                mov_engine = heli_engine_store.getObject(mov_df_entry["engine_name"])
-            else:
+        return mov
 
-                # Get the aircraft engine
-                mov_engine = engine_store.getObject(mov_df_entry["engine_name"])
+    def _getEngine(self, aircraft: Aircraft, engine_name: str):
+        """
+        Get the engine of a movement from the store of the aircraft group, None
+        if it can't be found.
+        """
+        if aircraft.getGroup() == "HELICOPTER":
 
-            # Replace with Default Engine if it can't be found
-            if mov_engine is None:
-                mov_engine = mov_aircraft.getDefaultEngine()
-                logger.info(
-                    "Engine wasn't found for movement %s. "
-                    "Will use default engine (%s).",
-                    mov.getName(),
-                    mov_engine.getName(),
-                )
+            # Get the helicopter engine
+            return self.getHeliEngineStore().getObject(engine_name)
 
-            # Add the relevant objects to the movement
-            mov.setGate(mov_df_entry["gate_obj"])
-            mov.setAircraft(mov_aircraft)
-            mov.setAircraftEngine(mov_engine)
-            mov.setRunway(mov_df_entry["runway"])
-            mov.setRunwayDirection(mov_df_entry["runway_direction"])
-            mov.setTaxiRoute(mov_df_entry["taxi_route"])
-            mov.setTrack(mov_df_entry["track"])
-            mov.setTrajectory(mov_df_entry["trajectory"])
-            mov.setTrajectoryAtRunway(mov_df_entry["runway_trajectory"])
-
-            self.setObject(movement_dict.get("oid", "unknown"), mov)
-
-            # Update the progress bar
-            stage_3.nextValue()
-            if progressbar.wasCanceled():
-                logger.warning(
-                    "user canceled initMovements, " "so it might be incomplete"
-                )
-                break
+        # Get the aircraft engine
+        return self.getEngineStore().getObject(engine_name)
 
-        stage_3.finish()
-        logger.debug(
-            f"finished stage 3 "
-            f"(n={stage_3._max - stage_3._min}) "
-            f"in {stage_3._end_time - stage_3._start_time}"
+    def getMovementAttributes(self) -> pd.DataFrame:
+        """
+        Get the attributes of the loaded movements by key (see
+        movement_attribute_columns), as they are set on the created movements.
+        The runway time is in seconds.
+
+        The attributes are resolved once per unique value, so the movements can
+        be selected and grouped without creating them.
+        """
+        if self._movement_attributes is None:
+            self._movement_attributes = self._resolveMovementAttributes()
+        return self._movement_attributes
+
+    def _resolveMovementAttributes(self) -> pd.DataFrame:
+        if not self._resolved_movements:
+            return pd.DataFrame(columns=self.movement_attribute_columns, dtype=object)
+
+        resolved = pd.DataFrame.from_dict(
+            {key: values[:4] for key, values in self._resolved_movements.items()},
+            orient="index",
+            columns=["gate", "aircraft", "engine_name", "runway"],
         )
+        entries = pd.DataFrame.from_dict(
+            self.getMovementDatabase().getEntries(), orient="index"
+        ).loc[resolved.index]
 
+        aircraft_store = self.getAircraftStore()
+        aircraft = {
+            ac: aircraft_store.getObject(ac) for ac in resolved["aircraft"].unique()
+        }
+
+        # The engine of each (aircraft, engine) pair, as in _createMovement
+        engines = {}
+        for ac, eng in (
+            resolved[["aircraft", "engine_name"]]
+            .drop_duplicates()
+            .itertuples(index=False)
+        ):
+            engine = self._getEngine(aircraft[ac], eng)
+            if engine is None:
+                engine = aircraft[ac].getDefaultEngine()
+            engines[(ac, eng)] = engine.getName()
+
+        gate_store = self.getGateStore()
+        gates = {
+            gte: gate_store.getObject(gte).getName()
+            for gte in resolved["gate"].unique()
+        }
+        runway_store = self.getRunwayStore()
+        runways = {
+            rwy: runway_store.getObject(rwy).getName()
+            for rwy in resolved["runway"].unique()
+        }
+
+        departure_arrival = entries["departure_arrival"].map(str)
+        is_departure = departure_arrival.str.lower().isin(["d", "dep", "departure"])
+        runway_time = entries["runway_time"].map(conversion.convertTimeToSeconds)
+        block_time = entries["block_time"].map(conversion.convertTimeToSeconds)
+
+        # The default profile of the aircraft of each movement
+        departure_profiles = resolved["aircraft"].map(
+            {ac: a.getDefaultDepartureProfileName() for ac, a in aircraft.items()}
+        )
+        arrival_profiles = resolved["aircraft"].map(
+            {ac: a.getDefaultArrivalProfileName() for ac, a in aircraft.items()}
+        )
+
+        icao_identifiers = resolved["aircraft"].map(
+            {ac: a.getICAOIdentifier() for ac, a in aircraft.items()}
+        )
+        names = [
+            Movement.formatName(
+                oid,
+                icao_identifier,
+                dep_arr,
+                conversion.convertSecondsToTimeString(r_time),
+                conversion.convertSecondsToTimeString(b_time),
+            )
+            for oid, icao_identifier, dep_arr, r_time, b_time in zip(
+                entries["oid"],
+                icao_identifiers,
+                departure_arrival,
+                runway_time,
+                block_time,
+            )
+        ]
+
+        attributes = pd.DataFrame(
+            {
+                "name": names,
+                "runway_time": runway_time.to_numpy(dtype=float),
+                "gate": resolved["gate"].map(gates),
+                "aircraft": resolved["aircraft"].map(
+                    {ac: a.getName() for ac, a in aircraft.items()}
+                ),
+                "ac_group": resolved["aircraft"].map(
+                    {ac: a.getGroup() for ac, a in aircraft.items()}
+                ),
+                "engine": [
+                    engines[pair]
+                    for pair in zip(resolved["aircraft"], resolved["engine_name"])
+                ],
+                "departure_arrival": departure_arrival,
+                "profile_id": departure_profiles.where(is_departure, arrival_profiles),
+                "runway": resolved["runway"].map(runways),
+            },
+            index=resolved.index,
+        )
+        return attributes
 
-class MovementDatabase(SQLSerializable, metaclass=Singleton):
+
+class _LazyMovements(MutableMapping):
+    """
+    The movements of a MovementStore by key, created on first access.
+    """
+
+    _NOT_CREATED = object()
+
+    def __init__(self, create: Callable[[Any], Movement], keys: Iterable) -> None:
+        self._create = create
+        self._movements = dict.fromkeys(keys, self._NOT_CREATED)
+
+    def __getitem__(self, key) -> Movement:
+        movement = self._movements[key]
+        if movement is self._NOT_CREATED:
+            movement = self._movements[key] = self._create(key)
+        return movement
+
+    def __setitem__(self, key, movement: Movement) -> None:
+        self._movements[key] = movement
+
+    def __delitem__(self, key) -> None:
+        del self._movements[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._movements
+
+    def __iter__(self) -> Iterator:
+        return iter(self._movements)
+
+    def __len__(self) -> int:
+        return len(self._movements)
+
+
+class MovementDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to user-defined movements stored in the database
     """
@@ -2505,3 +2796,22 @@ class MovementDatabase(SQLSerializable, metaclass=Singleton):
 
         if self._db_path and deserialize:
             self.deserialize()
+
+    def clearEntries(self) -> None:
+        self._entries = {}
+
+    def deserializeRunwayTimeWindow(self, start_dt: datetime, end_dt: datetime) -> None:
+        """
+        Replace the entries by the movements with a runway time in
+        [start_dt, end_dt). The runway times are compared as text, so they are
+        expected in the format '%Y-%m-%d %H:%M:%S'. The query uses the index on
+        the runway time, if any (see inventory_create_runway_time_index).
+        """
+        self.clearEntries()
+        self.deserialize(
+            '"runway_time" >= ? AND "runway_time" < ?',
+            [
+                start_dt.strftime("%Y-%m-%d %H:%M:%S"),
+                end_dt.strftime("%Y-%m-%d %H:%M:%S"),
+            ],
+        )
@@ -1,19 +1,24 @@
 from datetime import datetime
-from typing import Any, Optional, Union, cast
+from typing import Any, Optional, Union
 
 import geopandas as gpd
+import numpy as np
 from qgis.core import QgsMapLayer
 from qgis.PyQt.QtWidgets import QWidget
-from shapely.geometry import LineString, MultiLineString, MultiPolygon, Point, Polygon
-from shapely.validation import make_valid
 
 from open_alaqs.core.alaqslogging import get_logger
-from open_alaqs.core.interfaces.Emissions import Emission, PollutantType, PollutantUnit
+from open_alaqs.core.interfaces.Emissions import (
+    Emission,
+    EmissionBatch,
+    PollutantType,
+    PollutantUnit,
+)
 from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.modules.ModuleConfigurationWidget import (
     ModuleConfigurationWidget,
     SettingsSchema,
 )
+from open_alaqs.core.tools.Grid3D import Grid3D
 
 logger = get_logger(__name__)
 
@@ -68,45 +73,109 @@ class OutputModule:
     ):
         raise NotImplementedError()
 
+    def processBatch(
+        self,
+        timestamp: datetime,
+        batch: EmissionBatch,
+        **kwargs: Any,
+    ):
+        """
+        Process the emissions of a period as a batch (see EmissionBatch).
+
+        The default implementation passes the (source, emissions) list of the
+        batch to process(), modules can override it to use the batch directly.
+        """
+        return self.process(timestamp, batch.toResult(), **kwargs)
+
     def endJob(self) -> Union[QWidget, QgsMapLayer, None]:
         return None
 
 
 class GridOutputModule(OutputModule):
+    """
+    Output module that allocates the emissions to the cells of a 2D grid.
+
+    The emissions are allocated with the (geometry x cell) weights shared by
+    all users of the grid (see `Grid3D.get_2d_cell_allocation()`) and
+    accumulated in a dense (cells x pollutants) array, which is written back to
+    the grid GeoDataFrame once, in `_end_grid()`.
+    """
+
+    grid_pollutant_keys = [f"{p.value}_{PollutantUnit.KG.value}" for p in PollutantType]
+
+    def _begin_grid(self, grid: Grid3D) -> gpd.GeoDataFrame:
+        grid_df = grid.get_df_from_2d_grid_cells()
+        self._grid_allocation = grid.get_2d_cell_allocation()
+        self._grid_values = np.zeros((len(grid_df), len(PollutantType)))
+        return grid_df
+
     def _process_grid(
         self, source: Source, emission: Emission, grid_df: gpd.GeoDataFrame
     ) -> gpd.GeoDataFrame:
-        if emission.getGeometryText() is None:
+        self._process_grid_result([(source, [emission])])
+        return grid_df
+
+    def _process_grid_result(self, result: list[tuple[Source, list[Emission]]]):
+        rows = []
+        values = []
+        for source, emissions in result:
+            for emission in emissions:
+                geometry_wkt = emission.getGeometryText()
+                if geometry_wkt is None:
+                    logger.error(
+                        "Did not find geometry for emissions '%s'. Skipping an emission of source '%s'",
+                        str(emission),
+                        str(source.getName()),
+                    )
+                    continue
+
+                rows.append(self._grid_allocation.getRow(geometry_wkt))
+                values.append(
+                    [
+                        emission.get_value(pollutant_type, PollutantUnit.KG)
+                        for pollutant_type in PollutantType
+                    ]
+                )
+
+        self._grid_allocation.allocate(
+            np.array(rows, dtype=np.int64),
+            np.array(values, dtype=float).reshape(len(rows), len(PollutantType)),
+            out=self._grid_values,
+        )
+
+    def _process_grid_batch(self, batch: EmissionBatch):
+        geometries = batch.getGeometries()
+        geometry_ids = batch.getGeometryIds()
+
+        # the rows of the emissions without geometry are skipped
+        valid = np.array([geometry is not None for geometry in geometries], dtype=bool)
+        if not valid[geometry_ids].all():
             logger.error(
-                "Did not find geometry for emissions '%s'. Skipping an emission of source '%s'",
-                str(emission),
-                str(source.getName()),
-            )
-            return grid_df
-
-        # ensure geometry validity, otherwise the intersects operations might fail. Ideally the invalid geometries should be prevented.
-        geom = make_valid(emission.getGeometry())
-        intersecting_df = grid_df[grid_df.intersects(geom) == True]  # noqa: E712
-        intersecting_df = cast(gpd.GeoDataFrame, intersecting_df)
-
-        # Calculate Emissions' horizontal distribution
-        if isinstance(geom, Point):
-            factor = 1 / len(intersecting_df)
-        elif isinstance(geom, (LineString, MultiLineString)):
-            factor = intersecting_df.intersection(geom).length / geom.length
-        elif isinstance(geom, (Polygon, MultiPolygon)):
-            factor = intersecting_df.intersection(geom).area / geom.area
-        else:
-            raise NotImplementedError(
-                "Usupported geometry type: {}".format(type(geom).__name__)
+                "Did not find geometry for %i emissions. Skipping them",
+                np.count_nonzero(~valid[geometry_ids]),
             )
 
-        for pollutant_type in PollutantType:
-            emission_value = emission.get_value(pollutant_type, PollutantUnit.KG)
-            key = f"{pollutant_type.value}_kg"
-            value = factor * emission_value
-
-            intersecting_df.loc[intersecting_df.index, key] = value
-            grid_df.loc[intersecting_df.index, key] += intersecting_df[key]
-
+        geometry_rows = np.array(
+            [
+                self._grid_allocation.getRow(geometry) if geometry is not None else -1
+                for geometry in geometries
+            ],
+            dtype=np.int64,
+        )
+        rows = valid[geometry_ids]
+        values = np.column_stack(
+            [
+                batch.get_values(pollutant_type, PollutantUnit.KG)
+                for pollutant_type in PollutantType
+            ]
+        )
+
+        self._grid_allocation.allocate(
+            geometry_rows[geometry_ids[rows]],
+            values[rows].reshape(-1, len(PollutantType)),
+            out=self._grid_values,
+        )
+
+    def _end_grid(self, grid_df: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        grid_df.loc[:, self.grid_pollutant_keys] += self._grid_values
         return grid_df
@@ -7,7 +7,7 @@ from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.tools import spatial
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 loaded_color_logger = False
 try:
@@ -88,7 +88,7 @@ class ParkingSources(Source):
         return val
 
 
-class ParkingSourcesStore(Store, metaclass=Singleton):
+class ParkingSourcesStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'ParkingSources' objects
     """
@@ -132,7 +132,7 @@ class ParkingSourcesStore(Store, metaclass=Singleton):
         return self._parking_db
 
 
-class ParkingSourcesDatabase(SQLSerializable, metaclass=Singleton):
+class ParkingSourcesDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to parking shape file in the spatialite database
     """
@@ -7,7 +7,7 @@ from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.tools import spatial
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -109,7 +109,7 @@ class PointSources(Source):
         return val
 
 
-class PointSourcesStore(Store, metaclass=Singleton):
+class PointSourcesStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'PointSources' objects
     """
@@ -148,7 +148,7 @@ class PointSourcesStore(Store, metaclass=Singleton):
         return self._point_db
 
 
-class PointSourcesDatabase(SQLSerializable, metaclass=Singleton):
+class PointSourcesDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to point/stationary shape file in the spatialite
      database
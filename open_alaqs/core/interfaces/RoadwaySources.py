@@ -7,7 +7,7 @@ from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.tools import spatial
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -105,7 +105,7 @@ class RoadwaySources(Source):
         return val
 
 
-class RoadwaySourcesStore(Store, metaclass=Singleton):
+class RoadwaySourcesStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'RoadwaySources' objects
     """
@@ -153,7 +153,7 @@ class RoadwaySourcesStore(Store, metaclass=Singleton):
         return self._roadway_db
 
 
-class RoadwaySourcesDatabase(SQLSerializable, metaclass=Singleton):
+class RoadwaySourcesDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to roadway shape file in the spatialite database
     """
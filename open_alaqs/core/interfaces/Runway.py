@@ -8,7 +8,7 @@ from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.tools import spatial
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -107,7 +107,7 @@ class Runway:
         return val
 
 
-class RunwayStore(Store, metaclass=Singleton):
+class RunwayStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'Runway' objects
     """
@@ -143,7 +143,7 @@ class RunwayStore(Store, metaclass=Singleton):
         return self._runway_db
 
 
-class RunwayDatabase(SQLSerializable, metaclass=Singleton):
+class RunwayDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to runway shape file in the spatialite database
     """
@@ -86,7 +86,11 @@ class SQLSerializable:
 
         return True
 
-    def deserialize(self) -> None:
+    def deserialize(self, where: str = "", params: Optional[list] = None) -> None:
+        """
+        Add the rows of the table to the entries, optionally only the rows that
+        match the `where` expression (with `?` placeholders for the `params`).
+        """
         # all usual sql columns
         columns = list(
             map(lambda c: sql_interface.quote_identifier(c), self._table_columns.keys())
@@ -104,7 +108,9 @@ class SQLSerializable:
                 f"""
                     SELECT {", ".join(columns)}
                     FROM {sql_interface.quote_identifier(self._table_name)}
+                    {f"WHERE {where}" if where else ""}
                 """,
+                params,
                 fetchone=False,
             ),
         )
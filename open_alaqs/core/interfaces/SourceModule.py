@@ -1,16 +1,19 @@
 import os
 import sys
 from datetime import datetime
+from typing import Optional
 
 import pandas as pd
 
 from open_alaqs.core.alaqslogging import get_logger
+from open_alaqs.core.interfaces.Emissions import Emission, EmissionBatch
 from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.interfaces.UserTimeProfiles import (
     UserDayProfileStore,
     UserHourProfileStore,
     UserMonthProfileStore,
 )
+from open_alaqs.core.tools.inventory_context import InventoryContext, activate
 
 sys.path.append("..")  # Adds higher directory to python modules path.
 
@@ -57,6 +60,7 @@ class SourceModule:
             values_dict = {}
 
         self._database_path = values_dict.get("database_path")
+        self._context = values_dict.get("context")
         self._name = values_dict.get("name")
         self._sources = {}
         self._store = None
@@ -86,6 +90,20 @@ class SourceModule:
     def getDatabasePath(self):
         return self._database_path
 
+    def getContext(self) -> Optional[InventoryContext]:
+        return self._context
+
+    def setContext(self, val: Optional[InventoryContext]) -> None:
+        self._context = val
+
+    def createStore(self, store_class, **kwargs):
+        """
+        Get the store of the inventory of this module, i.e. of its context if
+        set.
+        """
+        with activate(self._context):
+            return store_class(self.getDatabasePath(), **kwargs)
+
     def convertSourcesToDataFrame(self):
         df = pd.DataFrame(list(self.getSources().items()), columns=["oid", "Sources"])
         if not df.empty:
@@ -108,6 +126,42 @@ class SourceModule:
     ):
         return NotImplemented
 
+    def processBatch(
+        self,
+        start_dt: datetime,
+        end_dt: datetime,
+        source_names=None,
+        ambient_conditions=None,
+        default_emission: Optional[Emission] = None,
+        **kwargs,
+    ) -> EmissionBatch:
+        """
+        Calculate the emissions of a period as a batch (see EmissionBatch). The
+        sources without emissions get the default emission, if any.
+
+        The default implementation converts the result of process(), modules
+        can override it to build the batch without Emission objects. Emissions
+        that do not fit the layout of the batch are kept as a list.
+        """
+        result = [
+            (source_, emissions_)
+            for _timestamp, source_, emissions_ in self.process(
+                start_dt,
+                end_dt,
+                source_names=source_names,
+                ambient_conditions=ambient_conditions,
+                **kwargs,
+            )
+        ]
+        try:
+            return EmissionBatch.fromResult(result, default=default_emission)
+        except ValueError:
+            logger.debug(
+                "%s: the emissions do not fit the layout of the batch",
+                self.getModuleName(),
+            )
+            return EmissionBatch.fromList(result, default=default_emission)
+
     def endJob(self):
         return NotImplemented
 
@@ -132,9 +186,9 @@ class SourceWithTimeProfileModule(SourceModule):
 
         db_path = self.getDatabasePath()
 
-        self._userHourProfileStore = UserHourProfileStore(db_path)
-        self._userDayProfileStore = UserDayProfileStore(db_path)
-        self._userMonthProfileStore = UserMonthProfileStore(db_path)
+        self._userHourProfileStore = self.createStore(UserHourProfileStore)
+        self._userDayProfileStore = self.createStore(UserDayProfileStore)
+        self._userMonthProfileStore = self.createStore(UserMonthProfileStore)
 
         # check if the database file exists
         if not os.path.isfile(self.getDatabasePath()):
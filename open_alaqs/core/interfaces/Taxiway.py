@@ -7,7 +7,7 @@ from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
 from open_alaqs.core.tools import spatial
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -180,7 +180,7 @@ class TaxiwaySegment:
         return val
 
 
-class TaxiwayRoutesStore(Store, metaclass=Singleton):
+class TaxiwayRoutesStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'TaxiwayRoute' objects
     """
@@ -233,7 +233,7 @@ class TaxiwayRoutesStore(Store, metaclass=Singleton):
             )
 
 
-class TaxiwaySegmentsStore(Store, metaclass=Singleton):
+class TaxiwaySegmentsStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'Taxiway' objects
     """
@@ -277,7 +277,7 @@ class TaxiwaySegmentsStore(Store, metaclass=Singleton):
                 )
 
 
-class TaxiwaySegmentsDatabase(SQLSerializable, metaclass=Singleton):
+class TaxiwaySegmentsDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to taxiway shape file in the spatialite database
     """
@@ -324,7 +324,7 @@ class TaxiwaySegmentsDatabase(SQLSerializable, metaclass=Singleton):
             self.deserialize()
 
 
-class TaxiwayRouteDatabase(SQLSerializable, metaclass=Singleton):
+class TaxiwayRouteDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to taxiway shape file in the spatialite database
     """
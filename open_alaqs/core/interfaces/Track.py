@@ -7,7 +7,7 @@ from shapely.wkt import loads
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -67,7 +67,7 @@ class Track:
         return val
 
 
-class TrackStore(Store, metaclass=Singleton):
+class TrackStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'Track' objects
     """
@@ -103,7 +103,7 @@ class TrackStore(Store, metaclass=Singleton):
         return self._track_db
 
 
-class TrackDatabase(SQLSerializable, metaclass=Singleton):
+class TrackDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to tracks in the spatialite database
     """
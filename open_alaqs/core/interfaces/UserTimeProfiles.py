@@ -4,7 +4,7 @@ from collections import OrderedDict
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
 from open_alaqs.core.interfaces.Store import Store
-from open_alaqs.core.tools.Singleton import Singleton
+from open_alaqs.core.tools.Singleton import InventorySingleton
 
 logger = get_logger(__name__)
 
@@ -110,7 +110,7 @@ class UserMonthProfile(UserProfile):
         return val
 
 
-class UserHourProfileStore(Store, metaclass=Singleton):
+class UserHourProfileStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'UserHourProfile' objects
     """
@@ -157,7 +157,7 @@ class UserHourProfileStore(Store, metaclass=Singleton):
         return self._user_hour_profile_db
 
 
-class UserDayProfileStore(Store, metaclass=Singleton):
+class UserDayProfileStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'UserDayProfile' objects
     """
@@ -204,7 +204,7 @@ class UserDayProfileStore(Store, metaclass=Singleton):
         return self._user_day_profile_db
 
 
-class UserMonthProfileStore(Store, metaclass=Singleton):
+class UserMonthProfileStore(Store, metaclass=InventorySingleton):
     """
     Class to store instances of 'UserMonthProfile' objects
     """
@@ -251,7 +251,7 @@ class UserMonthProfileStore(Store, metaclass=Singleton):
         return self._user_month_profile_db
 
 
-class UserHourProfileDatabase(SQLSerializable, metaclass=Singleton):
+class UserHourProfileDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to user hour profiles in the spatialite database
     """
@@ -313,7 +313,7 @@ class UserHourProfileDatabase(SQLSerializable, metaclass=Singleton):
             self.deserialize()
 
 
-class UserDayProfileDatabase(SQLSerializable, metaclass=Singleton):
+class UserDayProfileDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to user day profiles in the spatialite database
     """
@@ -357,7 +357,7 @@ class UserDayProfileDatabase(SQLSerializable, metaclass=Singleton):
             self.deserialize()
 
 
-class UserMonthProfileDatabase(SQLSerializable, metaclass=Singleton):
+class UserMonthProfileDatabase(SQLSerializable, metaclass=InventorySingleton):
     """
     Class that grants access to user month profiles in the spatialite database
     """
@@ -1,13 +1,14 @@
-import itertools
+import hashlib
 import os
 from collections import OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+import shapely
 from dateutil import rrule
 from qgis.gui import QgsDoubleSpinBox, QgsSpinBox
 from qgis.PyQt import QtWidgets
@@ -21,6 +22,8 @@ from open_alaqs.core.interfaces.Emissions import Emission
 from open_alaqs.core.interfaces.Movement import Movement
 from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.tools import conversion, spatial, sql_interface
+from open_alaqs.core.tools.allocation import CellAllocation
+from open_alaqs.core.tools.background_writer import BackgroundWriter
 from open_alaqs.core.tools.Grid3D import Grid3D
 
 logger = get_logger(__name__)
@@ -101,6 +104,12 @@ class AUSTALDispersionModule(DispersionModule):
             "widget_type": QtWidgets.QLineEdit,
             "tooltip": "Options must be defined successively and separated by a semicolon",
         },
+        "binary_grid_files": {
+            "label": "Binary Grid Files",
+            "initial_value": False,
+            "widget_type": QtWidgets.QCheckBox,
+            "tooltip": "Write the data of the emission grid files (e????.dmna) in binary .dmnb files",
+        },
     }
 
     @staticmethod
@@ -143,6 +152,10 @@ class AUSTALDispersionModule(DispersionModule):
         self._quality_level = values_dict.get("quality_level", 1)
         # for non-standard calculations
         self._options = values_dict.get("options_string", "SCINOTAT")
+        # write the data of the grid files in text or binary mode
+        self._binary_grid_files = values_dict.get("binary_grid_files", False)
+        # writes the grid files while the next period is calculated
+        self._grid_file_writer: Optional[BackgroundWriter] = None
 
         # "----------------- meteorology",
         # ToDo: Modify AmbientCondition.py or derive z0, d0, and ha from main
@@ -352,7 +365,12 @@ class AUSTALDispersionModule(DispersionModule):
             )
             return False
 
-    def InitializeEmissionGridMatrix(self):
+    def toEmissionGridMatrix(self, cell_emissions: np.ndarray) -> np.ndarray:
+        """
+        Get a view of the (x, y, z) emissions of the cells with the axes in
+        the order and direction of the index sequence (see getSequ()).
+
+        """
         if (self._grid is None) or (self._sequ is None):
             raise Exception(
                 "Cannot initialize the emissions grid. No 3DGrid or" " Sequence found."
@@ -361,21 +379,36 @@ class AUSTALDispersionModule(DispersionModule):
         # Split the sequ once
         sequ_split = self.getSequ().split(",")
 
-        # Check for each index which mesh to link
-        indices = [None, None, None]
-        for p, q in enumerate(sequ_split):
-            if q.startswith("k"):
-                indices[p] = self._z_meshes
-            elif q.startswith("j"):
-                indices[p] = self._y_meshes
-            else:
-                indices[p] = self._x_meshes
-        index_i, index_j, index_k = indices
+        # i, j and k are the x, y and z axes
+        axes = ["ijk".index(q[0]) for q in sequ_split]
+        emission_grid_matrix = cell_emissions.transpose(axes)
 
-        # Set the emission grid matrix to zero
-        self._emission_grid_matrix = np.zeros(shape=(index_i, index_j, index_k))
+        # Reverse the axes with a negative sign
+        flips = tuple(
+            slice(None, None, -1) if q[1] == "-" else slice(None) for q in sequ_split
+        )
+
+        return emission_grid_matrix[flips]
+
+    def getPollutantEmissionsKg(
+        self, columns: pd.Index, values: np.ndarray, pollutant: str
+    ) -> np.ndarray:
+        """
+        Get the emissions of a pollutant in kg from the column in `values`
+        with its emissions in g or kg.
+
+        """
+        is_pollutant = columns.str.match(f"^{pollutant.lower()}_k?g$")
+        if is_pollutant.sum() != 1:
+            raise ValueError(
+                f"The number of matching columns should be 1, "
+                f"got {columns[is_pollutant]}"
+            )
 
-        return index_i, index_j, index_k
+        column = np.flatnonzero(is_pollutant)[0]
+        if columns[column].endswith("_g"):
+            return values[:, column] / 1000
+        return values[:, column]
 
     @log_time
     def emptyOutputPath(self):
@@ -679,13 +712,14 @@ class AUSTALDispersionModule(DispersionModule):
 
         Source path, timestamps and data are taken from the attributes of the
          main class, other values may be specified as input parameters to this
-         method.
+         method. During a job, the file is written by a background thread (see
+         endJob()).
 
         :param source: the identifier of the source
         :param index: the identifier of the grid file
         :param dd_: vertical grid (h0 h1 h2 ...), heights above ground in m
         :param sk_: vertical grid, heights above ground in m
-        :param mode_: mode of the data part (text or binary)
+        :param mode_: mode of the data part ("text" or "binary")
         :param form_: format of a data element (e.g. Eq%5.1f or Eq%12.5e)
         :param vldf_: type of value (for post-processing, here V for volume
          value)
@@ -714,53 +748,71 @@ class AUSTALDispersionModule(DispersionModule):
         start_ = f"{delta_f_start_days}.{_start.strftime('%H:%M:%S')}"
         end_ = f"{delta_f_end_days}.{_end.strftime('%H:%M:%S')}"
 
-        # Get the emissions grid dimensions
-        x_dim, y_dim, z_dim = self._emission_grid_matrix.shape
+        # Create the header: grid information
+        header = "t1\t%s\n" % start_
+        header += "t2\t%s\n" % end_
+        header += "dd\t%s\n" % dd_
+        header += "sk\t%s\n" % sk_
+
+        # Add separator
+        header += "-\n"
+
+        # Create the header: data information
+        header += "mode\t%s\n" % mode_
+        header += "form\t%s\n" % form_
+        header += "vldf\t%s\n" % vldf_
+        header += "artp\t%s\n" % artp_
+        header += "dims\t%s\n" % dims_
+        header += "axes\t%s\n" % axes_
+        header += "sequ\t%s\n" % self.getSequ()
+
+        # Add separator
+        header += "-\n"
+
+        # Create the header: data information
+        header += "lowb\t%s\n" % self._lowb
+        header += "hghb\t%s\n" % self._hghb
+
+        # Write the file in the background if possible, the emission grid
+        # matrix of a period is not modified after it has been created
+        if self._grid_file_writer is not None:
+            self._grid_file_writer.submit(
+                self._writeGridFileData,
+                file_path,
+                header,
+                self._emission_grid_matrix,
+                mode_ == '"binary"',
+            )
+        else:
+            self._writeGridFileData(
+                file_path, header, self._emission_grid_matrix, mode_ == '"binary"'
+            )
 
+    @staticmethod
+    def _writeGridFileData(
+        file_path: Path, header: str, emission_grid_matrix: np.ndarray, binary: bool
+    ) -> None:
         # Start writing to file
         with file_path.open("w") as text_file:
-
-            # Write header: grid information
-            text_file.write("t1\t%s\n" % start_)
-            text_file.write("t2\t%s\n" % end_)
-            text_file.write("dd\t%s\n" % dd_)
-            text_file.write("sk\t%s\n" % sk_)
-
-            # Add separator
-            text_file.write("-\n")
-
-            # Write header: data information
-            text_file.write("mode\t%s\n" % mode_)
-            text_file.write("form\t%s\n" % form_)
-            text_file.write("vldf\t%s\n" % vldf_)
-            text_file.write("artp\t%s\n" % artp_)
-            text_file.write("dims\t%s\n" % dims_)
-            text_file.write("axes\t%s\n" % axes_)
-            text_file.write("sequ\t%s\n" % self.getSequ())
-
-            # Add separator
-            text_file.write("-\n")
-
-            # Write header: data information
-            text_file.write("lowb\t%s\n" % self._lowb)
-            text_file.write("hghb\t%s\n" % self._hghb)
+            text_file.write(header)
+
+            # In binary mode, the data are stored as 4-byte floats in the
+            # sequence of the index (the last index runs fastest) in a
+            # separate .dmnb file
+            if binary:
+                np.ascontiguousarray(emission_grid_matrix, dtype="<f4").tofile(
+                    file_path.with_suffix(".dmnb")
+                )
+                text_file.write("***\n")
+                return
 
             # Add separator
             text_file.write("*\n")
 
             # Write data
-            for x, y in itertools.product(*list(map(range, (x_dim, y_dim)))):
-                text_file.write(
-                    "%s\n"
-                    % ("\t").join(
-                        [
-                            str(elem)
-                            for elem in self._emission_grid_matrix[x, y].tolist()
-                        ]
-                    )
-                )
-                if y + 1 == y_dim:
-                    text_file.write("\n")
+            for x_slice in emission_grid_matrix.tolist():
+                text_file.write("\n".join("\t".join(map(str, row)) for row in x_slice))
+                text_file.write("\n\n")
 
             # Add terminator
             text_file.write("***\n")
@@ -964,6 +1016,16 @@ class AUSTALDispersionModule(DispersionModule):
                 self._y_meshes = self._grid._y_cells
                 self._z_meshes = self._grid._z_cells
 
+                # The emissions of each pollutant in each cell of a period
+                self._cell_emissions = np.zeros(
+                    (
+                        len(self._pollutants_list),
+                        self._x_meshes,
+                        self._y_meshes,
+                        self._z_meshes,
+                    )
+                )
+
                 # AUSTAL cannot take non square grid cells, choose finer
                 # resolution (dd) for austal.txt
                 self._mesh_width = min(
@@ -996,9 +1058,10 @@ class AUSTALDispersionModule(DispersionModule):
                 self._results = OrderedDict()
                 self._series = OrderedDict()
                 self._total_sources = OrderedDict()
-                self._timeID_per_source = OrderedDict()
+                self._grid_file_indices = OrderedDict()
                 self._dates = OrderedDict()
-                self._source_geometries = OrderedDict()
+                self._cell_allocation = CellAllocation(None, self.getCellWeights)
+                self._grid_file_writer = BackgroundWriter()
 
                 # Initialize the variables for the date normalization
                 self._first_start_time = None
@@ -1033,6 +1096,9 @@ class AUSTALDispersionModule(DispersionModule):
         timeval: the actual date
         """
 
+        # Stop if the grid file of an earlier period could not be written
+        self._grid_file_writer.check()
+
         # (i1 j1 k1, in this order)
         self._lowb = "1 1 1"
 
@@ -1064,9 +1130,10 @@ class AUSTALDispersionModule(DispersionModule):
             str(self._grid.getResolutionZ() * z) for z in range(self._z_meshes + 1)
         )
 
-        # Loop over all emissions and append one data point for every cell to
-        # total_emissions_per_cell_list for the specific result
-        total_emissions_per_cell_list = []
+        # Collect the allocation row and the emissions of every emission, the
+        # cell weights of each distinct geometry are calculated only once
+        rows = []
+        emission_objects = []
 
         # Get the grid
         for source_, emissions__ in result:
@@ -1078,217 +1145,85 @@ class AUSTALDispersionModule(DispersionModule):
             for emissions_ in emissions__:
 
                 # Get the geometry text
-                if emissions_.getGeometryText() is None:
+                wkt = emissions_.getGeometryText()
+                if wkt is None:
                     logger.warning(
                         f"AUSTAL: Did not find geometry for "
                         f"source: {source_.getName()}"
                     )
                     continue
 
-                # Get the geometry
-                geom = emissions_.getGeometry()
-
-                # Some convenience variables
-                is_point_element_ = isinstance(geom, Point)
-                is_line_element_ = isinstance(geom, LineString)
-                is_multi_line_element_ = isinstance(geom, MultiLineString)
-                is_polygon_element_ = isinstance(geom, Polygon)
-                is_multi_polygon_element_ = isinstance(geom, MultiPolygon)
-
-                # Convert the emissions to a series object
-                e_series = pd.Series(emissions_.getObjects())
-
-                if is_multi_polygon_element_ or is_multi_line_element_:
-
-                    # Add the emissions for each geometry
-                    for g in geom.geoms:
-                        # Determine the emissions for this geometry based on
-                        # area/length (depending on geometry type)
-                        if isinstance(g, Polygon):
-                            mpe_series = e_series * g.area / geom.area
-                        elif isinstance(g, LineString):
-                            mpe_series = e_series * g.length / geom.length
-                        else:
-                            raise TypeError(
-                                f"Geometry of type {type(geom)} is not "
-                                f"supported. It should be either a Polygon or "
-                                f"a LineString"
-                            )
-
-                        # Get matched cell coefficients for this geometry
-                        matched_cells_coeff = self.getMatchedCellCoeffs(
-                            g.wkt,
-                            emissions_,
-                            self._grid,
-                            is_point_element_,
-                            is_line_element_,
-                            is_polygon_element_,
-                            is_multi_polygon_element_,
-                        )
-
-                        # Update the total emissions per cell
-                        total_emissions_per_cell_list = self.updateEmissions(
-                            total_emissions_per_cell_list,
-                            mpe_series,
-                            matched_cells_coeff,
-                        )
-
-                else:
-
-                    # Get matched cell coefficients for this geometry
-                    matched_cells_coeff = self.getMatchedCellCoeffs(
-                        emissions_.getGeometryText(),
-                        emissions_,
-                        self._grid,
-                        is_point_element_,
-                        is_line_element_,
-                        is_polygon_element_,
-                        is_multi_polygon_element_,
+                vertical_extent = emissions_.getVerticalExtent()
+                rows.append(
+                    self._cell_allocation.getRow(
+                        (wkt, vertical_extent.get("delta_z", 0)),
+                        wkt,
+                        vertical_extent,
                     )
+                )
+                emission_objects.append(emissions_.getObjects())
 
-                    # Update the total emissions per cell
-                    total_emissions_per_cell_list = self.updateEmissions(
-                        total_emissions_per_cell_list, e_series, matched_cells_coeff
-                    )
-
-        # Create cumulative emissions per cell
-        try:
-            total_emissions_per_cell_df = (
-                pd.concat(total_emissions_per_cell_list).groupby(level=0).sum()
-            )
-        except ValueError:
-
-            # Create an empty dataframe with the right columns
-            total_emissions_per_cell_df = pd.DataFrame(
+        # Allocate the emissions of this period to the cells
+        emissions_df = pd.DataFrame(emission_objects).fillna(0)
+        if emissions_df.empty:
+            emissions_df = pd.DataFrame(
                 columns=[f"{p.lower()}_kg" for p in self._pollutants_list]
             )
+        cell_ids, cell_values = self._cell_allocation.allocateSparse(
+            np.array(rows, dtype=np.int64), emissions_df.to_numpy(dtype=float)
+        )
+
+        logger.debug(f"Pollutions list: {self._pollutants_list}")
+        logger.debug(f"Emissions list: {emissions_df.columns}")
+
+        # Get the emissions (in kg) of each pollutant in each cell
+        pollutant_values = np.column_stack(
+            [
+                self.getPollutantEmissionsKg(emissions_df.columns, cell_values, p)
+                for p in self._pollutants_list
+            ]
+        )
+
+        # Accumulate the emissions of the cells inside the grid in the
+        # (pollutant, x, y, z) array
+        self._cell_emissions.fill(0)
+        x_idx, y_idx, z_idx = Grid3D.convertCellIdToXYZIndices(cell_ids)
+        is_in_grid = (
+            (x_idx < self._x_meshes)
+            & (y_idx < self._y_meshes)
+            & (z_idx < self._z_meshes)
+        )
+        self._cell_emissions[
+            :, x_idx[is_in_grid], y_idx[is_in_grid], z_idx[is_in_grid]
+        ] = pollutant_values[is_in_grid].T
 
         # Get the output path (as Path)
         output_path = self.getOutputPathAsPath()
         fill_results = OrderedDict()
 
-        logger.debug(f"Pollutions list: {self._pollutants_list}")
-        logger.debug(f"Emissions list: {total_emissions_per_cell_df.columns}")
-
         # Fill Emissions Matrix with emission rate (normalised to 1)
         for source_counter, _pollutant in enumerate(self._pollutants_list):
 
-            # Start the counter at 1
-            source_counter += 1
-
-            # Create the source id
-            source_id = str(source_counter).zfill(2)
+            # Create the source id (starting at 1)
+            source_id = str(source_counter + 1).zfill(2)
 
             # Create the source directory if it doesn't exist
             source_dir = output_path / source_id
             if not source_dir.is_dir():
                 source_dir.mkdir()
 
-            # initialize emission matrix for each pollutant
-            # (x_dim, y_dim, z_dim) = self.InitializeEmissionGridMatrix()
-
-            # Get the emissions for this pollutant
-            _pollutant_emissions = total_emissions_per_cell_df.filter(
-                regex=f"^{_pollutant.lower()}_k?g$"
-            )
-
-            # Convert to kg (if only g is present)
-            _columns = _pollutant_emissions.columns
-            if _columns.str.endswith("_g").any():
-                for _column in _columns[_columns.str.endswith("_g")]:
-                    _pollutant_emissions[_column[:-1] + "kg"] = (
-                        _pollutant_emissions[_column] / 1000
-                    )
-
-            # Get the total emissions in kg
-            if len(_columns) != 1:
-                raise ValueError(
-                    f"The number of matching columns should be 1, " f"got {_columns}"
-                )
-
-            # Get the column name
-            _column_name = _columns[0]
-
-            # Get the emissions for this pollutant in kg
-            _pollutant_emissions_kg = _pollutant_emissions[
-                (
-                    _column_name[:-1] + "kg"
-                    if _column_name.endswith("_g")
-                    else _column_name
-                )
-            ]
-
             # Get the total emissions in kg
-            hashed_emissions = _pollutant_emissions_kg.sum()
-
-            # Initialize the emissions grid and get the dimensions
-            dims = self.InitializeEmissionGridMatrix()
-            # x_dim, y_dim, z_dim = dims
-
-            # Split the sequ once
-            sequ_split = self.getSequ().split(",")
-
-            # Get the indices
-            sequ_indices = [i[0] for i in sequ_split]
-
-            # Get the signs
-            sequ_signs = [i[1] for i in sequ_split]
-
-            # Determine the transformation matrix
-            _o = np.array(list("ijk"))
-            _p = np.array(sequ_indices)
-            _a = (_o == _p[:, np.newaxis]).astype(int)
+            hashed_emissions = pollutant_values[:, source_counter].sum()
 
-            # Determine the constants
-            _b = np.zeros((3, 1))
-
-            # Modify the values based on the signs
-            _sequ_signs = np.array(sequ_signs) == "-"
-            _dims = np.array(dims)
-
-            _b[_sequ_signs] = _dims[_sequ_signs] - 1
-            _a[_sequ_signs] *= -1
-
-            # Only perform these steps if there are emissions for this pollutant
+            # Only normalise if there are emissions for this pollutant
             if hashed_emissions > 0:
-
-                # logger.debug(_pollutant_emissions_kg)
-
-                # # initialize emission matrix for each pollutant
-                # # (x_dim, y_dim, z_dim) = self.InitializeEmissionGridMatrix()
-                # for hash in total_emissions_per_cell_dict:
-
-                # Get the non-zero emissions
-                nz_emissions_kg = _pollutant_emissions_kg[_pollutant_emissions_kg > 0]
-
-                for hash, hash_value in nz_emissions_kg.items():
-
-                    # Get the XYZ indices
-                    vvv = self._grid.convertCellHashToXYZIndices(hash)
-
-                    # Check if the indices are within the bounds
-                    if (
-                        (vvv[0] >= self._x_meshes)
-                        or (vvv[1] >= self._y_meshes)
-                        or (vvv[2] >= self._z_meshes)
-                    ):
-                        # logger.debug("AUSTAL Error: Grid needs to be
-                        # enlarged. Hash '%s' out of grid. Source:'%s'"%(hash,
-                        # source_.getName()))
-                        continue
-
-                    # Convert the indices of the cell hash to the emission grid
-                    ii, jj, kk = (
-                        (_a @ np.array(vvv)[:, np.newaxis] + _b)
-                        .T[0]
-                        .astype(int)
-                        .tolist()
-                    )
-
-                    # Update the values in the emissions grid
-                    self._emission_grid_matrix[ii, jj, kk] += (
-                        hash_value / hashed_emissions
-                    )
+                self._emission_grid_matrix = self.toEmissionGridMatrix(
+                    self._cell_emissions[source_counter] / hashed_emissions
+                )
+            else:
+                self._emission_grid_matrix = self.toEmissionGridMatrix(
+                    np.zeros_like(self._cell_emissions[source_counter])
+                )
 
             self._total_sources.setdefault(source_id, [])
             if _pollutant.startswith("PM"):
@@ -1296,12 +1231,19 @@ class AUSTALDispersionModule(DispersionModule):
             if _pollutant not in self._total_sources[source_id]:
                 self._total_sources.setdefault(source_id, []).append(_pollutant)
 
-            # Update the source id
-            if source_id in self._timeID_per_source:
-                time_id = self._timeID_per_source[source_id]
-                self._timeID_per_source.update({source_id: time_id + 1})
-            else:
-                self._timeID_per_source.update({source_id: 1})
+            # Reuse the grid file of an earlier period with the same
+            # (normalised) distribution, otherwise write a new one. AUSTAL
+            # takes the time dependency from series.dmna (the timeID of each
+            # hour selects the grid file) and ignores t1/t2 of the grid files,
+            # so a reused file keeps the t1/t2 of the first period that wrote it
+            grid_file_indices = self._grid_file_indices.setdefault(source_id, {})
+            digest = hashlib.sha256(
+                np.ascontiguousarray(self._emission_grid_matrix).tobytes()
+            ).hexdigest()
+            is_new_grid_file = digest not in grid_file_indices
+            if is_new_grid_file:
+                grid_file_indices[digest] = len(grid_file_indices) + 1
+            time_id = grid_file_indices[digest]
 
             # Emission rate in AUSTAL is in g/s (kg x 1000/3600),
             # hashed_emissions are given in kg/h
@@ -1309,21 +1251,24 @@ class AUSTALDispersionModule(DispersionModule):
 
             pollutant_dic = {
                 _pollutant: hashed_emissions * (10.0 / 36.0),
-                "timeID": self._timeID_per_source[source_id],
+                "timeID": time_id,
             }
 
             fill_results[source_id].update(pollutant_dic)
 
             self._results[_end_time_string].update(fill_results)
 
+            if not is_new_grid_file:
+                continue
+
             # Start writing to file
             try:
                 self.writeGridFile(
                     source_id,
-                    self._timeID_per_source[source_id],
+                    time_id,
                     dd_,
                     sk_,
-                    '"text"',
+                    '"binary"' if self._binary_grid_files else '"text"',
                     '"Eq%5.1f"',
                     '"V"',
                     '"M"',
@@ -1338,6 +1283,15 @@ class AUSTALDispersionModule(DispersionModule):
     def endJob(self):
         if self.isEnabled():
             try:
+                # Wait until all grid files are written
+                try:
+                    self._grid_file_writer.close()
+                except Exception as e:
+                    logger.error("AUSTAL: Cannot write the grid files: %s" % e)
+                    return False
+                finally:
+                    self._grid_file_writer = None
+
                 if not self.checkTimeIntervalinResults():
                     raise Exception("AUSTAL: Time Interval Error")
 
@@ -1377,78 +1331,65 @@ class AUSTALDispersionModule(DispersionModule):
     # 075 (in the federal state Baden- Württemberg: 060), 100, 150
 
     @log_time
-    def getMatchedCellCoeffs(
-        self,
-        wkt: str,
-        emissions_: Emission,
-        grid: Grid3D,
-        is_point_element_: bool,
-        is_line_element_: bool,
-        is_polygon_element_: bool,
-        is_multi_polygon_element_: bool,
-    ):
+    def getCellWeights(
+        self, wkt: str, vertical_extent: dict
+    ) -> tuple[np.ndarray, np.ndarray]:
         """
-        Get matched cells for this coefficients
+        Get the cell ids and the share of the emissions in each cell for a
+        geometry. Multi-lines are distributed over their parts by length.
 
         """
+        geom = shapely.from_wkt(wkt)
 
-        # Check if the matched cells are know for this geometry
-        if wkt in self._source_geometries:
+        # Polygons are rasterized on the grid in bulk
+        if isinstance(geom, (Polygon, MultiPolygon)):
+            z = np.nan_to_num(shapely.get_coordinates(geom, include_z=True)[:, 2])
+            return self._grid.get_polygon_cell_weights(
+                geom, z.min(), z.max() + max(vertical_extent.get("delta_z", 0), 0)
+            )
 
-            # Get the matched cells for this geometry
-            return self._source_geometries[wkt]["efficiency"]
+        if isinstance(geom, MultiLineString):
+            cell_ids = []
+            weights = []
+            for g in geom.geoms:
+                # Determine the share of this part based on its length
+                part_cell_ids, part_weights = self.getCellWeights(
+                    g.wkt, vertical_extent
+                )
+                cell_ids.append(part_cell_ids)
+                weights.append(part_weights * g.length / geom.length)
+
+            return np.concatenate(cell_ids), np.concatenate(weights)
+
+        # Lines only touch the cells they cross, which are traversed exactly
+        if isinstance(geom, LineString):
+            return self._grid.get_line_cell_weights(
+                shapely.get_coordinates(geom, include_z=True),
+                vertical_extent.get("delta_z", 0),
+            )
 
         # Determine the bounding box
         bbox = self.getBoundingBox(wkt)
 
-        # Get the vertical extent
-        vertical_extent = emissions_.getVerticalExtent()
-
         # Take into account the effective vertical source extent and shift
         if "delta_z" in vertical_extent and vertical_extent["delta_z"] > 0:
             bbox["z_max"] = bbox["z_max"] + vertical_extent["delta_z"]
 
         # Get the matched cells for this geometry
-        matched_cells = grid.matchBoundingBoxToCellHashList(bbox, z_as_list=True)
+        matched_cells = self._grid.matchBoundingBoxToCellHashList(bbox, z_as_list=True)
         matched_cells_coeff = self.CalculateCellHashEfficiency(
             wkt,
             bbox,
             matched_cells,
-            is_point_element_,
-            is_line_element_,
-            is_polygon_element_,
-            is_multi_polygon_element_,
+            isinstance(geom, Point),
+            isinstance(geom, LineString),
+            isinstance(geom, Polygon),
+            isinstance(geom, MultiPolygon),
         )
 
-        # Store the matched cells for this geometry
-        self._source_geometries[wkt] = {
-            "bbox": bbox,
-            "matched_cells": matched_cells,
-            "efficiency": matched_cells_coeff,
-        }
-
-        return matched_cells_coeff
-
-    @log_time
-    def updateEmissions(
-        self,
-        cumulative_cell_emissions: list,
-        emissions: pd.Series,
-        cell_coefficients: dict,
-    ):
-
-        # Create a series from the cell-coefficients
-        cell_coefficients_series = pd.Series(cell_coefficients)
-
-        # Create a dataframe with all emissions for each cell
-        cell_emissions = pd.DataFrame(
-            emissions.values * cell_coefficients_series.values[:, np.newaxis],
-            columns=emissions.index,
-            index=cell_coefficients_series.index,
+        cell_ids = np.array(
+            [int(cell_hash) for cell_hash in matched_cells_coeff], dtype=np.int64
         )
+        weights = np.array(list(matched_cells_coeff.values()), dtype=float)
 
-        # Append the emissions to the list
-        cumulative_cell_emissions.append(cell_emissions)
-
-        # Return the list
-        return cumulative_cell_emissions
+        return cell_ids, weights
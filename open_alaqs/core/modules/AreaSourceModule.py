@@ -26,7 +26,7 @@ class AreaSourceWithTimeProfileModule(SourceWithTimeProfileModule):
         SourceWithTimeProfileModule.__init__(self, values_dict)
 
         if self.getDatabasePath() is not None:
-            self.setStore(AreaSourcesStore(self.getDatabasePath()))
+            self.setStore(self.createStore(AreaSourcesStore))
 
     def beginJob(self):
         # super(AreaSourceWithTimeProfileModule, self).beginJob()
@@ -13,7 +13,8 @@ from open_alaqs.alaqs_config import DEFAULT_CONCENTRATION_GRID_FACTOR
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.OutputModule import OutputModule
 from open_alaqs.core.plotting.ContourPlotVectorLayer import ContourPlotVectorLayer
-from open_alaqs.core.tools import conversion, sql_interface
+from open_alaqs.core.tools import conversion, dmna, sql_interface
+from open_alaqs.core.tools.concentration_statistics import ConcentrationStatistics
 
 logger = get_logger(__name__)
 
@@ -333,28 +334,7 @@ class QGISVectorLayerDispersionModule(OutputModule):
                 "File '%s' not found. Choose another pollutant ? " % (datapath),
             )
         try:
-            with open(datapath, encoding="utf8", errors="ignore") as f:
-                raw_output_data = [
-                    x.rstrip("\n").lstrip().replace('"', "") for x in f.readlines()
-                ]
-
-            output_data = OrderedDict()
-            cnt = 0
-            for content in raw_output_data:
-                cnt += +1
-                if content.split() and "*" not in content.split()[0]:
-                    output_data[content.split()[0]] = content.split()[1:]
-                elif content.split() and "*" in content.split()[0]:
-                    break
-
-            index_ = raw_output_data.index("*")
-            # concentration_matrix = np.loadtxt(datapath, comments="*", skiprows=index_)
-            concentration_matrix = np.loadtxt(
-                raw_output_data, comments="*", skiprows=index_
-            )
-
-            return output_data, index_, concentration_matrix
-
+            return dmna.read_austal_output(datapath)
         except Exception as exc_:
             logger.error(exc_)
             return OrderedDict(), None, None
@@ -377,7 +357,8 @@ class QGISVectorLayerDispersionModule(OutputModule):
                 return self.readA2Koutput(output_file)
 
             else:
-                conc = OrderedDict()
+                # The mean of the period is calculated while reading the files
+                statistics = None
                 time_counter = 0
                 # Ensure that the user defined time period is within limits
                 if (self._time_start < self._timeseries[0]) or (
@@ -424,11 +405,15 @@ class QGISVectorLayerDispersionModule(OutputModule):
                                 "Error in timedelta. Choose another averaging period for time interval (%s, %s)"
                                 % (output_data["t1"], output_data["t2"])
                             )
-                        conc[str(time_counter).zfill(3)] = concentration_matrix
+                        if statistics is None:
+                            statistics = ConcentrationStatistics(
+                                concentration_matrix.shape
+                            )
+                        statistics.add(concentration_matrix)
                     return (
                         output_data,
                         index_,
-                        np.array(list(conc.values())).mean(axis=0),
+                        statistics.getMean(),
                     )
                     # ToDo: Add max ?
 
@@ -473,7 +458,11 @@ class QGISVectorLayerDispersionModule(OutputModule):
                                         "Error in timedelta. Choose another averaging period for time interval (%s, %s)"
                                         % (output_data["t1"], output_data["t2"])
                                     )
-                                conc[str(time_counter).zfill(3)] = concentration_matrix
+                                if statistics is None:
+                                    statistics = ConcentrationStatistics(
+                                        concentration_matrix.shape
+                                    )
+                                statistics.add(concentration_matrix)
 
                     elif self._averaging_period == "8-hours mean":
                         QtWidgets.QMessageBox.information(
@@ -521,12 +510,16 @@ class QGISVectorLayerDispersionModule(OutputModule):
                                         "Error in timedelta. Choose another averaging period for time interval (%s, %s)"
                                         % (output_data["t1"], output_data["t2"])
                                     )
-                                conc[str(time_counter).zfill(3)] = concentration_matrix
+                                if statistics is None:
+                                    statistics = ConcentrationStatistics(
+                                        concentration_matrix.shape
+                                    )
+                                statistics.add(concentration_matrix)
 
                     return (
                         output_data,
                         index_,
-                        np.array(list(conc.values())).mean(axis=0),
+                        statistics.getMean(),
                     )
 
         except Exception as e:
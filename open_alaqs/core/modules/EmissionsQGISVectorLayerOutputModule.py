@@ -7,7 +7,12 @@ from qgis.PyQt import QtWidgets
 from qgis.PyQt.QtCore import QVariant
 
 from open_alaqs.core.alaqslogging import get_logger
-from open_alaqs.core.interfaces.Emissions import Emission, PollutantType, PollutantUnit
+from open_alaqs.core.interfaces.Emissions import (
+    Emission,
+    EmissionBatch,
+    PollutantType,
+    PollutantUnit,
+)
 from open_alaqs.core.interfaces.OutputModule import GridOutputModule, OutputModule
 from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.plotting.ContourPlotVectorLayer import ContourPlotVectorLayer
@@ -85,7 +90,7 @@ class EmissionsQGISVectorLayerOutputModule(GridOutputModule):
     def beginJob(self):
         # prepare the attributes of each point of the vector layer
         self._total_emissions = 0.0
-        self._grid_df = self._grid.get_df_from_2d_grid_cells()
+        self._grid_df = self._begin_grid(self._grid)
         self._grid_df = self._grid_df.assign(Q=pd.Series(0, index=self._grid_df.index))
 
     def process(
@@ -99,15 +104,29 @@ class EmissionsQGISVectorLayerOutputModule(GridOutputModule):
             if not (timestamp >= self._time_start and timestamp < self._time_end):
                 return None
 
-        # loop over all emissions and append one data point for every grid cell
-        for source, emissions in result:
-            for emission in emissions:
-                self._grid_df = self._process_grid(source, emission, self._grid_df)
+        # allocate all emissions of the period to the grid cells
+        self._process_grid_result(result)
+
+    def processBatch(
+        self,
+        timestamp: datetime,
+        batch: EmissionBatch,
+        **kwargs: Any,
+    ) -> Optional[QgsVectorLayer]:
+        # filter by configured time
+        if self._time_start and self._time_end:
+            if not (timestamp >= self._time_start and timestamp < self._time_end):
+                return None
+
+        # allocate all emissions of the period to the grid cells
+        self._process_grid_batch(batch)
 
     def endJob(self) -> Optional[QgsVectorLayer]:
         if self._grid_df.empty:
             return None
 
+        self._grid_df = self._end_grid(self._grid_df)
+
         headers = []
         for pollutant_type in PollutantType:
             key = f"{pollutant_type.value}_{PollutantUnit.KG.value}"
@@ -2,17 +2,19 @@
 This class provides the module to calculate emissions of movements.
 """
 
-from datetime import datetime
-from typing import List, Tuple, TypedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, TypedDict
 
+import numpy as np
 import pandas as pd
 
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.AmbientCondition import AmbientCondition
-from open_alaqs.core.interfaces.Emissions import Emission
-from open_alaqs.core.interfaces.Movement import EmissionsDict, MovementStore
+from open_alaqs.core.interfaces.Emissions import Emission, EmissionBatch
+from open_alaqs.core.interfaces.Movement import EmissionsDict, Movement, MovementStore
 from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.interfaces.SourceModule import SourceModule
+from open_alaqs.core.tools.SizeLimitedDict import LRUCache
 
 logger = get_logger(__name__)
 
@@ -36,6 +38,18 @@ class MovementSourceModule(SourceModule):
     Calculate emissions due to movements
     """
 
+    # Maximum number of (engine, profile, runway, limit, ambient) flight
+    # emissions kept in the cache
+    flight_emissions_cache_size = 20000
+
+    # Quantization of the ambient conditions (temperature in K, pressure in Pa,
+    # relative humidity) for the flight emissions cache
+    ambient_condition_bin_sizes = (0.5, 100.0, 0.01)
+
+    # The movements are loaded in windows of runway times of this length, so
+    # only the movements of the periods under calculation are in memory
+    movement_window_length = timedelta(days=7)
+
     @staticmethod
     def getModuleName():
         return "MovementSource"
@@ -46,9 +60,16 @@ class MovementSourceModule(SourceModule):
         SourceModule.__init__(self, values_dict)
 
         if self.getDatabasePath() is not None:
-            movement_store = MovementStore(self.getDatabasePath())
+            movement_store = self.createStore(MovementStore, deserialize=False)
             self.setStore(movement_store)
 
+        # the windows of movements are not loaded beyond the end of the study
+        end_dt = values_dict.get("end_dt_inclusive")
+        self._end_dt = (
+            datetime.fromisoformat(end_dt) if isinstance(end_dt, str) else end_dt
+        )
+        self._movementWindow: Optional[tuple[datetime, datetime]] = None
+
         self._calculation_limit = {"max_height": 914.4, "height_unit_in_feet": False}
 
         self._installation_corrections = {
@@ -164,78 +185,61 @@ class MovementSourceModule(SourceModule):
         )
         return flight_emissions
 
-    @staticmethod
-    def getDefaultProfileName(movement):
-        if movement.isDeparture():
-            return movement.getAircraft().getDefaultDepartureProfileName()
-        return movement.getAircraft().getDefaultArrivalProfileName()
-
-    def addAdditionalColumnsToDataFrame(self):
+    @classmethod
+    def getAmbientConditionBin(cls, ambient_conditions) -> tuple:
         """
-        Add additional movement information to the dataframe
-
+        Quantize the temperature, pressure and humidity of the ambient
+        conditions, so close conditions share the flight emissions cache.
         """
+        if ambient_conditions is None:
+            return ()
 
-        # Set default emissions
-        default_emission = Emission(
-            defaultValues={
-                "fuel_kg": 0.0,
-                "co_g": 0.0,
-                "co2_g": 0.0,
-                "hc_g": 0.0,
-                "nox_g": 0.0,
-                "sox_g": 0.0,
-                "pm10_g": 0.0,
-                "p1_g": 0.0,
-                "p2_g": 0.0,
-                "pm10_prefoa3_g": 0.0,
-                "pm10_nonvol_g": 0.0,
-                "pm10_sul_g": 0.0,
-                "pm10_organic_g": 0.0,
-                "nvpm_g": 0.0,
-                "nvpm_number": 0.0,
-            }
+        values = (
+            ambient_conditions.getTemperature(),
+            ambient_conditions.getPressure(),
+            ambient_conditions.getRelativeHumidity(),
+        )
+        return tuple(
+            None if value is None else round(float(value) / bin_size)
+            for value, bin_size in zip(values, cls.ambient_condition_bin_sizes)
         )
 
-        # Create a function that returns a list of default emissions
-        def _default_emissions(*args):
-            return [default_emission]
-
-        # Load movements from DataFrame
-        df = self.getDataframe()
-
-        # Add the runway times
-        df.loc[:, "RunwayTime"] = [mov.getRunwayTime() for mov in df["Sources"]]
-
-        # Add the gate
-        df.loc[:, "gate"] = [mov.getGate().getName() for mov in df["Sources"]]
-
-        # Add the aircraft and aircraft group
-        df.loc[:, "aircraft"] = [mov.getAircraft().getName() for mov in df["Sources"]]
-        df.loc[:, "ac_group"] = [mov.getAircraft().getGroup() for mov in df["Sources"]]
-
-        # Add the engine
-        df.loc[:, "engine"] = [
-            mov.getAircraftEngine().getName() for mov in df["Sources"]
-        ]
+    def loadSources(self):
+        """
+        Load all movements of the store, e.g. to list their names. The
+        movements are created only for the periods they are calculated in.
+        """
+        self.releaseMovementWindow()
+        if self.getStore() is not None:
+            self.getStore().loadMovements()
+        self.convertSourcesToDataFrame()
 
-        # Add the departure/arrival
-        df.loc[:, "departure_arrival"] = [
-            mov.getDepartureArrivalFlag() for mov in df["Sources"]
-        ]
+    def convertSourcesToDataFrame(self):
+        """
+        Set the dataframe of the loaded movements from their attributes in the
+        store, without creating the movements (see getPeriodMovements).
+        """
+        if self.getStore() is None:
+            attributes = pd.DataFrame(
+                columns=MovementStore.movement_attribute_columns, dtype=object
+            )
+        else:
+            attributes = self.getStore().getMovementAttributes()
 
-        # Add the profile id
-        df.loc[:, "profile_id"] = df["Sources"].apply(self.getDefaultProfileName)
+        df = attributes.rename(columns={"runway_time": "RunwayTime"})
+        df.insert(0, "oid", attributes.index)
+        self._dataframe = df.reset_index(drop=True)
 
-        # Add default gate and flight emissions
-        empty_series = pd.Series(index=df.index, dtype=object)
-        # TODO OPENGIS.ch: the type of the `GateEmissions` column would be an `Emission` instance, but later we set it to
-        # `{distance_time:float, distance_space:float, emissions: list[Emissions]}`
-        df.loc[:, "GateEmissions"] = empty_series.apply(_default_emissions)
-        df.loc[:, "FlightEmissions"] = empty_series.apply(_default_emissions)
+    def getSourceNames(self):
+        return [str(name) for name in self.getDataframe().get("name", [])]
 
-        # Update the DataFrame
-        self._dataframe = df.astype("object")
+    def getPeriodMovements(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add the movements of the rows of a period to the dataframe, as column
+        "Sources". Only these movements are created.
+        """
+        store = self.getStore()
+        return df.assign(Sources=[store.getObject(oid) for oid in df["oid"]])
 
     def _getMovementsIndicesBySourceNames(
         self, df: pd.DataFrame, source_names: list[str]
@@ -243,35 +247,93 @@ class MovementSourceModule(SourceModule):
         cache_key = tuple(sorted(source_names))
 
         if cache_key not in self._cachedMovementIndexBySourceNames:
-            self._cachedMovementIndexBySourceNames[cache_key] = df.apply(
-                lambda r: r["Sources"].getName() in source_names,
-                axis=1,
+            self._cachedMovementIndexBySourceNames[cache_key] = df["name"].isin(
+                source_names
             )
 
         return self._cachedMovementIndexBySourceNames[cache_key]
 
     def beginJob(self):
-        self.loadSources()
+        # reset the flight emissions cache
+        self._flightEmissionsCache = LRUCache(size=self.flight_emissions_cache_size)
+        self._emissionBlocks: dict[int, tuple[list, EmissionBatch]] = {}
+
+        # the movements are loaded with the first period
+        self.releaseMovementWindow()
+
+    def getMovementWindow(self) -> Optional[tuple[datetime, datetime]]:
+        return self._movementWindow
+
+    def loadMovementWindow(self, start_dt: datetime, end_dt: datetime) -> None:
+        """
+        Load the window of movements that covers the period [start_dt, end_dt),
+        if not loaded yet. The movements of the previous window are released.
+        """
+        window = self._movementWindow
+        if window is not None and window[0] <= start_dt and end_dt <= window[1]:
+            return
+
+        window_end_dt = start_dt + self.movement_window_length
+        if self._end_dt is not None:
+            window_end_dt = min(window_end_dt, self._end_dt)
+        window_end_dt = max(window_end_dt, end_dt)
+
+        self.releaseMovementWindow()
+        if self.getStore() is not None:
+            self.getStore().loadMovements(start_dt, window_end_dt)
+        self._movementWindow = (start_dt, window_end_dt)
+
         self.convertSourcesToDataFrame()
-        self.addAdditionalColumnsToDataFrame()
 
-        # reset the movement index cache
+        # sort the movements by runway time, so each period only has to
+        # look up its own movements instead of scanning all of them
+        runway_times = self.getDataframe()["RunwayTime"].to_numpy(dtype=float)
+        self._runwayTimeOrder = np.argsort(runway_times, kind="stable")
+        self._sortedRunwayTimes = runway_times[self._runwayTimeOrder]
+
+    def releaseMovementWindow(self) -> None:
+        """
+        Release the movements of the loaded window.
+        """
+        if self._movementWindow is not None and self.getStore() is not None:
+            self.getStore().releaseMovements()
+        self._movementWindow = None
+
+        self.convertSourcesToDataFrame()
         self._cachedMovementIndexBySourceNames: dict[tuple[str, ...], pd.Series] = {}
+        self._runwayTimeOrder = np.empty(0, dtype=int)
+        self._sortedRunwayTimes = np.empty(0)
 
-    def process(
+    def _getMovementsPositionsInPeriod(
+        self, start_dt: datetime, end_dt: datetime
+    ) -> np.ndarray:
+        """
+        Get the positions (in the dataframe order) of the movements with a
+        runway time in [start_dt, end_dt).
+        """
+        start_ix, end_ix = np.searchsorted(
+            self._sortedRunwayTimes,
+            [start_dt.timestamp(), end_dt.timestamp()],
+            side="left",
+        )
+        return np.sort(self._runwayTimeOrder[start_ix:end_ix])
+
+    def _calculatePeriodEmissions(
         self,
         start_dt: datetime,
         end_dt: datetime,
-        source_names=None,
-        runway_names=None,
-        ambient_conditions=None,
-        vertical_limit_m: float = 914.4,
-        **kwargs,
-    ) -> List[Tuple[datetime, Source, Emission]]:
-        if runway_names is None:
-            runway_names = []
-        if source_names is None:
-            source_names = []
+        source_names: list[str],
+        runway_names: list[str],
+        ambient_conditions,
+        vertical_limit_m: float,
+    ) -> list[
+        tuple[Movement, list[EmissionsDict], list[EmissionsDict], list[EmissionsDict]]
+    ]:
+        """
+        Calculate the emissions of the movements of a period, as a list of
+        (movement, taxiing, gate and flight emissions). The gate and flight
+        emissions are shared by the movements of the same group.
+        """
         result_ = []
 
         try:
@@ -299,21 +361,29 @@ class MovementSourceModule(SourceModule):
             },
         }
 
-        # Load movements from DataFrame
+        # Load the movements of this period
+        self.loadMovementWindow(start_dt, end_dt)
         df = self.getDataframe()
 
+        # Get the movements between start and end time of this period
+        positions = self._getMovementsPositionsInPeriod(start_dt, end_dt)
+
         # Get the movements that match the source names
         if source_names and "all" not in source_names:
-            df = df[self._getMovementsIndicesBySourceNames(df, source_names)]
-
-        # Get the movements between start and end time of this period
-        relevant_movements = (df["RunwayTime"] >= start_dt.timestamp()) & (
-            df["RunwayTime"] < end_dt.timestamp()
-        )
+            source_names_mask = self._getMovementsIndicesBySourceNames(
+                df, source_names
+            ).to_numpy(dtype=bool)
+            positions = positions[source_names_mask[positions]]
 
         # Return an empty list if there are no movements in this period
-        if df[relevant_movements].empty:
-            return []
+        if len(positions) == 0:
+            return result_
+
+        df = self.getPeriodMovements(df.iloc[positions])
+
+        # The gate and flight emissions of the movements, by movement oid
+        gate_emissions_by_oid: dict[str, list[EmissionsDict]] = {}
+        flight_emissions_by_oid: dict[str, list[EmissionsDict]] = {}
 
         """
         Calculate Gate Emissions
@@ -321,7 +391,7 @@ class MovementSourceModule(SourceModule):
 
         # Perform the gate calculation once for each group
         gate_columns = ["gate", "ac_group", "departure_arrival"]
-        for _name, group in df[relevant_movements].groupby(gate_columns):
+        for _name, group in df.groupby(gate_columns):
 
             # Calculate the gate emissions
             gate_emissions = self.FetchGateEmissions(
@@ -343,8 +413,7 @@ class MovementSourceModule(SourceModule):
                 gate_emissions.pop(index)
 
             # Update the gate emissions
-            for ix in group.index:
-                df.at[ix, "GateEmissions"] = gate_emissions
+            gate_emissions_by_oid.update(dict.fromkeys(group["oid"], gate_emissions))
 
         """
         Calculate Flight Emissions
@@ -362,9 +431,20 @@ class MovementSourceModule(SourceModule):
             # This is because the Profile shows the path of the airplane ignoring the azimuth of the Runway
             # and it's geometry is stored precalculated with the Runway in the resulting FlightEmissions object.
             # However, the geometry needs to be rotated to match the respective Runway of each Movement.
-            lambda idx: df.loc[idx]["Sources"].getRunway().getName(),
+            "runway",
         ]
-        for grouped_values, group in df[relevant_movements].groupby(flight_columns):
+        ambient_bin = self.getAmbientConditionBin(ambient_conditions)
+        for grouped_values, group in df.groupby(flight_columns):
+
+            # The same (engine, profile, runway) group recurs in many periods,
+            # so reuse the flight emissions for the same limit and ambient bin
+            cache_key = (*grouped_values, limit_["max_height"], ambient_bin)
+            flight_emissions = self._flightEmissionsCache.lookup(cache_key)
+            if flight_emissions is not None:
+                flight_emissions_by_oid.update(
+                    dict.fromkeys(group["oid"], flight_emissions)
+                )
+                continue
 
             # Determine the flight emissions
             flight_emissions = self.FetchFlightEmissions(
@@ -385,29 +465,21 @@ class MovementSourceModule(SourceModule):
             for index in reversed(to_remove):
                 flight_emissions.pop(index)
 
+            self._flightEmissionsCache[cache_key] = flight_emissions
+
             # Update the flight emissions
-            for ix in group.index:
-                df.at[ix, "FlightEmissions"] = flight_emissions
+            flight_emissions_by_oid.update(
+                dict.fromkeys(group["oid"], flight_emissions)
+            )
 
         """
         Calculate Taxiing Emissions
         """
-        for movement_name, movement in self.getSources().items():
+        for movement_name, movement in zip(df["oid"], df["Sources"]):
 
             # process only movements of the runway under study
             if runway_names and not (movement.getRunway().getName() in runway_names):
                 continue
-            if (
-                source_names
-                and ("all" not in source_names)
-                and (movement.getName() not in source_names)
-            ):
-                continue
-            # Fetch movements that use this runway for this time period
-            if not (
-                start_dt.timestamp() <= movement.getRunwayTime() < end_dt.timestamp()
-            ):
-                continue
 
             # add Taxiing Emissions
             te = movement.calculateTaxiingEmissions(
@@ -428,12 +500,36 @@ class MovementSourceModule(SourceModule):
             for index in reversed(to_remove):
                 te.pop(index)
 
-            # add Gate Emissions
-            ge = df[df["Sources"] == movement]["GateEmissions"].iloc[0]
+            # add Gate and Flight Emissions
+            ge = gate_emissions_by_oid.get(movement_name, [])
+            fe = flight_emissions_by_oid.get(movement_name, [])
+
+            if not (te or ge or fe):
+                logger.warning("No Emissions for %s:" % (movement_name))
+
+            result_.append((movement, te, ge, fe))
 
-            # add Flight Emissions
-            fe = df[df["Sources"] == movement]["FlightEmissions"].iloc[0]
+        return result_
 
+    def process(
+        self,
+        start_dt: datetime,
+        end_dt: datetime,
+        source_names=None,
+        runway_names=None,
+        ambient_conditions=None,
+        vertical_limit_m: float = 914.4,
+        **kwargs,
+    ) -> List[Tuple[datetime, Source, Emission]]:
+        result_ = []
+        for movement, te, ge, fe in self._calculatePeriodEmissions(
+            start_dt,
+            end_dt,
+            source_names or [],
+            runway_names or [],
+            ambient_conditions,
+            vertical_limit_m,
+        ):
             emissions_extended = te + ge + fe
 
             # import geopandas as gpd
@@ -450,7 +546,6 @@ class MovementSourceModule(SourceModule):
 
                 emissions_extended = emissions_
             else:
-                logger.warning("No Emissions for %s:" % (movement_name))
                 # emissions_extended = [Emission(defaultValues=defaultEmissions)]
                 emissions_extended = None
 
@@ -458,5 +553,83 @@ class MovementSourceModule(SourceModule):
 
         return result_
 
+    @staticmethod
+    def _getEmissionsBlock(emissions: list[EmissionsDict]) -> EmissionBatch:
+        """
+        Get the rows (in kilograms) of a list of emissions, as a batch without
+        source.
+        """
+        return EmissionBatch.fromResult(
+            [
+                (
+                    None,
+                    [
+                        em_["emissions"]
+                        for em_ in emissions
+                        if "emissions" in em_ and em_["emissions"] is not None
+                    ],
+                )
+            ]
+        ).transposeToKilograms()
+
+    def processBatch(
+        self,
+        start_dt: datetime,
+        end_dt: datetime,
+        source_names=None,
+        runway_names=None,
+        ambient_conditions=None,
+        vertical_limit_m: float = 914.4,
+        default_emission: Optional[Emission] = None,
+        **kwargs,
+    ) -> EmissionBatch:
+        """
+        Calculate the emissions of the movements of a period as a batch. The
+        gate and flight emissions of a group of movements are stacked once and
+        shared by the movements, instead of converting them for each movement.
+        """
+        period_emissions = self._calculatePeriodEmissions(
+            start_dt,
+            end_dt,
+            source_names or [],
+            runway_names or [],
+            ambient_conditions,
+            vertical_limit_m,
+        )
+
+        # the blocks of the shared emissions of this (and the previous) period,
+        # by id of the emissions list
+        blocks = {}
+
+        def get_block(emissions: list[EmissionsDict]) -> EmissionBatch:
+            entry = blocks.get(id(emissions)) or self._emissionBlocks.get(id(emissions))
+            if entry is None or entry[0] is not emissions:
+                entry = (emissions, self._getEmissionsBlock(emissions))
+            blocks[id(emissions)] = entry
+            return entry[1]
+
+        default_block = EmissionBatch.fromResult([(None, None)], default_emission)
+
+        result_ = []
+        for movement, te, ge, fe in period_emissions:
+            if te or ge or fe:
+                source_blocks = [
+                    self._getEmissionsBlock(te),
+                    get_block(ge),
+                    get_block(fe),
+                ]
+            else:
+                source_blocks = [default_block]
+            result_.append((movement, source_blocks))
+
+        self._emissionBlocks = blocks
+        return EmissionBatch.fromBlocks(result_)
+
     def endJob(self):
+        logger.info(
+            "Flight emissions cache: %i hits, %i misses",
+            self._flightEmissionsCache.hits,
+            self._flightEmissionsCache.misses,
+        )
+        self.releaseMovementWindow()
         SourceModule.endJob(self)
@@ -42,7 +42,7 @@ class ParkingSourceWithTimeProfileModule(SourceWithTimeProfileModule):
         SourceWithTimeProfileModule.__init__(self, values_dict)
 
         if self.getDatabasePath() is not None:
-            self.setStore(ParkingSourcesStore(self.getDatabasePath()))
+            self.setStore(self.createStore(ParkingSourcesStore))
 
     def beginJob(self):
         SourceWithTimeProfileModule.beginJob(self)
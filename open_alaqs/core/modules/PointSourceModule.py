@@ -40,7 +40,7 @@ class PointSourceWithTimeProfileModule(SourceWithTimeProfileModule):
         SourceWithTimeProfileModule.__init__(self, values_dict)
 
         if self.getDatabasePath() is not None:
-            self.setStore(PointSourcesStore(self.getDatabasePath()))
+            self.setStore(self.createStore(PointSourcesStore))
 
     def process(
         self, start_dt: datetime, _end_dt: datetime, source_names=None, **kwargs
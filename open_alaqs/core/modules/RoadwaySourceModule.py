@@ -43,7 +43,7 @@ class RoadwaySourceWithTimeProfileModule(SourceWithTimeProfileModule):
         SourceWithTimeProfileModule.__init__(self, values_dict)
 
         if self.getDatabasePath() is not None:
-            self.setStore(RoadwaySourcesStore(self.getDatabasePath()))
+            self.setStore(self.createStore(RoadwaySourcesStore))
 
     def beginJob(self) -> None:
         SourceWithTimeProfileModule.beginJob(self)
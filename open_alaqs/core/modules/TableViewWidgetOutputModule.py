@@ -10,7 +10,13 @@ from qgis.PyQt.QtWidgets import QTableWidgetItem
 from qgis.PyQt.uic import loadUiType
 
 from open_alaqs.core.alaqslogging import get_logger
-from open_alaqs.core.interfaces.Emissions import Emission, PollutantType, PollutantUnit
+from open_alaqs.core.interfaces.Emissions import (
+    Emission,
+    EmissionBatch,
+    PollutantType,
+    PollutantUnit,
+    sum_emissions,
+)
 from open_alaqs.core.interfaces.OutputModule import GridOutputModule
 from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.interfaces.SQLSerializable import SQLSerializable
@@ -80,7 +86,7 @@ class TableViewWidgetOutputModule(GridOutputModule):
         )
 
     def beginJob(self):
-        self.grid_df = self._grid.get_df_from_2d_grid_cells()
+        self.grid_df = self._begin_grid(self._grid)
 
     def process(
         self,
@@ -96,25 +102,54 @@ class TableViewWidgetOutputModule(GridOutputModule):
                 return None
 
         if self._view_type == ViewType.BY_AGGREGATION:
-            emisisons_sums = []
-            for source, emissions in result:
-                emisisons_sums.append(cast(Emission, sum(emissions)))
-            total_emissions_sum = cast(Emission, sum(emisisons_sums))
+            total_emissions_sum = cast(
+                Emission,
+                sum_emissions(
+                    emission for _, emissions in result for emission in emissions
+                ),
+            )
 
             self.rows.append(
                 self._prepare_source_row(timestamp, total_emissions_sum, None)
             )
         elif self._view_type == ViewType.BY_SOURCE:
             for source, emissions in result:
-                emissions_sum = cast(Emission, sum(emissions))
+                emissions_sum = cast(Emission, sum_emissions(emissions))
 
                 self.rows.append(
                     self._prepare_source_row(timestamp, emissions_sum, source)
                 )
         elif self._view_type == ViewType.BY_GRID_CELL:
-            for source, emissions in result:
-                for emission in emissions:
-                    self.grid_df = self._process_grid(source, emission, self.grid_df)
+            self._process_grid_result(result)
+        else:
+            raise NotImplementedError()
+
+    def processBatch(
+        self,
+        timestamp: datetime,
+        batch: EmissionBatch,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Process the batch of emissions and create the records of the csv
+        """
+        if self._start_dt and self._end_dt:
+            if not (self._start_dt <= timestamp < self._end_dt):
+                return None
+
+        if self._view_type == ViewType.BY_AGGREGATION:
+            self.rows.append(
+                self._prepare_source_row(timestamp, cast(Emission, batch.sum()), None)
+            )
+        elif self._view_type == ViewType.BY_SOURCE:
+            for source, emissions_sum in batch.sumBySource():
+                self.rows.append(
+                    self._prepare_source_row(
+                        timestamp, cast(Emission, emissions_sum), source
+                    )
+                )
+        elif self._view_type == ViewType.BY_GRID_CELL:
+            self._process_grid_batch(batch)
         else:
             raise NotImplementedError()
 
@@ -124,6 +159,7 @@ class TableViewWidgetOutputModule(GridOutputModule):
         self.widget.set_headers(headers)
 
         if self._view_type == ViewType.BY_GRID_CELL:
+            self.grid_df = self._end_grid(self.grid_df)
             for _index, df_row in self.grid_df.iterrows():
                 self.rows.append(self._prepare_grid_row(df_row))
 
@@ -197,7 +233,10 @@ class TableViewWidgetOutputModule(GridOutputModule):
             source_name = "total"
             wkt = None
         else:
-            source_type = source.__class__.__name__
+            if hasattr(source, "getSourceType"):
+                source_type = source.getSourceType()
+            else:
+                source_type = source.__class__.__name__
             source_name = source.getName()
 
             if hasattr(source, "getGeometryText"):
@@ -221,6 +260,15 @@ class TableViewWidgetOutputModule(GridOutputModule):
 
         return row
 
+    def write_csv(self, filename: str) -> None:
+        """
+        Write the output rows to a CSV file
+        """
+        with open(filename, "w") as f:
+            writer = csv.DictWriter(f, list(self.fields.keys()))
+            writer.writeheader()
+            writer.writerows(self.rows)
+
     def _on_export_csv_clicked(self):
         filename, handler_ = QtWidgets.QFileDialog.getSaveFileName(
             None, "Save results as CSV file", ".", "CSV (*.csv)"
@@ -229,10 +277,7 @@ class TableViewWidgetOutputModule(GridOutputModule):
         if not filename:
             return
 
-        with open(filename, "w") as f:
-            writer = csv.DictWriter(f, list(self.fields.keys()))
-            writer.writeheader()
-            writer.writerows(self.rows)
+        self.write_csv(filename)
 
         if os.path.isfile(filename):
             QtWidgets.QMessageBox.information(
@@ -10,7 +10,7 @@ from qgis.PyQt import QtWidgets
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.OutputModule import OutputModule
 from open_alaqs.core.plotting.MatplotlibQtDialog import MatplotlibQtDialog
-from open_alaqs.core.tools import conversion
+from open_alaqs.core.tools import conversion, dmna
 
 logger = get_logger(__name__)
 
@@ -141,28 +141,7 @@ class TimeSeriesDispersionModule(OutputModule):
                 "File '%s' not found. Choose another pollutant ? " % (datapath),
             )
         try:
-            with open(datapath, encoding="utf8", errors="ignore") as f:
-                raw_output_data = [
-                    x.rstrip("\n").lstrip().replace('"', "") for x in f.readlines()
-                ]
-
-            output_data = OrderedDict()
-            cnt = 0
-            for content in raw_output_data:
-                cnt += +1
-                if content.split() and "*" not in content.split()[0]:
-                    output_data[content.split()[0]] = content.split()[1:]
-                elif content.split() and "*" in content.split()[0]:
-                    break
-
-            index_ = raw_output_data.index("*")
-            # concentration_matrix = np.loadtxt(datapath, comments="*", skiprows=index_)
-            concentration_matrix = np.loadtxt(
-                raw_output_data, comments="*", skiprows=index_
-            )
-
-            return output_data, index_, concentration_matrix
-
+            return dmna.read_austal_output(datapath)
         except Exception as exc_:
             logger.error(exc_)
             return OrderedDict(), None, None
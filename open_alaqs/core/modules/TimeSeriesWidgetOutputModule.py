@@ -3,13 +3,20 @@ from datetime import datetime
 from typing import Any, TypedDict, cast
 
 import matplotlib
+import numpy as np
 import pandas as pd
 from matplotlib.dates import DateFormatter
 from qgis.PyQt import QtWidgets
-from shapely.geometry import LineString, MultiLineString, MultiPolygon, Point, Polygon
+from shapely.geometry import Point
 
 from open_alaqs.core.alaqslogging import get_logger
-from open_alaqs.core.interfaces.Emissions import Emission, PollutantType, PollutantUnit
+from open_alaqs.core.interfaces.Emissions import (
+    Emission,
+    EmissionBatch,
+    PollutantType,
+    PollutantUnit,
+    sum_emissions,
+)
 from open_alaqs.core.interfaces.OutputModule import OutputModule
 from open_alaqs.core.interfaces.Source import Source
 from open_alaqs.core.plotting.MatplotlibQtDialog import MatplotlibQtDialog
@@ -114,6 +121,9 @@ class TimeSeriesWidgetOutputModule(OutputModule):
         )
         self._griddata.crs = "epsg:3857"
 
+        self._allocation = self._grid.get_2d_cell_allocation()
+        self._cell_emissions = np.zeros((len(self._griddata), 1))
+
     def process(
         self,
         timestamp: datetime,
@@ -127,7 +137,9 @@ class TimeSeriesWidgetOutputModule(OutputModule):
         if len(self.receptor_points) == 0:
             total_emissions_ = cast(
                 Emission,
-                sum([sum(emissions_) for (_, emissions_) in result if emissions_]),
+                sum_emissions(
+                    emission for (_, emissions_) in result for emission in emissions_
+                ),
             )
 
             if total_emissions_:
@@ -139,6 +151,8 @@ class TimeSeriesWidgetOutputModule(OutputModule):
         else:
             self._data_x.append(timestamp)
 
+            rows = []
+            values = []
             for _source, emissions in result:
                 for em_ in emissions:
 
@@ -146,64 +160,25 @@ class TimeSeriesWidgetOutputModule(OutputModule):
                     if EmissionValue == 0:
                         continue
 
+                    # the weights of each geometry are calculated only once
                     try:
-                        geom = em_.getGeometry()
-                        if not geom.is_valid:
-                            logger.debug("Not valid geometry %s" % str(geom))
-                            geom = geom.buffer(0)  # unary_union(geom)
-
-                        # some convenience variables
-                        isPoint_element_ = bool(
-                            isinstance(em_.getGeometry(), Point)
-                        )  # bool("POINT" in emissions_.getGeometryText())
-                        isLine_element_ = bool(
-                            isinstance(em_.getGeometry(), LineString)
-                        )
-                        isMultiLine_element_ = bool(
-                            isinstance(em_.getGeometry(), MultiLineString)
-                        )
-                        isPolygon_element_ = bool(
-                            isinstance(em_.getGeometry(), Polygon)
-                        )
-                        isMultiPolygon_element_ = bool(
-                            isinstance(em_.getGeometry(), MultiPolygon)
-                        )
-
-                        matched_cells_2D = self._griddata[
-                            self._griddata.intersects(geom) == True  # noqa: E712
-                        ]
-
-                        # Calculate Emissions' horizontal distribution
-                        if isLine_element_:
-                            # ToDo: Add if
-                            matched_cells_2D.loc[matched_cells_2D.index, "Emission"] = (
-                                EmissionValue
-                                * matched_cells_2D.intersection(geom).length
-                                / geom.length
-                            )
-                        elif isPoint_element_:
-                            matched_cells_2D.loc[matched_cells_2D.index, "Emission"] = (
-                                EmissionValue / len(matched_cells_2D)
-                            )
-                        elif isPolygon_element_ or isMultiPolygon_element_:
-                            matched_cells_2D.loc[matched_cells_2D.index, "Emission"] = (
-                                EmissionValue
-                                * matched_cells_2D.intersection(geom).area
-                                / geom.area
-                            )
-                        elif isMultiLine_element_:
-                            matched_cells_2D.loc[matched_cells_2D.index, "Emission"] = (
-                                EmissionValue
-                                * matched_cells_2D.intersection(geom).length
-                                / geom.length
-                            )
-
-                        self._griddata.loc[
-                            matched_cells_2D.index, "Emission"
-                        ] += matched_cells_2D["Emission"]
+                        rows.append(self._allocation.getRow(em_.getGeometryText()))
                     except Exception as exc_:
-                        print(exc_)
+                        logger.warning(
+                            "Skipping emission with geometry '%s': %s",
+                            em_.getGeometryText(),
+                            exc_,
+                        )
                         continue
+                    values.append(EmissionValue)
+
+            # Calculate Emissions' horizontal distribution
+            self._allocation.allocate(
+                np.array(rows, dtype=np.int64),
+                np.array(values, dtype=float),
+                out=self._cell_emissions,
+            )
+            self._griddata["Emission"] = self._cell_emissions[:, 0]
 
             # FIXME OPENGIS.ch: most probably we should make it support more than 1 `receptor_point` in the future
             receptor_point_row = self.receptor_points[0]
@@ -221,6 +196,28 @@ class TimeSeriesWidgetOutputModule(OutputModule):
             else:
                 self._data_y.append(receptor_cell["Emission"].sum())
 
+    def processBatch(
+        self,
+        timestamp: datetime,
+        batch: EmissionBatch,
+        **kwargs: Any,
+    ) -> None:
+        # the receptor points use the emissions of the list
+        if len(self.receptor_points) != 0:
+            return self.process(timestamp, batch.toResult(), **kwargs)
+
+        if self._time_start and self._time_end:
+            if not (timestamp >= self._time_start and timestamp < self._time_end):
+                return None
+
+        total_emissions_ = cast(Emission, batch.sum())
+
+        if total_emissions_:
+            self._data_x.append(timestamp)
+            self._data_y.append(
+                total_emissions_.get_value(self.pollutant_type, PollutantUnit.KG)
+            )
+
     def endJob(self):
         # show widget
 
@@ -1,27 +1,126 @@
-from typing import Any, cast
+from typing import Any, Optional, cast
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
-from shapely.geometry import Polygon
+import shapely
 
 from open_alaqs.core.alaqslogging import get_logger
 from open_alaqs.core.interfaces.Emissions import PollutantType
 from open_alaqs.core.tools import conversion, sql_interface
+from open_alaqs.core.tools.allocation import CellAllocation, area_share_weights_func
 from open_alaqs.core.tools.SizeLimitedDict import SizeLimitedDict
 
 logger = get_logger(__name__)
 
+# Factors to pack the (x, y, z) indices of a cell into an integer id, which has
+# the same digits as the "%05.0f%05.0f%05.0f" cell hash
+CELL_ID_X_FACTOR = 10**10
+CELL_ID_Y_FACTOR = 10**5
 
-def _polygonise_2Dcells(df_row):
-    # print("######################", list(map(lambda o: type(o), args)))
-    return Polygon(
+
+def _polygonise_cells(
+    x_min: np.ndarray, y_min: np.ndarray, x_max: np.ndarray, y_max: np.ndarray
+) -> np.ndarray:
+    """
+    Create the rectangular polygons of many cells at once.
+    """
+    coords = np.stack(
         [
-            (df_row.xmin, df_row.ymin),
-            (df_row.xmax, df_row.ymin),
-            (df_row.xmax, df_row.ymax),
-            (df_row.xmin, df_row.ymax),
-        ]
+            np.column_stack([x_min, y_min]),
+            np.column_stack([x_max, y_min]),
+            np.column_stack([x_max, y_max]),
+            np.column_stack([x_min, y_max]),
+            np.column_stack([x_min, y_min]),
+        ],
+        axis=1,
+    )
+    return shapely.polygons(coords)
+
+
+def traverse_segments(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    origin: np.ndarray,
+    resolution: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the cells of a regular grid crossed by straight segments, and the
+    fraction of each segment inside each of them.
+
+    This is a vectorised Amanatides-Woo traversal: the parameters (0 <= t <= 1)
+    where each segment crosses a cell boundary are collected for all axes at
+    once, sorted, and every piece between two consecutive crossings lies in
+    exactly one cell. Only the crossed cells are visited.
+
+    :param starts: the start points of the segments (segments x axes)
+    :param ends: the end points of the segments (segments x axes)
+    :param origin: the coordinates of the grid origin (axes)
+    :param resolution: the size of the cells (axes)
+    :return: the segment, the cell indices (pieces x axes) and the fraction of
+        the segment of each piece
+    """
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    origin = np.asarray(origin, dtype=float)
+    resolution = np.asarray(resolution, dtype=float)
+
+    segments_count = len(starts)
+    start_idx = np.floor((starts - origin) / resolution).astype(np.int64)
+    end_idx = np.floor((ends - origin) / resolution).astype(np.int64)
+
+    crossing_segments = [np.arange(segments_count), np.arange(segments_count)]
+    crossing_t = [np.zeros(segments_count), np.ones(segments_count)]
+
+    for axis in range(starts.shape[1]):
+        low_idx = np.minimum(start_idx[:, axis], end_idx[:, axis])
+        counts = np.abs(end_idx[:, axis] - start_idx[:, axis])
+
+        # every crossed boundary between the cells of the start and the end
+        segments = np.repeat(np.arange(segments_count), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        boundaries = origin[axis] + (low_idx[segments] + 1 + offsets) * resolution[axis]
+
+        crossing_segments.append(segments)
+        crossing_t.append(
+            (boundaries - starts[segments, axis])
+            / (ends[segments, axis] - starts[segments, axis])
+        )
+
+    segments = np.concatenate(crossing_segments)
+    t = np.clip(np.concatenate(crossing_t), 0.0, 1.0)
+    order = np.lexsort((t, segments))
+    segments = segments[order]
+    t = t[order]
+
+    # the pieces between consecutive crossings of the same segment
+    is_piece = (segments[:-1] == segments[1:]) & (t[1:] > t[:-1])
+    piece_segments = segments[:-1][is_piece]
+    t_start = t[:-1][is_piece]
+    t_end = t[1:][is_piece]
+
+    # zero-length segments have a single piece, in the cell of their start
+    is_point = np.all(starts == ends, axis=1)
+    if is_point.any():
+        is_piece_of_point = is_point[piece_segments]
+        piece_segments = piece_segments[~is_piece_of_point]
+        t_start = t_start[~is_piece_of_point]
+        t_end = t_end[~is_piece_of_point]
+
+        point_segments = np.flatnonzero(is_point)
+        piece_segments = np.concatenate([piece_segments, point_segments])
+        t_start = np.concatenate([t_start, np.zeros(len(point_segments))])
+        t_end = np.concatenate([t_end, np.ones(len(point_segments))])
+
+    t_middle = (t_start + t_end) / 2
+    middle = starts[piece_segments] + t_middle[:, np.newaxis] * (
+        ends[piece_segments] - starts[piece_segments]
     )
+    indices = np.floor((middle - origin) / resolution).astype(np.int64)
+
+    return piece_segments, indices, t_end - t_start
 
 
 class Grid3D:
@@ -95,6 +194,10 @@ class Grid3D:
         # overflow otherwise
         self._hash_coordinates_map = SizeLimitedDict(size=1000)
 
+        # Allocation of emission geometries to the 2D cells, see get_2d_cell_allocation()
+        self._cell_allocation = None
+        self._cell_allocation_key = None
+
     def getResolutionX(self) -> float:
         return self._x_resolution
 
@@ -169,15 +272,57 @@ class Grid3D:
 
         return origin_x, origin_y
 
+    def get_cell_indices(
+        self, z_cells: Optional[int] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the x, y and z indices of all cells, ordered by x, then y, then z.
+
+        :param z_cells: the number of vertical levels to include (default: all)
+        """
+        if z_cells is None:
+            z_cells = self._z_cells
+
+        x_idx, y_idx, z_idx = np.meshgrid(
+            np.arange(self._x_cells, dtype=np.int64),
+            np.arange(self._y_cells, dtype=np.int64),
+            np.arange(z_cells, dtype=np.int64),
+            indexing="ij",
+        )
+        return x_idx.ravel(), y_idx.ravel(), z_idx.ravel()
+
+    def get_cells_df(self, z_cells: Optional[int] = None) -> pd.DataFrame:
+        """
+        Get the cell id, hash and bounds of all cells (see get_cell_indices()).
+        """
+        x_idx, y_idx, z_idx = self.get_cell_indices(z_cells)
+        cell_ids = self.convertXYZIndicesToCellId(x_idx, y_idx, z_idx)
+        cell = self.convertXYZIndicesToGridCellMinMax(x_idx, y_idx, z_idx)
+
+        return pd.DataFrame(
+            {
+                "cell_id": cell_ids,
+                "hash": self.convertCellIdsToCellHashes(cell_ids),
+                "xmin": cell["x_min"],
+                "xmax": cell["x_max"],
+                "ymin": cell["y_min"],
+                "ymax": cell["y_max"],
+                "zmin": cell["z_min"],
+                "zmax": cell["z_max"],
+            }
+        )
+
     def get_df_from_2d_grid_cells(self) -> gpd.GeoDataFrame:
-        grid_cells_df = pd.DataFrame(
-            list(self.get_3d_grid_cells()),
-            columns=["hash", "xmin", "xmax", "ymin", "ymax", "zmin", "zmax"],
+        grid_cells_2d = self.get_cells_df(z_cells=1)
+        gdf = gpd.GeoDataFrame(
+            {"hash": grid_cells_2d["hash"]},
+            geometry=_polygonise_cells(
+                grid_cells_2d["xmin"].to_numpy(),
+                grid_cells_2d["ymin"].to_numpy(),
+                grid_cells_2d["xmax"].to_numpy(),
+                grid_cells_2d["ymax"].to_numpy(),
+            ),
         )
-        grid_cells_2d = grid_cells_df[grid_cells_df.zmin == 0].reset_index(drop=True)
-        polys = grid_cells_2d.apply(_polygonise_2Dcells, axis=1)
-        gdf = gpd.GeoDataFrame(grid_cells_2d, columns=["hash", "geometry"])
-        gdf.loc[:, "geometry"] = polys
 
         pollutant_cols = {}
         for pollutant_type in PollutantType:
@@ -189,17 +334,198 @@ class Grid3D:
         return gdf
 
     def get_df_from_3d_grid_cells(self):
-        grid_cells_df = pd.DataFrame(
-            list(self.get_3d_grid_cells()),
-            columns=["hash", "xmin", "xmax", "ymin", "ymax", "zmin", "zmax"],
-        )
-        polys = grid_cells_df.apply(_polygonise_2Dcells, axis=1)
+        grid_cells_df = self.get_cells_df()
         gdf = gpd.GeoDataFrame(
-            grid_cells_df, columns=["hash", "geometry", "zmin", "zmax"]
+            {
+                "hash": grid_cells_df["hash"],
+                "geometry": _polygonise_cells(
+                    grid_cells_df["xmin"].to_numpy(),
+                    grid_cells_df["ymin"].to_numpy(),
+                    grid_cells_df["xmax"].to_numpy(),
+                    grid_cells_df["ymax"].to_numpy(),
+                ),
+                "zmin": grid_cells_df["zmin"],
+                "zmax": grid_cells_df["zmax"],
+            },
+            geometry="geometry",
         )
-        gdf.loc[:, "geometry"] = polys
         return gdf
 
+    def get_2d_cell_allocation(self) -> CellAllocation:
+        """
+        Get the allocation of emission geometries to the cells of
+        get_df_from_2d_grid_cells(). The allocation is shared by all users of
+        this grid, so the weights of each geometry are calculated only once.
+        """
+        key = (
+            self._x_cells,
+            self._y_cells,
+            self._x_resolution,
+            self._y_resolution,
+            self._grid_origin_x,
+            self._grid_origin_y,
+        )
+        if self._cell_allocation_key != key:
+            grid_df = self.get_df_from_2d_grid_cells()
+            self._cell_allocation = CellAllocation(
+                len(grid_df),
+                area_share_weights_func(grid_df.geometry.to_numpy(), grid_df.sindex),
+            )
+            self._cell_allocation_key = key
+
+        return self._cell_allocation
+
+    def get_line_cell_weights(
+        self, coords: np.ndarray, delta_z: float = 0.0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the ids of the cells crossed by a line and the share of the line in
+        each of them, assuming a constant speed along the line.
+
+        If the line has a vertical extent (`delta_z` > 0), the line is
+        traversed in (x, y) and the share of each column is distributed
+        uniformly between the lowest point of the line and `delta_z` above its
+        highest point.
+
+        :param coords: the coordinates of the vertices of the line (n x 2 or
+            n x 3, missing z values are taken as 0)
+        :param delta_z: the vertical extent of the line
+        """
+        coords = np.nan_to_num(np.asarray(coords, dtype=float).reshape(len(coords), -1))
+        if coords.shape[1] == 2:
+            coords = np.column_stack([coords, np.zeros(len(coords))])
+
+        origin = np.array(
+            [self._grid_origin_x, self._grid_origin_y, self._grid_origin_z]
+        )
+        resolution = np.array(
+            [self._x_resolution, self._y_resolution, self._z_resolution], dtype=float
+        )
+        axes = 2 if delta_z > 0 else 3
+
+        # the share of each segment is its length
+        starts, ends = coords[:-1], coords[1:]
+        if len(starts) == 0:
+            starts, ends = coords, coords
+        segment_lengths = np.linalg.norm(ends - starts, axis=1)
+        if segment_lengths.sum() > 0:
+            segment_shares = segment_lengths / segment_lengths.sum()
+        else:
+            segment_shares = np.full(len(starts), 1 / len(starts))
+
+        segments, indices, fractions = traverse_segments(
+            starts[:, :axes], ends[:, :axes], origin[:axes], resolution[:axes]
+        )
+        weights = segment_shares[segments] * fractions
+
+        if delta_z > 0:
+            indices, weights = self._spread_vertically(
+                indices,
+                weights,
+                coords[:, 2].min(),
+                coords[:, 2].max() + delta_z,
+            )
+
+        return self._to_cell_ids(indices), weights
+
+    def get_polygon_cell_weights(
+        self, geom: shapely.Geometry, z_min: float = 0.0, z_max: float = 0.0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the ids of the cells covered by a (multi)polygon and the share of
+        its area in each of them. The coverage of all cells in the bounding box
+        of the polygon is calculated at once; only the cells on the boundary of
+        the polygon need an intersection.
+
+        The share of each column is distributed uniformly between `z_min` and
+        `z_max`.
+
+        :param geom: the polygon or multipolygon
+        :param z_min: the bottom of the emission
+        :param z_max: the top of the emission
+        """
+        x_min, y_min, x_max, y_max = shapely.bounds(geom)
+        x_idx, y_idx = np.meshgrid(
+            np.arange(
+                np.floor((x_min - self._grid_origin_x) / self._x_resolution),
+                np.floor((x_max - self._grid_origin_x) / self._x_resolution) + 1,
+                dtype=np.int64,
+            ),
+            np.arange(
+                np.floor((y_min - self._grid_origin_y) / self._y_resolution),
+                np.floor((y_max - self._grid_origin_y) / self._y_resolution) + 1,
+                dtype=np.int64,
+            ),
+            indexing="ij",
+        )
+        x_idx, y_idx = x_idx.ravel(), y_idx.ravel()
+
+        cell_x_min = self._grid_origin_x + x_idx * self._x_resolution
+        cell_y_min = self._grid_origin_y + y_idx * self._y_resolution
+        cells = shapely.box(
+            cell_x_min,
+            cell_y_min,
+            cell_x_min + self._x_resolution,
+            cell_y_min + self._y_resolution,
+        )
+
+        shapely.prepare(geom)
+        covered_area = np.full(len(cells), self._x_resolution * self._y_resolution)
+        is_partial = ~shapely.contains(geom, cells)
+        covered_area[is_partial] = shapely.area(
+            shapely.intersection(cells[is_partial], geom)
+        )
+
+        is_covered = covered_area > 0
+        indices, weights = self._spread_vertically(
+            np.column_stack([x_idx[is_covered], y_idx[is_covered]]),
+            covered_area[is_covered] / shapely.area(geom),
+            z_min,
+            z_max,
+        )
+
+        return self._to_cell_ids(indices), weights
+
+    def _spread_vertically(
+        self, indices: np.ndarray, weights: np.ndarray, z_min: float, z_max: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Distribute the weights of (x, y) columns uniformly over the levels
+        between `z_min` and `z_max`, like getRelativeHeightInBoundingBox().
+        """
+        z_min = z_min - self._grid_origin_z
+        z_max = z_max - self._grid_origin_z
+        z_levels = np.arange(
+            np.floor(z_min / self._z_resolution),
+            np.floor(z_max / self._z_resolution) + 1,
+            dtype=np.int64,
+        )
+        if z_max > z_min:
+            z_shares = (
+                np.minimum(z_max, (z_levels + 1) * self._z_resolution)
+                - np.maximum(z_min, z_levels * self._z_resolution)
+            ) / (z_max - z_min)
+        else:
+            z_shares = np.ones(len(z_levels))
+
+        indices = np.column_stack(
+            [
+                np.repeat(indices, len(z_levels), axis=0),
+                np.tile(z_levels, len(indices)),
+            ]
+        )
+        weights = np.outer(weights, z_shares).ravel()
+
+        return indices, weights
+
+    def _to_cell_ids(self, indices: np.ndarray) -> np.ndarray:
+        # cells outside of the grid are moved to its border, like in
+        # convertCoordinatesToXYZIndices()
+        indices = np.maximum(indices, 0)
+        return self.convertXYZIndicesToCellId(
+            indices[:, 0], indices[:, 1], indices[:, 2]
+        )
+
     def get_3d_grid_cells(self) -> list[list[Any]]:
         """
         This function builds a table that contains the locations of every cell that make up the user defined 3D grid. The
@@ -207,23 +533,12 @@ class Grid3D:
         positions defined in meters according to the EPSG 3857 projection.
         """
         # Calculate the planar and ellipsoidal coordinates of every cell
-        cell_coordinates = []
-        for x_idx in range(self._x_cells):
-            for y_idx in range(self._y_cells):
-                for z_idx in range(self._z_cells):
-                    cell = self.convertXYZIndicesToGridCellMinMax(x_idx, y_idx, z_idx)
-                    cell_coordinates.append(
-                        [
-                            self.convertXYZIndicesToCellHash(x_idx, y_idx, z_idx),
-                            cell["x_min"],
-                            cell["x_max"],
-                            cell["y_min"],
-                            cell["y_max"],
-                            cell["z_min"],
-                            cell["z_max"],
-                        ]
-                    )
-        return cell_coordinates
+        return (
+            self.get_cells_df()
+            .loc[:, ["hash", "xmin", "xmax", "ymin", "ymax", "zmin", "zmax"]]
+            .to_numpy(dtype=object)
+            .tolist()
+        )
 
     def serialize(self, db_path: str = "") -> bool:
         """
@@ -363,6 +678,42 @@ class Grid3D:
             "%05.0f" % z_idx,
         )
 
+    @staticmethod
+    def convertXYZIndicesToCellId(x_idx, y_idx, z_idx):
+        """
+        Pack the XYZ position of a cell into an integer id. The id has the same
+        digits as the cell hash, i.e. `int(hash) == id`. Works on scalars and
+        on numpy arrays.
+
+        :param x_idx: the position of the cell on the x-axis (furthest west is 0)
+        :param y_idx: the position of the cell on the y-axis (furthest south is 0)
+        :param z_idx: the vertical interval
+        :return cell_id: the unique id of the cell
+        """
+        return (
+            np.asarray(x_idx, dtype=np.int64) * CELL_ID_X_FACTOR
+            + np.asarray(y_idx, dtype=np.int64) * CELL_ID_Y_FACTOR
+            + np.asarray(z_idx, dtype=np.int64)
+        )
+
+    @staticmethod
+    def convertCellIdToXYZIndices(cell_id):
+        """
+        Unpack the integer id of a cell (scalar or numpy array) into its XYZ
+        position.
+        """
+        cell_id = np.asarray(cell_id, dtype=np.int64)
+        x_idx, rest = np.divmod(cell_id, CELL_ID_X_FACTOR)
+        y_idx, z_idx = np.divmod(rest, CELL_ID_Y_FACTOR)
+        return x_idx, y_idx, z_idx
+
+    @staticmethod
+    def convertCellIdsToCellHashes(cell_ids) -> list[str]:
+        """
+        Get the (15 characters) cell hashes of integer cell ids.
+        """
+        return [f"{cell_id:015d}" for cell_id in np.asarray(cell_ids).tolist()]
+
     @staticmethod
     def convertCellHashToXYZIndices(cell_hash):
         """
@@ -1,3 +1,6 @@
+from open_alaqs.core.tools.inventory_context import InventoryContext
+
+
 class Singleton(type):
     """
     Define a class as Singleton by
@@ -13,3 +16,20 @@ class Singleton(type):
         if cls.instance is None:
             cls.instance = super(Singleton, cls).__call__(*args, **kw)
         return cls.instance
+
+
+class InventorySingleton(Singleton):
+    """
+    Define a class as Singleton per inventory: while an InventoryContext is
+    active, the instance of that context is used, otherwise the instance of the
+    process (as Singleton)
+    """
+
+    def __call__(cls, *args, **kw):
+        context = InventoryContext.getCurrent()
+        if context is None:
+            return super(InventorySingleton, cls).__call__(*args, **kw)
+
+        return context.getInstance(
+            cls, lambda: super(Singleton, cls).__call__(*args, **kw)
+        )
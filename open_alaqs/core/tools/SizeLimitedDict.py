@@ -14,3 +14,29 @@ class SizeLimitedDict(OrderedDict):
         if self._limit is not None:
             while len(self) > self._limit:
                 self.popitem(last=False)
+
+
+class LRUCache(SizeLimitedDict):
+    """
+    Size limited dict that evicts the least recently used items and counts the
+    cache hits and misses of lookup().
+    """
+
+    def __init__(self, *args, **kwargs):
+        SizeLimitedDict.__init__(self, *args, **kwargs)
+        self.hits = 0
+        self.misses = 0
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self.move_to_end(key)
+        SizeLimitedDict.__setitem__(self, key, value)
+
+    def lookup(self, key, default=None):
+        if key in self:
+            self.hits += 1
+            self.move_to_end(key)
+            return OrderedDict.__getitem__(self, key)
+
+        self.misses += 1
+        return default
@@ -0,0 +1,207 @@
+"""
+Sparse allocation of emissions to the cells of a grid.
+
+The weights of every distinct emission geometry over the grid cells are
+calculated once and stored as a row of a sparse (geometry x cell) matrix. The
+emissions of a period are then allocated to the grid with a single sparse
+matrix-vector product, so that the geometric work scales with the number of
+distinct geometries instead of the number of emissions times periods.
+"""
+
+from typing import Any, Callable, Hashable, Optional, Union
+
+import numpy as np
+import shapely
+from shapely.geometry import LineString, MultiLineString, MultiPolygon, Point, Polygon
+from shapely.geometry.base import BaseGeometry
+from shapely.validation import make_valid
+
+from open_alaqs.core.alaqslogging import get_logger
+
+logger = get_logger(__name__)
+
+CellWeights = tuple[np.ndarray, np.ndarray]
+
+
+class CellAllocation:
+    """
+    Sparse (geometry x cell) matrix with the share of the emissions of each
+    geometry in each cell. The rows are added on demand with `getRow()`, using
+    `weights_func` to calculate the (cell positions, weights) of a geometry.
+
+    If `cells_count` is None, the cells can be any non-negative integer (e.g.
+    the cell ids of a `Grid3D`) and the emissions are allocated with
+    `allocateSparse()`.
+    """
+
+    def __init__(
+        self, cells_count: Optional[int], weights_func: Callable[..., CellWeights]
+    ) -> None:
+        self._cells_count = cells_count
+        self._weights_func = weights_func
+
+        self._rows: dict[Hashable, int] = {}
+        self._row_cells: list[np.ndarray] = []
+        self._row_weights: list[np.ndarray] = []
+
+        # compressed sparse rows, rebuilt when new rows were added
+        self._indptr: Optional[np.ndarray] = None
+        self._cells: Optional[np.ndarray] = None
+        self._weights: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def getCellsCount(self) -> Optional[int]:
+        return self._cells_count
+
+    def getRow(self, key: Hashable, *args: Any) -> int:
+        """
+        Get the row of the geometry identified by `key`. The weights of a new
+        geometry are calculated with `weights_func(*args)`, or with
+        `weights_func(key)` if no arguments are given.
+        """
+        row = self._rows.get(key)
+        if row is None:
+            cells, weights = self._weights_func(*(args or (key,)))
+            row = len(self._row_cells)
+            self._rows[key] = row
+            self._row_cells.append(np.asarray(cells, dtype=np.int64))
+            self._row_weights.append(np.asarray(weights, dtype=float))
+            self._indptr = None
+        return row
+
+    def getWeights(self, row: int) -> CellWeights:
+        return self._row_cells[row], self._row_weights[row]
+
+    def _getMatrix(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._indptr is None:
+            self._indptr = np.zeros(len(self._row_cells) + 1, dtype=np.int64)
+            self._indptr[1:] = np.cumsum([len(c) for c in self._row_cells])
+            self._cells = np.concatenate(
+                self._row_cells + [np.empty(0, dtype=np.int64)]
+            )
+            self._weights = np.concatenate(self._row_weights + [np.empty(0)])
+        return self._indptr, self._cells, self._weights
+
+    def _getEntries(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the position in `rows` and the position in the matrix of the
+        non-zero entries of each of the `rows`.
+        """
+        indptr, _cells, _weights = self._getMatrix()
+
+        counts = indptr[rows + 1] - indptr[rows]
+        entry_rows = np.repeat(np.arange(len(rows)), counts)
+        entries = np.repeat(
+            indptr[rows] - np.cumsum(counts) + counts, counts
+        ) + np.arange(counts.sum())
+
+        return entry_rows, entries
+
+    def allocate(
+        self, rows: np.ndarray, values: np.ndarray, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Allocate the values (n x pollutants) of the geometries in `rows` to the
+        cells. The result (cells x pollutants) is added to `out` if given.
+        """
+        if self._cells_count is None:
+            raise ValueError("Use allocateSparse() if the cells count is unknown")
+
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+
+        if out is None:
+            out = np.zeros((self._cells_count, values.shape[1]))
+
+        if len(rows) == 0:
+            return out
+
+        _indptr, cells, weights = self._getMatrix()
+        entry_rows, entries = self._getEntries(rows)
+
+        entry_cells = cells[entries]
+        entry_weights = weights[entries]
+        for column in range(values.shape[1]):
+            out[:, column] += np.bincount(
+                entry_cells,
+                weights=entry_weights * values[entry_rows, column],
+                minlength=self._cells_count,
+            )
+
+        return out
+
+    def allocateSparse(
+        self, rows: np.ndarray, values: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Allocate the values (n x pollutants) of the geometries in `rows` to the
+        cells, without a dense array for all cells. Returns the (sorted) cells
+        that received emissions and their values (cells x pollutants).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.int64), np.zeros((0, values.shape[1]))
+
+        _indptr, cells, weights = self._getMatrix()
+        entry_rows, entries = self._getEntries(rows)
+
+        out_cells, entry_positions = np.unique(cells[entries], return_inverse=True)
+        entry_weights = weights[entries]
+
+        out = np.zeros((len(out_cells), values.shape[1]))
+        for column in range(values.shape[1]):
+            out[:, column] = np.bincount(
+                entry_positions,
+                weights=entry_weights * values[entry_rows, column],
+                minlength=len(out_cells),
+            )
+
+        return out_cells, out
+
+
+def area_share_weights_func(
+    cells: np.ndarray, sindex: Any
+) -> Callable[[Union[BaseGeometry, str]], CellWeights]:
+    """
+    Build a weights function that distributes a geometry (or WKT) over the
+    intersecting cells: points equally, lines by length and polygons by area.
+
+    :param cells: the geometries of the cells
+    :param sindex: the spatial index of the cells (e.g. GeoDataFrame.sindex)
+    """
+
+    def weights_func(geom: Union[BaseGeometry, str]) -> CellWeights:
+        if isinstance(geom, str):
+            geom = shapely.from_wkt(geom)
+
+        # ensure geometry validity, otherwise the intersects operations might fail
+        geom = make_valid(geom)
+        positions = sindex.query(geom, predicate="intersects")
+
+        if len(positions) == 0:
+            return positions, np.empty(0)
+
+        if isinstance(geom, Point):
+            weights = np.full(len(positions), 1 / len(positions))
+        elif isinstance(geom, (LineString, MultiLineString)):
+            intersections = shapely.intersection(cells[positions], geom)
+            weights = shapely.length(intersections) / geom.length
+        elif isinstance(geom, (Polygon, MultiPolygon)):
+            intersections = shapely.intersection(cells[positions], geom)
+            weights = shapely.area(intersections) / geom.area
+        else:
+            raise NotImplementedError(
+                "Usupported geometry type: {}".format(type(geom).__name__)
+            )
+
+        return positions, weights
+
+    return weights_func
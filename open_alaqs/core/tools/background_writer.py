@@ -0,0 +1,86 @@
+"""
+Background writing of output files.
+
+Output modules hand the files of a period to a small thread pool, so that the
+file I/O overlaps the calculation of the next period. The number of pending
+writes is bounded: `submit()` blocks while the pool is behind (back-pressure).
+The first failed write is raised again by `check()`, `flush()` or `close()`.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from open_alaqs.core.alaqslogging import get_logger
+
+logger = get_logger(__name__)
+
+
+class BackgroundWriter:
+    def __init__(self, workers: int = 2, max_pending: int = 16) -> None:
+        """
+        :param workers: the number of writer threads
+        :param max_pending: the number of writes that can be queued or running
+         before submit() blocks
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="BackgroundWriter"
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending: set[Future] = set()
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """
+        Call `func(*args, **kwargs)` in a writer thread. The arguments must not
+        be modified afterwards.
+        """
+        self.check()
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+            if self._error is None and future.exception() is not None:
+                self._error = future.exception()
+                logger.error("Background write failed: %s", self._error)
+        self._slots.release()
+
+    def check(self) -> None:
+        """
+        Raise the error of the first failed write, if any.
+        """
+        if self._error is not None:
+            raise self._error
+
+    def flush(self) -> None:
+        """
+        Wait until all submitted writes are done.
+        """
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                break
+            for future in pending:
+                future.exception()
+        self.check()
+
+    def close(self) -> None:
+        """
+        Flush the pending writes and stop the writer threads.
+        """
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
@@ -1,5 +1,5 @@
-import copy
 from dataclasses import dataclass
+from typing import Optional
 
 import numpy as np
 from numpy import dot, empty_like
@@ -42,124 +42,56 @@ def seg_intersect(a1, a2, b1, b2):
     return (num / denom) * db + b1
 
 
-def calculate_emission_index(  # noqa: C901
-    pollutant,
-    fuel_flow,
-    icao_eedb,
-    ambient_conditions=None,
-    installation_corrections=None,
-):
+# Adjustment factors for installation effects (if not explicitly specified):
+# Mode       Power Setting (%)    Adjustment Factor
+# Takeoff        100                 1.010
+# Climbout       85                  1.012
+# Approach       30                  1.020
+# Idle           7                   1.100
+DEFAULT_INSTALLATION_CORRECTIONS = {
+    "Takeoff": 1.010,  # 100%
+    "Climbout": 1.012,  # 85%
+    "Approach": 1.020,  # 30%
+    "Idle": 1.100,  # 7%
+}
+
+DEFAULT_AMBIENT_CONDITIONS = {
+    "temperature_in_Kelvin": 288.15,  # ISA conditions
+    "pressure_in_Pa": 1013.25 * 100.0,  # ISA conditions
+    "relative_humidity": 0.6,  # normal day at ISA conditions
+    "mach_number": 0.0,  # ground or laboratory
+    # "humidity_ratio_in_kg_water_per_kg_dry_air": 0.00634 #ISA default
+}
+
+# The modes of the reference points, by increasing power setting
+MODES = ("Idle", "Approach", "Climbout", "Takeoff")
+
+
+def get_ambient_factors(ambient_conditions: Optional[dict] = None) -> tuple:
     """
-    Calculates the emission index associated to a particular fuel flow with the
-     BFFM2 method.
-
-    :param pollutant: str either "NOx", "CO", or "HC"
-    :param fuel_flow: float in units kg/s
-    :param icao_eedb: dict with fuel_flow emission index values from ICAO
-     Emissions
-    :param ambient_conditions: dict with parameters to correct for ambient
-     conditions, default is ISA
-    :param installation_corrections: dict (mode: factor) with adjustment factors
-     for installation effects
-    :return float: calculated fuel flow in kg/s
-
-    An issue concerns the modeling of zero values from the certification data,
-     especially concerning EITHC values.
-    Since zero values cannot be converted to Logs, a substitution to a small
-     value is recommended.
-    For the 85% and 100% power points or if all power point EIs are zero, any
-     value < 10-4 should suffice.
-    If the 7% power point is non-zero and the 30% power point is zero, then
-     values < 10-3 may result in excessive extrapolation below the 7% power
-     setting.
-    These solutions are reasonable since the zero values in the ICAO data
-     likely represents small values that were rounded to zero as opposed to
-     actually implying zero emissions.
+    Get the pressure ratio (delta), temperature ratio (theta), Mach number (m)
+     and humidity coefficient (h) of the ambient conditions. The conditions can
+     be floats or arrays.
     """
-
-    # Adjustment factors for installation effects (in not explicitly specified):
-    # Mode       Power Setting (%)    Adjustment Factor
-    # Takeoff        100                 1.010
-    # Climbout       85                  1.013
-    # Approach       30                  1.020
-    # Idle           7                   1.100
-    if installation_corrections is None:
-        installation_corrections = {}
-    if ambient_conditions is None:
-        ambient_conditions = {}
-    icao_eedb = copy.deepcopy(icao_eedb)
-
-    # installation_corrections_ = {
-    #     "Takeoff":1.0,    # 100%
-    #     "Climbout":1.0,   # 85%
-    #     "Approach":1.0,   # 30%
-    #     "Idle":1.0        # 7%
-    # }
-
-    installation_corrections_ = {
-        "Takeoff": 1.010,  # 100%
-        "Climbout": 1.012,  # 85%
-        "Approach": 1.020,  # 30%
-        "Idle": 1.100,  # 7%
-    }
-    installation_corrections_.update(installation_corrections)
-    installation_corrections = installation_corrections_
-
-    ambient_conditions_ = {
-        "temperature_in_Kelvin": 288.15,  # ISA conditions
-        "pressure_in_Pa": 1013.25 * 100.0,  # ISA conditions
-        "relative_humidity": 0.6,  # normal day at ISA conditions
-        "mach_number": 0.0,  # ground or laboratory
-        # "humidity_ratio_in_kg_water_per_kg_dry_air": 0.00634 #ISA default
-    }
-
-    ambient_conditions_.update(ambient_conditions)
-    ambient_conditions = ambient_conditions_
-
-    # some sanity checks
-    fuel_flow = max(0.0, fuel_flow)
-
-    for key_ in list(installation_corrections.keys()):
-        for p_ in icao_eedb:
-            if key_ not in icao_eedb[p_]:
-                logger.error(f"Did not find mandatory key '{key_}' in ICAO EEDB.")
-
-    for p_ in icao_eedb:
-        if not len(list(icao_eedb[p_].keys())) == 4:
-            keys_should = ", ".join(list(installation_corrections.keys()))
-            keys_are = ", ".join(list(icao_eedb[pollutant].keys()))
-
-            logger.error(
-                "Found not exactly four points in values provided for "
-                f"ICAO EEDB. Keys should be '{keys_should}', but are "
-                f"'{keys_are}'."
-            )
-
-    # 1. Multiply FF ref values with the above (default) adjustment factors if
-    # not any other factors are passed into the function
-    for ikey in icao_eedb[pollutant].keys():
-        for ik, _ in list(icao_eedb[pollutant][ikey].items()):
-            icao_eedb[pollutant][ikey][ik * installation_corrections[ikey]] = icao_eedb[
-                pollutant
-            ][ikey].pop(ik)
+    ambient_conditions = {**DEFAULT_AMBIENT_CONDITIONS, **(ambient_conditions or {})}
 
     # t_a = Ambient temperature (K)
-    t_a = ambient_conditions["temperature_in_Kelvin"]
+    t_a = np.asarray(ambient_conditions["temperature_in_Kelvin"], dtype=float)
 
     # t_ac = Ambient temperature (°C)
     t_ac = t_a - 273.15
 
     # p_a = Ambient pressure (kPa)
-    p_a = ambient_conditions["pressure_in_Pa"]
+    p_a = np.asarray(ambient_conditions["pressure_in_Pa"], dtype=float)
 
     # p_psia = Ambient pressure (psia) with 1 kPa = 0.14504 psia
     p_psia = p_a * 0.14504 * 1e-3
 
     # rh = Relative humidity
-    rh = ambient_conditions["relative_humidity"]
+    rh = np.asarray(ambient_conditions["relative_humidity"], dtype=float)
 
     # m = Mach number
-    m = ambient_conditions["mach_number"]
+    m = np.asarray(ambient_conditions["mach_number"], dtype=float)
 
     omega = ambient_conditions.get("humidity_ratio_in_kg_water_per_kg_dry_air", None)
 
@@ -172,9 +104,9 @@ def calculate_emission_index(  # noqa: C901
 
     # delta = Pressure ratio (ambient to sea level)
     delta = p_a / float(101325)
-    if delta < 0.001:
+    if np.any(delta < 0.001):
         logger.debug(
-            f"delta (Pressure ratio) is unnatural: {delta:.3f}. "
+            f"delta (Pressure ratio) is unnatural: {np.min(delta):.3f}. "
             f"Pressure should be in Pa"
         )
 
@@ -185,216 +117,270 @@ def calculate_emission_index(  # noqa: C901
     # h = Humidity coefficient
     h = -19.0 * (omega - 0.00634)
 
-    # P3T3 exponent (default value is 1.0)
-    x = 1.0
-
-    # P3T3 exponent (default value is 0.5)
-    y = 0.5
-
-    # FF_ref = Fuel flow at reference conditions (kg/s)
-    # fuel_flow = Fuel flow at non-reference conditions (kg/s)
-    ff_ref = (fuel_flow / delta) * (theta**3.8) * np.exp(0.2 * m**2)
-
-    ############################################################################
-    # 2. Develop Log-Log relationship between EI_ref and adjusted FF_ref values
-    ############################################################################
-
-    # Modeling of zero values from the certification data (especially concerning
-    #  EITHC values): Since zero values cannot be converted to Logs, a
-    #  substitution to a small value is recommended.
-
-    eedb_idle = icao_eedb[pollutant]["Idle"]
-    eedb_approach = icao_eedb[pollutant]["Approach"]
-    eedb_climbout = icao_eedb[pollutant]["Climbout"]
-    eedb_takeoff = icao_eedb[pollutant]["Takeoff"]
-
-    # if ikey == 'Idle':
-    idle_check = 1
-    for ik, _ in list(eedb_idle.items()):
-        if eedb_idle[ik] == 0:
-            idle_check = 0
-            eedb_idle[ik] = constants.epsilon * 10
-
-    # elif ikey == 'Approach':
-    for ik, _ in list(eedb_approach.items()):
-        if eedb_approach[ik] == 0 and idle_check > 0:
-            eedb_approach[ik] = constants.epsilon * 10
-        elif eedb_approach[ik] == 0 and idle_check == 0:
-            eedb_approach[ik] = constants.epsilon
-
-    # For the 85 and 100 power points or if all power point EIs are zero, any
-    #  value <= 10-4 should suffice.
-
-    # elif ikey == 'Climbout':
-    for ik, _ in list(eedb_climbout.items()):
-        if eedb_climbout[ik] == 0:
-            eedb_climbout[ik] = constants.epsilon
-
-    # elif ikey == 'Takeoff':
-    for ik, _ in list(eedb_takeoff.items()):
-        if eedb_takeoff[ik] == 0:
-            eedb_takeoff[ik] = constants.epsilon
-
-    # These solutions are reasonable since the zero values in the ICAO data
-    # likely represents small values that were rounded to zero as opposed to
-    # actually implying zero emissions.
-    x1 = np.log10(list(eedb_idle.keys()))
-    x2 = np.log10(list(eedb_approach.keys()))
-    x3 = np.log10(list(eedb_climbout.keys()))
-    x4 = np.log10(list(eedb_takeoff.keys()))
-
-    eedb_idle_values = list(eedb_idle.values())
-    eedb_approach_values = list(eedb_approach.values())
-    eedb_climbout_values = list(eedb_climbout.values())
-    eedb_takeoff_values = list(eedb_takeoff.values())
-
-    y1 = 0.0 if eedb_idle_values == [0.0] else np.log10(eedb_idle_values)
-    y2 = 0.0 if eedb_approach_values == [0.0] else np.log10(eedb_approach_values)
-    y3 = 0.0 if eedb_climbout_values == [0.0] else np.log10(eedb_climbout_values)
-    y4 = 0.0 if eedb_takeoff_values == [0.0] else np.log10(eedb_takeoff_values)
-
-    if y1 == y2 == y3 == y4 == 0.0:
-        logger.error(
-            "All input values are zero. Reference points from database"
-            " for pollutant '%s':" % pollutant
-        )
-        logger.error(icao_eedb[pollutant])
-        return 0.0
-
-    x_ff_log = np.log10(ff_ref if ff_ref else constants.epsilon)
-
-    # First (7-30%) line equation (y=ax+b)
-    coef_a1 = (y2 - y1) / (x2 - x1)
-    coef_b1 = y2 - coef_a1 * x2
+    return delta, theta, m, h
 
-    # STANDARD DATA BEHAVIOR
 
-    y_ff_log = None
+class BFFM2Model:
+    """
+    The BFFM2 model of an engine: the reference points from the ICAO EEDB,
+     corrected for installation effects, and the Log-Log relationships between
+     them, prepared once to calculate the emission indices of any number of
+     fuel flows.
 
-    # NOx case:
-    # Points in-between each pair of adjacent certification points are
-    # determined through linear interpolations on the Log-Log scales
-    if pollutant.lower() == "nox":
-        if x_ff_log < x1:
-            y_ff_log = coef_a1 * x_ff_log + coef_b1
+    An issue concerns the modeling of zero values from the certification data,
+     especially concerning EITHC values.
+    Since zero values cannot be converted to Logs, a substitution to a small
+     value is recommended.
+    For the 85% and 100% power points or if all power point EIs are zero, any
+     value < 10-4 should suffice.
+    If the 7% power point is non-zero and the 30% power point is zero, then
+     values < 10-3 may result in excessive extrapolation below the 7% power
+     setting.
+    These solutions are reasonable since the zero values in the ICAO data
+     likely represents small values that were rounded to zero as opposed to
+     actually implying zero emissions.
+    """
 
-        elif x1 <= x_ff_log <= x2:
-            y_ff_log = np.interp(
-                x_ff_log, np.concatenate([x1, x2]), np.concatenate([y1, y2])
-            )
+    def __init__(self, icao_eedb: dict, installation_corrections: dict = None):
+        """
+        :param icao_eedb: dict (pollutant: mode: {fuel flow: emission index})
+         with fuel_flow emission index values from ICAO Emissions
+        :param installation_corrections: dict (mode: factor) with adjustment
+         factors for installation effects
+        """
+        installation_corrections = {
+            **DEFAULT_INSTALLATION_CORRECTIONS,
+            **(installation_corrections or {}),
+        }
+
+        # some sanity checks
+        for key_ in installation_corrections:
+            for p_ in icao_eedb:
+                if key_ not in icao_eedb[p_]:
+                    logger.error(f"Did not find mandatory key '{key_}' in ICAO EEDB.")
 
-        elif x2 < x_ff_log <= x3:
-            y_ff_log = np.interp(
-                x_ff_log, np.concatenate([x2, x3]), np.concatenate([y2, y3])
-            )
+        for p_ in icao_eedb:
+            if not len(icao_eedb[p_]) == 4:
+                keys_should = ", ".join(installation_corrections)
+                keys_are = ", ".join(icao_eedb[p_])
+
+                logger.error(
+                    "Found not exactly four points in values provided for "
+                    f"ICAO EEDB. Keys should be '{keys_should}', but are "
+                    f"'{keys_are}'."
+                )
 
-        elif x3 < x_ff_log <= x4:
-            y_ff_log = np.interp(
-                x_ff_log, np.concatenate([x3, x4]), np.concatenate([y3, y4])
-            )
+        self._points = {
+            pollutant: self._fit(pollutant, eedb, installation_corrections)
+            for pollutant, eedb in icao_eedb.items()
+        }
 
-        elif x_ff_log > x4:
-            # First (>100%) line equation (y=ax+b)
-            coef_a100 = (y4 - y3) / (x4 - x3)
-            coef_b100 = y4 - coef_a100 * x4
-            y_ff_log = coef_a100 * x_ff_log + coef_b100
-
-    elif pollutant.lower() == "co" or pollutant.lower() == "hc":
-        # linear avg of y3,y4
-        lin_av = np.log10(
-            1
-            / 2.0
-            * (np.asarray(eedb_climbout_values) + np.asarray(eedb_takeoff_values))
+    @staticmethod
+    def _fit(pollutant: str, eedb: dict, installation_corrections: dict) -> dict:
+        # 1. Multiply FF ref values with the installation adjustment factors
+        ff = np.array(
+            [next(iter(eedb[mode])) * installation_corrections[mode] for mode in MODES]
         )
-
-        # Calculate the intersection between the two lines
-        a = np.concatenate([x1, y1])
-        b = np.concatenate([x2, y2])
-        c = np.concatenate([x3, lin_av])
-        d = np.concatenate([x4, lin_av])
-
-        ip = seg_intersect(a, b, c, d)
-
-        # Define Standard or non-standard behaviour
-        data_behavior = 1  # Standard
-        if ip[0] > min([x3, x4]) or ip[0] < max([x1, x2]):
-            data_behavior = 2  # Non-Standard
-
-        if x_ff_log < x1:
-            coef_a = (y2 - y1) / (x2 - x1)
-            coef_b = y2 - coef_a * x2
-            y_ff_log = coef_a * x_ff_log + coef_b
-
-        elif x1 <= x_ff_log <= x2:
-            y_ff_log = np.interp(
-                x_ff_log, np.concatenate([x1, x2]), np.concatenate([y1, y2])
+        ei = np.array([next(iter(eedb[mode].values())) for mode in MODES], dtype=float)
+
+        # 2. Develop Log-Log relationship between EI_ref and adjusted FF_ref
+        # values, zero values are substituted (see above)
+        if ei[0] == 0:
+            ei[0] = constants.epsilon * 10
+            ei[1] = constants.epsilon if ei[1] == 0 else ei[1]
+        elif ei[1] == 0:
+            ei[1] = constants.epsilon * 10
+        ei[2:] = np.where(ei[2:] == 0, constants.epsilon, ei[2:])
+
+        x = np.log10(ff)
+        y = np.log10(ei)
+        points = {"x": x, "y": y, "all_zero": bool(np.all(y == 0.0))}
+        if points["all_zero"]:
+            logger.error(
+                "All input values are zero. Reference points from database"
+                " for pollutant '%s':" % pollutant
             )
-
-        elif x2 <= x_ff_log <= x3:
-            if data_behavior == 1:
-                if x2 < x_ff_log <= ip[0]:
-                    coef_a = (ip[1] - y2) / (ip[0] - x2)
-                    coef_b = y2 - coef_a * x2
-                    y_ff_log = coef_a * x_ff_log + coef_b
-                elif ip[0] < x_ff_log <= x3:
-                    coef_a = (ip[1] - y3) / (ip[0] - x3)
-                    coef_b = y3 - coef_a * x3
-                    y_ff_log = coef_a * x_ff_log + coef_b
-
-            elif data_behavior == 2:
-                y_ff_log = np.interp(
-                    x_ff_log, np.concatenate([x2, x3]), np.concatenate([y2, lin_av])
+            logger.error(eedb)
+            return points
+
+        # First (7-30%) line equation (y=ax+b)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            points["a1"] = (y[1] - y[0]) / (x[1] - x[0])
+            points["b1"] = y[1] - points["a1"] * x[1]
+
+            if pollutant.lower() == "nox":
+                # First (>100%) line equation (y=ax+b)
+                points["a100"] = (y[3] - y[2]) / (x[3] - x[2])
+                points["b100"] = y[3] - points["a100"] * x[3]
+
+            elif pollutant.lower() in ("co", "hc"):
+                # linear avg of y3,y4
+                lin_av = np.log10(1 / 2.0 * (ei[2] + ei[3]))
+
+                # Calculate the intersection between the two lines
+                ip = seg_intersect(
+                    np.array([x[0], y[0]]),
+                    np.array([x[1], y[1]]),
+                    np.array([x[2], lin_av]),
+                    np.array([x[3], lin_av]),
                 )
 
-        elif x3 < x_ff_log <= x4:
-            y_ff_log = np.interp(
-                x_ff_log, np.concatenate([x3, x4]), np.concatenate([y3, y4])
-            )
+                # Define Standard or non-standard behaviour
+                points["lin_av"] = lin_av
+                points["ip"] = ip
+                points["standard"] = not (
+                    ip[0] > min(x[2], x[3]) or ip[0] < max(x[0], x[1])
+                )
 
-        elif x_ff_log > x4:
-            coef_a = (ip[1] - lin_av) / (ip[0] - x4)
-            coef_b = ip[1] - coef_a * ip[0]
-            y_ff_log = coef_a * x_ff_log + coef_b
-    else:
-        logger.error(f"Pollutant '{pollutant}' unknown.")
+        return points
 
-    if y_ff_log is None or np.isnan(y_ff_log):
-        y_ff_log = np.log10(constants.epsilon)
+    def get_pollutants(self) -> list:
+        return list(self._points)
 
-    ############################################################################
-    #   3. Calculate EI
-    ############################################################################
+    def _get_log_emission_index(self, pollutant: str, x_ff_log: np.ndarray):
+        points = self._points[pollutant]
+        x1, x2, x3, x4 = points["x"]
+        y1, y2, y3, y4 = points["y"]
 
-    if pollutant.lower() == "nox":
-        # ein_x_ref = NOx EI at reference conditions (g/kg)
-        ein_ox_ref = 10**y_ff_log if 10 ** (y_ff_log) > constants.epsilon else 0.0
+        y_ff_log = np.full(x_ff_log.shape, np.nan)
+        remaining = np.ones(x_ff_log.shape, dtype=bool)
 
-        # ei = NOx EI at non-reference conditions (g/kg)
-        ei = ein_ox_ref * np.exp(h) * (delta**1.02 / theta**3.3) ** y
+        def select(condition):
+            selected = remaining & condition
+            remaining[selected] = False
+            return selected
 
-    elif pollutant.lower() == "co":
+        def line(selected, a, b):
+            y_ff_log[selected] = a * x_ff_log[selected] + b
 
-        # ei_co_ref = CO EI at reference conditions (g/kg)
-        ei_co_ref = 10**y_ff_log if 10 ** (y_ff_log) > constants.epsilon else 0.0
+        def interp(selected, xp, fp):
+            y_ff_log[selected] = np.interp(x_ff_log[selected], xp, fp)
 
-        # ei = CO EI at non-reference conditions (g/kg)
-        ei = ei_co_ref * (theta**3.3 / delta**1.02) ** x
+        # Points in-between each pair of adjacent certification points are
+        # determined through linear interpolations on the Log-Log scales
+        line(select(x_ff_log < x1), points["a1"], points["b1"])
+        interp(select((x1 <= x_ff_log) & (x_ff_log <= x2)), [x1, x2], [y1, y2])
 
-    elif pollutant.lower() == "hc":
+        if pollutant.lower() == "nox":
+            interp(select((x2 < x_ff_log) & (x_ff_log <= x3)), [x2, x3], [y2, y3])
+            interp(select((x3 < x_ff_log) & (x_ff_log <= x4)), [x3, x4], [y3, y4])
+            line(select(x_ff_log > x4), points["a100"], points["b100"])
 
-        # ei_hc_ref = THC EI at reference conditions (g/kg)
-        ei_hc_ref = 10**y_ff_log if 10 ** (y_ff_log) > constants.epsilon else 0.0
+        elif pollutant.lower() in ("co", "hc"):
+            ip, lin_av = points["ip"], points["lin_av"]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                middle = select((x2 <= x_ff_log) & (x_ff_log <= x3))
+                if points["standard"]:
+                    coef_a = (ip[1] - y2) / (ip[0] - x2)
+                    line(
+                        middle & (x2 < x_ff_log) & (x_ff_log <= ip[0]),
+                        coef_a,
+                        y2 - coef_a * x2,
+                    )
+                    coef_a = (ip[1] - y3) / (ip[0] - x3)
+                    line(
+                        middle & (ip[0] < x_ff_log) & (x_ff_log <= x3),
+                        coef_a,
+                        y3 - coef_a * x3,
+                    )
+                else:
+                    interp(middle, [x2, x3], [y2, lin_av])
+
+                interp(select((x3 < x_ff_log) & (x_ff_log <= x4)), [x3, x4], [y3, y4])
+
+                coef_a = (ip[1] - lin_av) / (ip[0] - x4)
+                line(select(x_ff_log > x4), coef_a, ip[1] - coef_a * ip[0])
+        else:
+            raise ValueError(f"Pollutant '{pollutant}' unknown.")
+
+        return np.where(np.isnan(y_ff_log), np.log10(constants.epsilon), y_ff_log)
+
+    def calculate_emission_index(
+        self, pollutant: str, fuel_flow, ambient_conditions: dict = None
+    ):
+        """
+        Calculates the emission indices associated to fuel flows.
+
+        :param pollutant: str either "NOx", "CO", or "HC"
+        :param fuel_flow: float or array in units kg/s
+        :param ambient_conditions: dict with parameters (floats or arrays) to
+         correct for ambient conditions, default is ISA
+        :return: the emission indices in g/kg, a float if all inputs are floats
+        """
+        delta, theta, m, h = get_ambient_factors(ambient_conditions)
+
+        # some sanity checks
+        fuel_flow = np.asarray(fuel_flow, dtype=float)
+        fuel_flow = np.where(fuel_flow > 0.0, fuel_flow, 0.0)
+
+        # FF_ref = Fuel flow at reference conditions (kg/s)
+        # fuel_flow = Fuel flow at non-reference conditions (kg/s)
+        ff_ref = (fuel_flow / delta) * (theta**3.8) * np.exp(0.2 * m**2)
+
+        if self._points[pollutant]["all_zero"]:
+            ei = np.zeros(ff_ref.shape)
+            return float(ei) if ei.ndim == 0 else ei
+
+        x_ff_log = np.log10(np.where(ff_ref != 0, ff_ref, constants.epsilon))
+        y_ff_log = self._get_log_emission_index(pollutant, np.atleast_1d(x_ff_log))
+        y_ff_log = y_ff_log.reshape(x_ff_log.shape)
+
+        # 3. Calculate EI (g/kg), at reference conditions
+        ei_ref = np.where(10**y_ff_log > constants.epsilon, 10**y_ff_log, 0.0)
+
+        # P3T3 exponents (default values are 1.0 and 0.5)
+        x = 1.0
+        y = 0.5
+
+        if pollutant.lower() == "nox":
+            # ei = NOx EI at non-reference conditions (g/kg)
+            ei = ei_ref * np.exp(h) * (delta**1.02 / theta**3.3) ** y
+        else:
+            # ei = CO or THC EI at non-reference conditions (g/kg)
+            ei = ei_ref * (theta**3.3 / delta**1.02) ** x
+
+        return float(ei) if np.ndim(ei) == 0 else ei
+
+    def calculate_emission_indices(
+        self, fuel_flow, ambient_conditions: dict = None
+    ) -> dict:
+        """
+        Calculates the emission indices of all pollutants of the model.
+        """
+        return {
+            pollutant: self.calculate_emission_index(
+                pollutant, fuel_flow, ambient_conditions
+            )
+            for pollutant in self._points
+        }
 
-        # ei = THC EI at non-reference conditions (g/kg)
-        ei = float(ei_hc_ref) * (theta**3.3 / delta**1.02) ** x
 
-    else:
-        logger.error(f"Pollutant '{pollutant}' unknown.")
+def calculate_emission_index(
+    pollutant,
+    fuel_flow,
+    icao_eedb,
+    ambient_conditions=None,
+    installation_corrections=None,
+):
+    """
+    Calculates the emission index associated to a particular fuel flow with the
+     BFFM2 method.
 
-    # Emission index in kg/s
-    emission_index = ei[0] if (isinstance(ei, np.ndarray) and ei.size == 1) else ei
+    Prefer a BFFM2Model to calculate several emission indices of an engine.
 
-    return emission_index
+    :param pollutant: str either "NOx", "CO", or "HC"
+    :param fuel_flow: float in units kg/s
+    :param icao_eedb: dict with fuel_flow emission index values from ICAO
+     Emissions
+    :param ambient_conditions: dict with parameters to correct for ambient
+     conditions, default is ISA
+    :param installation_corrections: dict (mode: factor) with adjustment factors
+     for installation effects
+    :return float: calculated emission index in g/kg
+    """
+    return BFFM2Model(
+        {pollutant: icao_eedb[pollutant]}, installation_corrections
+    ).calculate_emission_index(pollutant, fuel_flow, ambient_conditions)
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,39 @@
+"""
+Single-pass statistics of concentration fields.
+
+The (hourly) concentration fields are added one at a time, so that the mean of
+a period is available without holding the fields of the whole period in
+memory.
+"""
+
+import numpy as np
+
+
+class ConcentrationStatistics:
+    """
+    Statistics of a stream of concentration fields of the same shape, e.g. the
+    hourly fields of a period in time order.
+    """
+
+    def __init__(self, shape: tuple[int, ...]) -> None:
+        """
+        :param shape: the shape of the fields
+        """
+        self._shape = tuple(shape)
+        self._count = 0
+        self._sum = np.zeros(self._shape)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, field: np.ndarray) -> None:
+        """
+        Add the next field of the stream.
+        """
+        self._sum += np.asarray(field, dtype=float).reshape(self._shape)
+        self._count += 1
+
+    def getMean(self) -> np.ndarray:
+        if self._count == 0:
+            raise ValueError("No fields have been added")
+        return self._sum / self._count
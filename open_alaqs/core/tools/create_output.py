@@ -101,6 +101,7 @@ def create_alaqs_output(inventory_path, model_parameters, study_setup, met_csv_p
     inventory_update_tbl_inv_period(inventory_path, model_parameters, study_setup)
     inventory_update_tbl_inv_time(inventory_path, model_parameters)
     inventory_insert_movements(inventory_path, model_parameters)
+    inventory_create_runway_time_index(inventory_path)
     inventory_update_mixing_heights(inventory_path)
     inventory_copy_activity_profiles(inventory_path)
     inventory_copy_vector_layers(inventory_path)
@@ -380,6 +381,32 @@ def inventory_insert_movements(inventory_name, model_parameters):
     logger.info(msg)
 
 
+@catch_errors
+def inventory_create_runway_time_index(inventory_path):
+    """
+    Create the index on the runway time of the movements, used to load the
+    movements per window of time, if missing. Inventories created before the
+    index was added to the table get it before their emission calculation.
+    :param inventory_path: path to the alaqs output file
+    """
+    conn = sqlite.connect(inventory_path)
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+            ["user_aircraft_movements_runway_time"],
+        )
+        if cur.fetchone() is None:
+            cur.execute(
+                'CREATE INDEX "user_aircraft_movements_runway_time" '
+                'ON "user_aircraft_movements" ("runway_time")'
+            )
+            conn.commit()
+            logger.info("[+] Created the index on the runway time of the movements")
+    finally:
+        conn.close()
+
+
 @catch_errors
 def inventory_copy_study_setup(inventory_path):
     """
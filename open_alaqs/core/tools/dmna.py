@@ -0,0 +1,321 @@
+"""
+Reading of DMNA files written by AUSTAL.
+
+A DMNA file has a header (one `key value...` pair per line) and a data section,
+either as text after a `*` line or, in binary mode, in a `.dmnb` file next to
+it. Binary data are memory-mapped, text data are parsed in a single pass.
+
+The numbered output files of AUSTAL (e.g. `co-001a.dmna`, `co-002a.dmna`, ...)
+can be consolidated into a single `.npy` cube of shape (time, k, j, i), with
+the headers in a `.json` index next to it (see `consolidate_austal_output`,
+called after an AUSTAL run). Once consolidated, each file of the series is read
+as a zero-copy slice of the memory-mapped cube, as long as the file has not
+changed since.
+"""
+
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from open_alaqs.core.alaqslogging import get_logger
+
+logger = get_logger(__name__)
+
+DMNAHeader = OrderedDict  # key -> list of values, without quotes
+
+# The numbered files of a series, e.g. co-001a.dmna (series 'co', suffix 'a')
+SERIES_PATTERN = re.compile(r"^(?P<series>.+)-(?P<number>\d{3,})(?P<suffix>[a-z])$")
+
+# The data fields of the 'form' entry, e.g. 'Con%(*1.0e-9)10.3e'
+FORM_FIELD_PATTERN = re.compile(r"%(?:\([^)]*\))?[\d.]*(?P<long>l?)(?P<type>[a-zA-Z])")
+
+# The loaded cubes, by path of the cube
+_cubes: dict[Path, "ConcentrationCube"] = {}
+
+
+def _parse_header(lines: list[str]) -> tuple[DMNAHeader, int]:
+    """
+    Get the header entries and the position of the line that ends the header.
+    """
+    header = OrderedDict()
+    for position, line in enumerate(lines):
+        tokens = line.replace('"', "").split()
+        if not tokens:
+            continue
+        if "*" in tokens[0]:
+            return header, position
+        header[tokens[0]] = tokens[1:]
+    return header, len(lines)
+
+
+def get_shape(header: DMNAHeader) -> Optional[tuple[int, ...]]:
+    """
+    Get the shape of the data in the order of the index sequence ('sequ'),
+    e.g. (k, j, i) for 'k+,j-,i+'.
+    """
+    if not header.get("lowb") or not header.get("hghb"):
+        return None
+
+    sizes = dict(
+        zip(
+            "ijk",
+            (
+                int(high) - int(low) + 1
+                for low, high in zip(header["lowb"], header["hghb"])
+            ),
+        )
+    )
+    sequence = "".join(header.get("sequ", [])).split(",")
+    if not sequence[0]:
+        sequence = ["k", "j", "i"][-len(sizes) :]
+
+    shape = tuple(sizes[index.strip()[0]] for index in sequence)
+
+    fields = FORM_FIELD_PATTERN.findall("".join(header.get("form", [])))
+    if len(fields) > 1:
+        shape += (len(fields),)
+    return shape
+
+
+def get_binary_dtype(header: DMNAHeader) -> np.dtype:
+    """
+    Get the type of the values of a binary data file (4 bytes per value, 8 for
+    'lf' and 'le' fields).
+    """
+    fields = FORM_FIELD_PATTERN.findall("".join(header.get("form", [])))
+    types = {
+        ("i" if field_type in "dixX" else "f") + ("8" if long_ else "4")
+        for long_, field_type in fields
+    } or {"f4"}
+    if len(types) > 1:
+        raise ValueError("Mixed data types in a DMNA file are not supported")
+    return np.dtype("<" + types.pop())
+
+
+def _reshape(data: np.ndarray, shape: Optional[tuple[int, ...]]) -> np.ndarray:
+    if shape is not None and data.size == np.prod(shape):
+        return data.reshape(shape)
+    return data
+
+
+def read_dmna(path: Union[str, Path]) -> tuple[DMNAHeader, int, np.ndarray]:
+    """
+    Read a DMNA file.
+
+    :param path: the path of the .dmna file
+    :return: the header entries, the position of the line that ends the header
+     and the data (in the order of the index sequence, memory-mapped in binary
+     mode)
+    """
+    path = Path(path)
+    with path.open(encoding="utf8", errors="ignore") as f:
+        lines = f.read().split("\n")
+
+    header, index_ = _parse_header(lines)
+    shape = get_shape(header)
+
+    if header.get("mode", ["text"])[0] == "binary":
+        dtype = get_binary_dtype(header)
+        data = np.memmap(path.with_suffix(".dmnb"), dtype=dtype, mode="r")
+        return header, index_, _reshape(data, shape)
+
+    values = []
+    for line in lines[index_ + 1 :]:
+        if line.lstrip().startswith("*"):
+            break
+        values.append(line)
+    data = np.array(" ".join(values).split(), dtype=float)
+    return header, index_, _reshape(data, shape)
+
+
+def _get_signature(path: Path) -> list[int]:
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class ConcentrationCube:
+    """
+    The files of a series (e.g. co-001a.dmna, co-002a.dmna, ...) packed into a
+    single memory-mapped array of shape (time, k, j, i).
+    """
+
+    def __init__(self, cube_path: Path) -> None:
+        self._path = cube_path
+        with cube_path.with_suffix(".json").open() as f:
+            index = json.load(f)
+        self._files = {
+            name: (position, entry)
+            for position, (name, entry) in enumerate(index["files"].items())
+        }
+        self._data = np.load(cube_path, mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._files
+
+    def getData(self) -> np.ndarray:
+        return self._data
+
+    def isCurrent(self, path: Path) -> bool:
+        """
+        Check whether the file has not changed since it was consolidated.
+        """
+        if path.name not in self._files:
+            return False
+        return self._files[path.name][1]["signature"] == _get_signature(path)
+
+    def read(self, name: str) -> tuple[DMNAHeader, int, np.ndarray]:
+        """
+        Get the header entries, the position of the line that ends the header
+        and the data of a file of the series.
+        """
+        position, entry = self._files[name]
+        return OrderedDict(entry["header"]), entry["index"], self._data[position]
+
+
+def get_series_files(directory: Path, series: str, suffix: str) -> list[Path]:
+    """
+    Get the numbered files of a series in a directory, in order.
+    """
+    files = {}
+    for path in directory.glob(f"{series}-*{suffix}.dmna"):
+        match = SERIES_PATTERN.match(path.stem)
+        if match and match["series"] == series and match["suffix"] == suffix:
+            files[int(match["number"])] = path
+    return [files[number] for number in sorted(files)]
+
+
+def get_cube_path(directory: Path, series: str, suffix: str) -> Path:
+    return directory / f"{series}-{suffix}.cube.npy"
+
+
+def consolidate(
+    directory: Union[str, Path], series: str, suffix: str = "a"
+) -> ConcentrationCube:
+    """
+    Pack the numbered files of a series into a (time, k, j, i) cube, stored as
+    .npy file with a .json index of the headers in the same directory.
+
+    :param directory: the AUSTAL output directory
+    :param series: the name of the series, e.g. 'co'
+    :param suffix: the type of the files, e.g. 'a' (values) or 's' (deviations)
+    """
+    directory = Path(directory)
+    files = get_series_files(directory, series, suffix)
+    if not files:
+        raise FileNotFoundError(
+            f"No files of series '{series}-NNN{suffix}.dmna' in {directory}"
+        )
+
+    cube_path = get_cube_path(directory, series, suffix)
+    index_path = cube_path.with_suffix(".json")
+    temporary_path = cube_path.with_name(f".{cube_path.name}")
+    temporary_index_path = index_path.with_name(f".{index_path.name}")
+
+    # Release the memory map of a previous cube before replacing it
+    _cubes.pop(cube_path, None)
+
+    index = OrderedDict()
+    cube = None
+    try:
+        for position, path in enumerate(files):
+            header, index_, data = read_dmna(path)
+            if cube is None:
+                cube = np.lib.format.open_memmap(
+                    temporary_path,
+                    mode="w+",
+                    dtype=data.dtype,
+                    shape=(len(files),) + data.shape,
+                )
+            elif data.shape != cube.shape[1:]:
+                raise ValueError(
+                    f"{path.name} has shape {data.shape}, expected {cube.shape[1:]}"
+                )
+            cube[position] = data
+            index[path.name] = {
+                "header": header,
+                "index": index_,
+                "signature": _get_signature(path),
+            }
+        cube.flush()
+        del cube
+
+        with temporary_index_path.open("w") as f:
+            json.dump({"files": index}, f)
+        os.replace(temporary_path, cube_path)
+        os.replace(temporary_index_path, index_path)
+    finally:
+        for path in (temporary_path, temporary_index_path):
+            if path.exists():
+                path.unlink()
+
+    _cubes[cube_path] = ConcentrationCube(cube_path)
+    logger.info("Consolidated %s files into %s", len(files), cube_path)
+
+    return _cubes[cube_path]
+
+
+def consolidate_austal_output(directory: Union[str, Path]) -> list[ConcentrationCube]:
+    """
+    Consolidate every series of numbered files in the AUSTAL output directory.
+    A series that cannot be consolidated is read file by file.
+    """
+    directory = Path(directory)
+    series = set()
+    for path in directory.glob("*.dmna"):
+        match = SERIES_PATTERN.match(path.stem)
+        if match is not None:
+            series.add((match["series"], match["suffix"]))
+
+    cubes = []
+    for series_, suffix in sorted(series):
+        try:
+            cubes.append(consolidate(directory, series_, suffix))
+        except (OSError, ValueError) as exc_:
+            logger.warning(
+                "Cannot consolidate the series %s-NNN%s: %s", series_, suffix, exc_
+            )
+    return cubes
+
+
+def _open_cube(path: Path) -> Optional[ConcentrationCube]:
+    """
+    Get the consolidated cube of the series of a numbered file, None if there
+    is no cube or the file has changed since it was consolidated.
+    """
+    match = SERIES_PATTERN.match(path.stem)
+    if match is None:
+        return None
+
+    cube_path = get_cube_path(path.parent, match["series"], match["suffix"])
+
+    cube = _cubes.get(cube_path)
+    if cube is None and cube_path.exists():
+        try:
+            cube = _cubes[cube_path] = ConcentrationCube(cube_path)
+        except (OSError, ValueError, KeyError) as exc_:
+            logger.warning("Cannot open %s: %s", cube_path, exc_)
+
+    if cube is None or not cube.isCurrent(path):
+        return None
+    return cube
+
+
+def read_austal_output(path: Union[str, Path]) -> tuple[DMNAHeader, int, np.ndarray]:
+    """
+    Read an output file of AUSTAL. The numbered files of a consolidated series
+    are read from the cube of the series, other files and changed files are
+    read directly.
+    """
+    path = Path(path)
+    cube = _open_cube(path)
+    if cube is None:
+        return read_dmna(path)
+    return cube.read(path.name)
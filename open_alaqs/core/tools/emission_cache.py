@@ -0,0 +1,370 @@
+"""
+On-disk cache of the results of an emission calculation.
+
+The per-period `(source, [Emission])` results of `EmissionCalculation` are
+stored column-wise in a `.npz` file, keyed by the hash of the inventory file
+and the calculation configuration. Output modules can replay the results from
+the cache instead of running all source modules again.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+
+from open_alaqs.core.alaqslogging import get_logger
+from open_alaqs.core.interfaces.Emissions import Emission
+from open_alaqs.core.interfaces.Source import Source
+
+logger = get_logger(__name__)
+
+# Increase when the layout of the cache files changes
+CACHE_FORMAT_VERSION = 1
+
+# The calculation settings that change the results of the emission calculation
+CACHE_CONFIG_KEYS = (
+    "start_dt_inclusive",
+    "end_dt_inclusive",
+    "method",
+    "should_apply_nox_corrections",
+    "source_dynamics",
+    "time_interval",
+    "vertical_limit_m",
+    "reference_altitude",
+    "source_modules",
+    "source_names",
+)
+
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "open_alaqs" / "emission_cache"
+
+# The cache files used least recently are removed beyond this total size
+DEFAULT_MAX_CACHE_BYTES = 2 << 30
+
+# Hashes of the inventory files, keyed by (path, size, modification time)
+_file_hashes: dict[tuple[str, int, int], str] = {}
+
+PeriodEmissions = list[tuple[Any, list[Emission]]]
+
+
+def hash_file(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """
+    Get the SHA-256 hash of the file content. The hash is memoized as long as
+    the size and modification time of the file do not change.
+    """
+    stat = os.stat(path)
+    memo_key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+    if memo_key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        _file_hashes[memo_key] = digest.hexdigest()
+
+    return _file_hashes[memo_key]
+
+
+class CachedSource(Source):
+    """
+    Source replayed from the emission cache. Keeps the name, type, geometry
+    and height of the original source.
+    """
+
+    def __init__(
+        self,
+        name: Any,
+        source_type: str,
+        geometry_text: Optional[str] = None,
+        height: float = 0.0,
+    ):
+        Source.__init__(self)
+        self._id = name
+        self._source_type = source_type
+        self._geometry_text = geometry_text
+        self._height = height
+
+    @classmethod
+    def fromSource(cls, source: Any) -> "CachedSource":
+        if isinstance(source, CachedSource):
+            return source
+
+        return cls(
+            None if source.getName() is None else str(source.getName()),
+            source.__class__.__name__,
+            source.getGeometryText() if hasattr(source, "getGeometryText") else None,
+            float(source.getHeight() or 0.0) if hasattr(source, "getHeight") else 0.0,
+        )
+
+    def getSourceType(self) -> str:
+        return self._source_type
+
+
+def _pack_strings(values: list[Optional[str]]) -> dict[str, np.ndarray]:
+    """
+    Pack a list of (optional) strings into unique UTF-8 strings and codes.
+    """
+    uniques: dict[str, int] = {}
+    codes = np.empty(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+        else:
+            codes[i] = uniques.setdefault(value, len(uniques))
+
+    encoded = [value.encode("utf-8") for value in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+
+    return {
+        "codes": codes,
+        "offsets": offsets,
+        "data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+
+
+def _unpack_strings(packed: dict[str, np.ndarray]) -> list[Optional[str]]:
+    data = packed["data"].tobytes()
+    offsets = packed["offsets"]
+    uniques = [
+        data[offsets[i] : offsets[i + 1]].decode("utf-8")
+        for i in range(len(offsets) - 1)
+    ]
+    return [None if code < 0 else uniques[code] for code in packed["codes"]]
+
+
+class EmissionCache:
+    """
+    Columnar on-disk cache of the results of an emission calculation.
+    """
+
+    def __init__(
+        self,
+        inventory_path: Union[str, Path],
+        config: dict[str, Any],
+        cache_dir: Optional[Union[str, Path]] = None,
+        max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+    ) -> None:
+        self._inventory_path = Path(inventory_path)
+        self._config = {key: config.get(key) for key in CACHE_CONFIG_KEYS}
+        self._cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self._max_cache_bytes = max_cache_bytes
+        self._key = None
+
+    def getKey(self) -> str:
+        if self._key is None:
+            digest = hashlib.sha256()
+            digest.update(str(CACHE_FORMAT_VERSION).encode())
+            digest.update(hash_file(self._inventory_path).encode())
+            digest.update(
+                json.dumps(self._config, sort_keys=True, default=str).encode()
+            )
+            self._key = digest.hexdigest()
+        return self._key
+
+    def getPath(self) -> Path:
+        return self._cache_dir / f"{self.getKey()}.npz"
+
+    def exists(self) -> bool:
+        return self.getPath().is_file()
+
+    def save(self, emissions: dict[datetime, PeriodEmissions]) -> Path:
+        """
+        Write the emissions per period to the cache.
+        """
+        timestamps = []
+        source_ids: dict[int, int] = {}
+        sources = []
+        pair_period, pair_source = [], []
+        em_pair, em_wkt, em_z_min, em_z_max, em_delta_z = [], [], [], [], []
+        em_values: list[dict[str, Any]] = []
+        keys: dict[str, None] = {}
+
+        for period_idx, (timestamp, period_emissions) in enumerate(emissions.items()):
+            timestamps.append(timestamp)
+            for source, emissions_list in period_emissions:
+                source_idx = source_ids.setdefault(id(source), len(sources))
+                if source_idx == len(sources):
+                    sources.append(CachedSource.fromSource(source))
+
+                pair_idx = len(pair_period)
+                pair_period.append(period_idx)
+                pair_source.append(source_idx)
+
+                for emission in emissions_list:
+                    vertical_extent = emission.getVerticalExtent()
+                    em_pair.append(pair_idx)
+                    em_wkt.append(emission.getGeometryText())
+                    em_z_min.append(vertical_extent.get("z_min", 0))
+                    em_z_max.append(vertical_extent.get("z_max", 0))
+                    em_delta_z.append(vertical_extent.get("delta_z", np.nan))
+                    em_values.append(emission.getObjects())
+                    keys.update(dict.fromkeys(emission.getObjects()))
+
+        columns: dict[str, np.ndarray] = {
+            "timestamps": np.array(timestamps, dtype="datetime64[us]"),
+            "pair_period": np.array(pair_period, dtype=np.int64),
+            "pair_source": np.array(pair_source, dtype=np.int64),
+            "source_height": np.array(
+                [source.getHeight() for source in sources], dtype=np.float64
+            ),
+            "em_pair": np.array(em_pair, dtype=np.int64),
+            "em_z_min": np.array(em_z_min, dtype=np.float64),
+            "em_z_max": np.array(em_z_max, dtype=np.float64),
+            "em_delta_z": np.array(em_delta_z, dtype=np.float64),
+        }
+
+        string_columns = {
+            "source_name": [source.getName() for source in sources],
+            "source_type": [source.getSourceType() for source in sources],
+            "source_wkt": [source.getGeometryText() for source in sources],
+            "em_wkt": em_wkt,
+            "value_keys": list(keys),
+        }
+        for name, values in string_columns.items():
+            for part, array in _pack_strings(values).items():
+                columns[f"{name}__{part}"] = array
+
+        # One column per pollutant, with a mask for the keys that are present
+        for key_idx, key in enumerate(keys):
+            values = np.full(len(em_values), np.nan)
+            present = np.zeros(len(em_values), dtype=bool)
+            for i, objects in enumerate(em_values):
+                if key in objects:
+                    present[i] = True
+                    if objects[key] is not None:
+                        values[i] = objects[key]
+            columns[f"value_{key_idx}"] = values
+            columns[f"present_{key_idx}"] = present
+
+        path = self.getPath()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **columns)
+        os.replace(tmp_path, path)
+
+        logger.info(
+            "Saved %i emissions of %i periods to the cache '%s'",
+            len(em_pair),
+            len(timestamps),
+            path,
+        )
+
+        self.prune()
+
+        return path
+
+    def prune(self) -> list[Path]:
+        """
+        Remove the cache files used least recently (by modification time) until
+        the cache directory fits the maximum size. The cache file of this
+        calculation is kept.
+
+        :return: the removed files
+        """
+        entries = []
+        for cache_path in self._cache_dir.glob("*.npz"):
+            try:
+                stat = cache_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, cache_path))
+
+        total_size = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, cache_path in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self._max_cache_bytes:
+                break
+            if cache_path == self.getPath():
+                continue
+            try:
+                cache_path.unlink()
+            except OSError as error:
+                logger.warning("Couldn't remove the cache '%s': %s", cache_path, error)
+                continue
+            total_size -= size
+            removed.append(cache_path)
+
+        if removed:
+            logger.info("Removed %i files from the emission cache", len(removed))
+
+        return removed
+
+    def load(self) -> dict[datetime, PeriodEmissions]:
+        """
+        Read the emissions per period from the cache.
+        """
+        path = self.getPath()
+
+        with np.load(path) as npz:
+            # mark the cache as used recently (see prune())
+            os.utime(path)
+            columns = {name: npz[name] for name in npz.files}
+
+        def strings(name: str) -> list[Optional[str]]:
+            return _unpack_strings(
+                {
+                    part: columns[f"{name}__{part}"]
+                    for part in ("codes", "offsets", "data")
+                }
+            )
+
+        timestamps = columns["timestamps"].astype(datetime).tolist()
+        sources = [
+            CachedSource(name, source_type, wkt, height)
+            for name, source_type, wkt, height in zip(
+                strings("source_name"),
+                strings("source_type"),
+                strings("source_wkt"),
+                columns["source_height"].tolist(),
+            )
+        ]
+
+        keys = strings("value_keys")
+        values = [columns[f"value_{i}"].tolist() for i in range(len(keys))]
+        present = [columns[f"present_{i}"] for i in range(len(keys))]
+
+        emissions_per_pair: list[list[Emission]] = [
+            [] for _ in range(len(columns["pair_period"]))
+        ]
+        em_wkt = strings("em_wkt")
+        em_z_min = columns["em_z_min"].tolist()
+        em_z_max = columns["em_z_max"].tolist()
+        em_delta_z = columns["em_delta_z"]
+
+        for i, pair_idx in enumerate(columns["em_pair"].tolist()):
+            emission = Emission(
+                {
+                    key: (None if np.isnan(values[k][i]) else values[k][i])
+                    for k, key in enumerate(keys)
+                    if present[k][i]
+                }
+            )
+            emission.setGeometryText(em_wkt[i])
+            if not np.isnan(em_delta_z[i]):
+                emission.setVerticalExtent({"z_min": em_z_min[i], "z_max": em_z_max[i]})
+            emissions_per_pair[pair_idx].append(emission)
+
+        emissions: dict[datetime, PeriodEmissions] = {
+            timestamp: [] for timestamp in timestamps
+        }
+        for pair_idx, (period_idx, source_idx) in enumerate(
+            zip(columns["pair_period"].tolist(), columns["pair_source"].tolist())
+        ):
+            emissions[timestamps[period_idx]].append(
+                (sources[source_idx], emissions_per_pair[pair_idx])
+            )
+
+        logger.info(
+            "Loaded %i emissions of %i periods from the cache '%s'",
+            len(em_wkt),
+            len(timestamps),
+            path,
+        )
+
+        return emissions
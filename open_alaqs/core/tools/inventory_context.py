@@ -0,0 +1,93 @@
+"""
+The stores of a single inventory.
+
+The stores and databases of an inventory (movements, aircraft, engines, ...)
+are singletons (see `InventorySingleton`): without an active context there is
+one instance per process, shared by every inventory. An `InventoryContext` owns
+its own instances instead, so that several inventories can be loaded side by
+side and released when they are no longer needed:
+
+    context = InventoryContext(db_path)
+    with context:
+        movement_store = MovementStore(db_path)  # the store of this context
+    context.release()
+"""
+
+from contextlib import AbstractContextManager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, TypeVar
+
+from open_alaqs.core.alaqslogging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_current_context: ContextVar[Optional["InventoryContext"]] = ContextVar(
+    "inventory_context", default=None
+)
+
+
+class InventoryContext:
+    """
+    Owns the store instances of one inventory database, created on first use
+    while the context is active.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self._db_path = db_path
+        self._instances: dict[type, Any] = {}
+        self._tokens = []
+
+    @staticmethod
+    def getCurrent() -> Optional["InventoryContext"]:
+        """
+        Get the active context, or None if no context is active.
+        """
+        return _current_context.get()
+
+    def getDatabasePath(self) -> str:
+        return self._db_path
+
+    def getInstance(self, cls: type, create: Callable[[], T]) -> T:
+        """
+        Get the instance of a class in this context, created with `create()`
+        on first use.
+        """
+        if cls not in self._instances:
+            self._instances[cls] = create()
+        return self._instances[cls]
+
+    def hasInstance(self, cls: type) -> bool:
+        return cls in self._instances
+
+    def getStore(self, cls: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Get the store of a class for the database of this context.
+        """
+        with self:
+            return cls(self._db_path, *args, **kwargs)
+
+    def release(self) -> None:
+        """
+        Release the instances of this context, e.g. the movements of an
+        inventory that is no longer needed.
+        """
+        logger.debug(
+            "Release %i stores of inventory '%s'", len(self._instances), self._db_path
+        )
+        self._instances.clear()
+
+    def __enter__(self) -> "InventoryContext":
+        self._tokens.append(_current_context.set(self))
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _current_context.reset(self._tokens.pop())
+
+
+def activate(context: Optional[InventoryContext]) -> AbstractContextManager:
+    """
+    Activate a context, or no context (i.e. the stores of the process) for None.
+    """
+    return nullcontext() if context is None else context
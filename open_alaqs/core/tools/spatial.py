@@ -1,6 +1,8 @@
 import math
-from typing import Union
+import threading
+from typing import Optional, Union
 
+import numpy as np
 import osgeo.ogr as ogr
 import osgeo.osr as osr
 import shapely.geometry
@@ -42,11 +44,17 @@ def getDistance(
     return geod.Direct(lat1, lon1, azimuth, distance)
 
 
+# cache geodesics
+geodesics = {}
+
+
 def getGeodesic(epsg_id=4326):
-    return Geodesic(
-        getSpatialReference(epsg_id).GetSemiMajor(),
-        1.0 / getSpatialReference(epsg_id).GetInvFlattening(),
-    )
+    if epsg_id not in geodesics:
+        geodesics[epsg_id] = Geodesic(
+            getSpatialReference(epsg_id).GetSemiMajor(),
+            1.0 / getSpatialReference(epsg_id).GetInvFlattening(),
+        )
+    return geodesics[epsg_id]
 
 
 def getInverseDistance(
@@ -72,13 +80,9 @@ def getDistanceOfLineStringXYZ(
 def getDistanceOfLineStringXY(
     geometry_wkt, epsg_id_source: int = 3857, epsg_id_target: int = 4326
 ) -> float:
-    if isinstance(geometry_wkt, ogr.Geometry):
-        geometry_wkt = geometry_wkt.ExportToWkt()
-
-    (geometry_wkt, swap) = reproject_geometry(
+    points_tuple_list, _swap = reproject_points(
         geometry_wkt, epsg_id_source, epsg_id_target
     )
-    points_tuple_list = getAllPoints(geometry_wkt, swap)
     res = 0.0
 
     # calculate length pairwise and sum the result
@@ -374,10 +378,32 @@ def getSpatialReference(epsg_id):
     return spatial_references[epsg_id]
 
 
-# cache coordinate transformations
+# cache coordinate transformations, per thread as they are not thread-safe
 transformations_cache = {}
 
 
+def getCoordinateTransformation(
+    epsg_id_source: int, epsg_id_target: int
+) -> osr.CoordinateTransformation:
+    key = (epsg_id_source, epsg_id_target, threading.get_ident())
+    if key not in transformations_cache:
+        transformations_cache[key] = osr.CoordinateTransformation(
+            getSpatialReference(epsg_id_source), getSpatialReference(epsg_id_target)
+        )
+    return transformations_cache[key]
+
+
+def isSwapRequired(epsg_id_source: int, epsg_id_target: int) -> bool:
+    """
+    Whether the axis order changes between the source and target reference
+    systems, i.e. one of them is geographic (lat, lon) and the other is not.
+    """
+    return (
+        getSpatialReference(epsg_id_source).IsGeographic()
+        != getSpatialReference(epsg_id_target).IsGeographic()
+    )
+
+
 def reproject_Point(
     x: float, y: float, epsg_id_source: int = 3857, epsg_id_target: int = 4326
 ) -> tuple:
@@ -385,35 +411,75 @@ def reproject_Point(
         # define point
         point = ogr.Geometry(ogr.wkbPoint)
         point.AddPoint(x, y)
-        source = osr.SpatialReference()
-        source.ImportFromEPSG(epsg_id_source)
-        target = osr.SpatialReference()
-        target.ImportFromEPSG(epsg_id_target)
-        transform = osr.CoordinateTransformation(source, target)
-        point.Transform(transform)
+        point.Transform(getCoordinateTransformation(epsg_id_source, epsg_id_target))
         return point, point.ExportToWkt()
     except Exception as xc:
         logger.error("reproject_Point: %s", xc)
 
 
 def reproject_geometry(geometry_wkt, epsg_id_source=3857, epsg_id_target=4326):
-    source = osr.SpatialReference()
-    source.ImportFromEPSG(epsg_id_source)
-
-    target = osr.SpatialReference()
-    target.ImportFromEPSG(epsg_id_target)
-
-    transform = osr.CoordinateTransformation(source, target)
+    transform = getCoordinateTransformation(epsg_id_source, epsg_id_target)
 
     geom = ogr.CreateGeometryFromWkt(geometry_wkt)
     geom.Transform(transform)
 
     new_wkt_ = geom.ExportToWkt()
 
-    swap_coordinates = False
-    if (source.IsGeographic() and not target.IsGeographic()) or (
-        not source.IsGeographic() and target.IsGeographic()
-    ):
-        swap_coordinates = True
+    return new_wkt_, isSwapRequired(epsg_id_source, epsg_id_target)
+
+
+def reproject_coordinates(
+    x: np.ndarray,
+    y: np.ndarray,
+    z: Optional[np.ndarray] = None,
+    epsg_id_source: int = 3857,
+    epsg_id_target: int = 4326,
+) -> tuple[np.ndarray, bool]:
+    """
+    Reproject arrays of coordinates in a single call.
+
+    The returned (n, 3) array follows the axis order of the target reference
+    system, like reproject_geometry(), so e.g. (lat, lon, z) for EPSG:4326. The
+    returned flag tells if the axis order is swapped.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    z = np.zeros_like(x) if z is None else np.asarray(z, dtype=float)
+
+    if x.size == 0:
+        return np.empty((0, 3)), isSwapRequired(epsg_id_source, epsg_id_target)
+
+    transform = getCoordinateTransformation(epsg_id_source, epsg_id_target)
+    points = np.column_stack((x.ravel(), y.ravel(), z.ravel()))
+
+    return (
+        np.array(transform.TransformPoints(points.tolist()), dtype=float),
+        isSwapRequired(epsg_id_source, epsg_id_target),
+    )
+
+
+def reproject_points(
+    geometry_wkt: Union[str, ogr.Geometry],
+    epsg_id_source: int = 3857,
+    epsg_id_target: int = 4326,
+) -> tuple[list[tuple[float, float, float]], bool]:
+    """
+    Get the reprojected points of a geometry, like
+    getAllPoints(*reproject_geometry(...)) but with a single transformation of
+    the coordinates instead of a round trip through WKT.
+
+    The points are swapped back to the (x, y, z) axis order if the axis order
+    of the target reference system is swapped (see isSwapRequired()).
+    """
+    geom = CreateGeometryFromWkt(geometry_wkt)
+    points = np.array(
+        [geom.GetPoint(i) for i in range(geom.GetPointCount())], dtype=float
+    ).reshape(-1, 3)
+
+    points, swap = reproject_coordinates(
+        points[:, 0], points[:, 1], points[:, 2], epsg_id_source, epsg_id_target
+    )
+    if swap:
+        points = points[:, [1, 0, 2]]
 
-    return new_wkt_, swap_coordinates
+    return [tuple(point) for point in points.tolist()], swap
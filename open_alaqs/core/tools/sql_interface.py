@@ -1,4 +1,5 @@
 import sqlite3 as sqlite
+from pathlib import Path
 from typing import Any, Optional, Union
 
 from qgis.utils import spatialite_connect
@@ -7,6 +8,25 @@ from open_alaqs.core.alaqslogging import get_logger
 
 logger = get_logger(__name__)
 
+# Open the databases of this process read-only (see set_read_only)
+_read_only = False
+
+
+def set_read_only(read_only: bool) -> None:
+    """
+    Open the databases of this process read-only, e.g. in the worker processes
+    of an emission calculation that only read the inventory.
+    """
+    global _read_only
+    _read_only = read_only
+
+
+def _spatialite_connect(database_path: str) -> sqlite.Connection:
+    if _read_only:
+        uri = Path(database_path).resolve().as_uri()
+        return spatialite_connect(f"{uri}?mode=ro", uri=True)
+    return spatialite_connect(database_path)
+
 
 def connect(database_path: str) -> sqlite.Connection:
     """
@@ -18,7 +38,7 @@ def connect(database_path: str) -> sqlite.Connection:
     :rtype: object
     """
     try:
-        conn = spatialite_connect(database_path)
+        conn = _spatialite_connect(database_path)
         # always return bytestrings
         conn.text_factory = str
         return conn
@@ -131,7 +151,7 @@ class get_db_connection:
         self.conn = None
 
     def __enter__(self) -> sqlite.Connection:
-        self.conn = spatialite_connect(self.sqlite_filename)
+        self.conn = _spatialite_connect(self.sqlite_filename)
 
         return self.conn
 
@@ -1,67 +1,16 @@
+import numpy as np
+
 from open_alaqs.core.alaqslogging import get_logger
 
 logger = get_logger(__name__)
 
 
-def calculate_fuel_flow_from_power_setting(power_setting: float, icao_eedb: dict):
-    """
-    Calculates the fuel flow associated to a particular power setting with the
-     twin-quadratic fit method
-
-    :param power_setting: float in interval [0.,1.]
-    :param icao_eedb: dict with power:fuel flow values from ICAO Emissions
-    :return float: calculated fuel flow in kg/s
-    """
-
-    for key in [0.07, 0.30, 0.85, 1.0]:
-        if key not in icao_eedb:
-            logger.error(
-                "Did not find key %f with type 'float' in engine-thrust "
-                "settings [%%] from ICAO EEDB!",
-                key,
-            )
-            return None
-
-    if 0 <= power_setting < 0.07:
-        # based on the 7 per cent, 30 per cent and 85 per cent thrust
-        x1 = 0.07
-        x2 = 0.30
-        x3 = 0.85
-
-        logger.warning(
-            "EXPERIMENTAL support for thrust settings between 0% and"
-            f" 7%. The requested power setting is {power_setting}"
-        )
-
-    elif 0.07 <= power_setting < 0.60:
-        # based on the 7 per cent, 30 per cent and 85 per cent thrust
-        x1 = 0.07
-        x2 = 0.30
-        x3 = 0.85
+# The ICAO EEDB power settings of the (low and high) quadratic curves
+LOW_POWER_SETTINGS = (0.07, 0.30, 0.85)
+HIGH_POWER_SETTINGS = (0.30, 0.85, 1.0)
 
-        logger.warning(
-            "EXPERIMENTAL support for thrust settings between 7% and"
-            f" 60%. The requested power setting is {power_setting}"
-        )
-
-    elif 0.60 <= power_setting <= 0.85:
-        # based on the 7 per cent, 30 per cent and 85 per cent thrust
-        x1 = 0.07
-        x2 = 0.30
-        x3 = 0.85
-
-    elif 0.85 < power_setting <= 1.00:
-        # based on the 30 per cent, 85 per cent and 100 per cent thrust
-        x1 = 0.30
-        x2 = 0.85
-        x3 = 1.0
-    else:
-        raise ValueError(
-            "The power setting should be between 0.07 and 1.0 "
-            "(inclusive). The requested power setting is "
-            f"{power_setting}"
-        )
 
+def _fit_quadratic(power_settings: tuple, icao_eedb: dict) -> tuple:
     # Y = AX**2 + BX + C
     # with three known points:
     # Y1=AX1**2 +BX1+C, Y2=AX2**2 +BX2+C, Y3=AX3**2 +BX3+C
@@ -69,8 +18,7 @@ def calculate_fuel_flow_from_power_setting(power_setting: float, icao_eedb: dict
     # quadratic defined by values X1, X2, X3, X4;
     # icao_eedb value pairs (Y) = fuel flow /(fuel flow @ maximum rated thrust),
     # values Y1, Y2, Y3, Y4.
-
-    _x = power_setting
+    x1, x2, x3 = power_settings
 
     y1 = icao_eedb[x1] / icao_eedb[1]
     y2 = icao_eedb[x2] / icao_eedb[1]
@@ -81,14 +29,96 @@ def calculate_fuel_flow_from_power_setting(power_setting: float, icao_eedb: dict
     b = (y3 - y1) / (x3 - x1) - a * (x3 + x1)
     c = y3 - a * x3**2 - b * x3
 
-    _y = a * _x**2 + b * _x + c
+    return a, b, c
 
-    # multiply by ICAO EEDB maximum rated thrust fuel
-    max_rated_t = icao_eedb[1.0]
 
-    fuel_flow_in_kg_s = _y * max_rated_t  # in kg/s
+class TwinQuadraticFuelFlow:
+    """
+    The twin-quadratic fuel flow curve of an engine: one quadratic through the
+     7, 30 and 85 per cent points (up to 85 per cent) and one through the 30,
+     85 and 100 per cent points (above 85 per cent).
+
+    The use of the (experimental) curve below 60 per cent is reported once per
+     curve.
+    """
+
+    def __init__(self, icao_eedb: dict):
+        """
+        :param icao_eedb: dict with power:fuel flow values from ICAO Emissions
+        """
+        for key in [0.07, 0.30, 0.85, 1.0]:
+            if key not in icao_eedb:
+                raise ValueError(
+                    f"Did not find key {key:f} with type 'float' in engine-thrust "
+                    "settings [%] from ICAO EEDB!"
+                )
+
+        self._low = _fit_quadratic(LOW_POWER_SETTINGS, icao_eedb)
+        self._high = _fit_quadratic(HIGH_POWER_SETTINGS, icao_eedb)
+
+        # multiply by ICAO EEDB maximum rated thrust fuel
+        self._max_rated_t = icao_eedb[1.0]
+
+        self._reported = set()
+
+    def _report(self, power_settings: np.ndarray) -> None:
+        for low, high in [(0, 0.07), (0.07, 0.60)]:
+            in_range = (low <= power_settings) & (power_settings < high)
+            if (low, high) not in self._reported and in_range.any():
+                self._reported.add((low, high))
+                logger.warning(
+                    f"EXPERIMENTAL support for thrust settings between {low:.0%} "
+                    f"and {high:.0%}. The requested power setting is "
+                    f"{power_settings[in_range][0]}"
+                )
+
+    def fuel_flow(self, power_settings):
+        """
+        Calculates the fuel flows associated to power settings.
+
+        :param power_settings: float or array in interval [0.,1.]
+        :return: calculated fuel flows in kg/s, a float for a float
+        """
+        _x = np.asarray(power_settings, dtype=float)
+
+        invalid = ~((0 <= _x) & (_x <= 1.0))
+        if invalid.any():
+            raise ValueError(
+                "The power setting should be between 0.07 and 1.0 "
+                "(inclusive). The requested power setting is "
+                f"{_x[invalid].flat[0] if _x.ndim else _x}"
+            )
+        self._report(np.atleast_1d(_x))
+
+        # based on the 30, 85 and 100 per cent thrust above 85 per cent, on the
+        # 7, 30 and 85 per cent thrust otherwise
+        a, b, c = (
+            np.where(_x > 0.85, high, low) for high, low in zip(self._high, self._low)
+        )
+        _y = a * _x**2 + b * _x + c
+
+        fuel_flow_in_kg_s = np.maximum(0.0, _y * self._max_rated_t)  # in kg/s
+
+        return float(fuel_flow_in_kg_s) if _x.ndim == 0 else fuel_flow_in_kg_s
+
 
-    return max(0.0, fuel_flow_in_kg_s)
+def calculate_fuel_flow_from_power_setting(power_setting: float, icao_eedb: dict):
+    """
+    Calculates the fuel flow associated to a particular power setting with the
+     twin-quadratic fit method
+
+    Prefer a TwinQuadraticFuelFlow to calculate several fuel flows of an engine.
+
+    :param power_setting: float in interval [0.,1.]
+    :param icao_eedb: dict with power:fuel flow values from ICAO Emissions
+    :return float: calculated fuel flow in kg/s
+    """
+    try:
+        curve = TwinQuadraticFuelFlow(icao_eedb)
+    except ValueError as exc_:
+        logger.error(exc_)
+        return None
+    return curve.fuel_flow(power_setting)
 
 
 # if __name__ == "__main__":
@@ -24,3 +24,5 @@ CREATE TABLE "user_aircraft_movements" (
   "number_of_stop_and_gos" DECIMAL NULL,
   "domestic" TEXT
 );
+
+CREATE INDEX "user_aircraft_movements_runway_time" ON "user_aircraft_movements" ("runway_time");
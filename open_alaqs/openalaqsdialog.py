@@ -59,11 +59,13 @@ from open_alaqs.core.modules.ModuleManager import (
     OutputDispersionModuleRegistry,
     SourceModuleRegistry,
 )
-from open_alaqs.core.tools import conversion, sql_interface
+from open_alaqs.core.tools import conversion, dmna, sql_interface
+from open_alaqs.core.tools.create_output import inventory_create_runway_time_index
 from open_alaqs.core.tools.csv_interface import (
     read_csv_to_dict,
     read_csv_to_geodataframe,
 )
+from open_alaqs.core.tools.emission_cache import EmissionCache
 from open_alaqs.core.utils.osm import download_osm_airport_data
 from open_alaqs.core.utils.qt import populate_combobox
 from open_alaqs.enums import AlaqsLayerType
@@ -2617,6 +2619,10 @@ class OpenAlaqsResultsAnalysis(QtWidgets.QDialog):
             )
             return
 
+        # Upgrade older inventories before the run, so the calculation (and
+        # its workers) only read the inventory
+        inventory_create_runway_time_index(inventory_path)
+
         # Temporarily set the project database to extract the airport data
         project_database = ProjectDatabase()
         project_database_path = getattr(project_database, "path", None)
@@ -2673,6 +2679,7 @@ class OpenAlaqsResultsAnalysis(QtWidgets.QDialog):
         # dispersion modules
         dm_module_configs = self.getDispersionModulesConfiguration()
         pollutant = self.ui.pollutants_names.currentText()
+        dispersion_enabled = False
 
         # dm_name_ should be AUSTALOutputModule
         for dm_module_name, dm_module_config in dm_module_configs.items():
@@ -2691,16 +2698,44 @@ class OpenAlaqsResultsAnalysis(QtWidgets.QDialog):
             self._emission_calculation_.add_dispersion_modules(
                 [dm_module_name], dm_module_config
             )
+            dispersion_enabled = True
 
         # Sources
         source_name = self.ui.source_names.currentText()
         source_names = [source_name if source_name is not None else "all"]
-        self._emission_calculation_.run(
+
+        # Replay the emissions from the cache, unless the dispersion modules
+        # need to write their input files
+        emission_cache = EmissionCache(
+            inventory_path,
+            {
+                **em_config,
+                "source_modules": module_names,
+                "source_names": source_names,
+            },
+        )
+        if not dispersion_enabled and emission_cache.exists():
+            try:
+                self._emission_calculation_.setEmissions(emission_cache.load())
+                return
+            except Exception as error:
+                logger.warning("Couldn't load the emission cache: %s", error)
+
+        completed = self._emission_calculation_.run(
             source_names=source_names,
             vertical_limit_m=em_config["vertical_limit_m"],
         )
         self._emission_calculation_.sortEmissionsByTime()
 
+        # a canceled run has the emissions of part of the periods only
+        if not completed:
+            return
+
+        try:
+            emission_cache.save(self._emission_calculation_.getEmissions())
+        except Exception as error:
+            logger.warning("Couldn't save the emission cache: %s", error)
+
     def get_values(self):
         """
         This function is used to pass data back to the main alaqs.py class when
@@ -3013,6 +3048,9 @@ class OpenAlaqsDispersionAnalysis(QtWidgets.QDialog):
             if p.returncode != 0:
                 raise Austal2000RunError(output)
 
+            # pack the output series into cubes for the output modules
+            dmna.consolidate_austal_output(work_dir)
+
             QtWidgets.QMessageBox.information(
                 self, "Success", "Dispersion simulation completed successfully"
             )
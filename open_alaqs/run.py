@@ -0,0 +1,390 @@
+"""
+Headless runner for the OpenALAQS emission calculation.
+
+Runs the source, dispersion and output modules on an existing inventory
+(`.alaqs`) file without the QGIS user interface, e.g.:
+
+    python -m open_alaqs.run inventory.alaqs \
+        --start "2019-01-01 00:00:00" --end "2020-01-01 00:00:00" \
+        --interval 3600 --modules all --output out/
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from qgis.core import (  # noqa: E402
+    QgsApplication,
+    QgsCoordinateTransformContext,
+    QgsMapLayer,
+    QgsVectorFileWriter,
+)
+
+from open_alaqs.core.alaqslogging import (  # noqa: E402
+    get_logger,
+    log_date_format,
+    log_format,
+)
+
+logger = get_logger(__name__)
+
+
+def parse_datetime(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m open_alaqs.run",
+        description="Calculate the emissions of an OpenALAQS inventory without the QGIS user interface.",
+    )
+    parser.add_argument(
+        "inventory", type=Path, help="Path to the inventory (.alaqs) file."
+    )
+    parser.add_argument(
+        "--start",
+        type=parse_datetime,
+        required=True,
+        help="Start date (incl.), ISO format.",
+    )
+    parser.add_argument(
+        "--end",
+        type=parse_datetime,
+        required=True,
+        help="End date (incl.), ISO format.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=3600,
+        help="Time interval in seconds (default: 3600).",
+    )
+    parser.add_argument(
+        "--modules",
+        default="all",
+        help="Comma separated list of source modules, or 'all' (default: all).",
+    )
+    parser.add_argument(
+        "--sources",
+        default="all",
+        help="Comma separated list of source names, or 'all' (default: all).",
+    )
+    parser.add_argument("--method", default="bymode", choices=["bymode", "BFFM2"])
+    parser.add_argument(
+        "--nox-corrections", action="store_true", help="Apply the NOx corrections."
+    )
+    parser.add_argument(
+        "--source-dynamics",
+        default="none",
+        choices=["none", "default", "smooth & shift"],
+    )
+    parser.add_argument(
+        "--vertical-limit",
+        type=float,
+        default=914.4,
+        help="Vertical limit in m (default: 914.4).",
+    )
+    parser.add_argument(
+        "--pollutant",
+        default="NOx",
+        help="Pollutant for the output modules (default: NOx).",
+    )
+    parser.add_argument("--receptors", type=Path, help="CSV file with receptor points.")
+    parser.add_argument(
+        "--grid-cells",
+        type=int,
+        nargs=3,
+        default=[100, 100, 1],
+        metavar=("X", "Y", "Z"),
+        help="Number of cells of the grid along x, y and z (default: 100 100 1).",
+    )
+    parser.add_argument(
+        "--grid-resolution",
+        type=int,
+        nargs=3,
+        default=[100, 100, 100],
+        metavar=("X", "Y", "Z"),
+        help="Size of the cells of the grid in m along x, y and z (default: 100 100 100).",
+    )
+    parser.add_argument(
+        "--output-modules",
+        default="all",
+        help="Comma separated list of output modules, 'all' or 'none' (default: all).",
+    )
+    parser.add_argument(
+        "--austal",
+        action="store_true",
+        help="Write the AUSTAL input files to the '<output>/austal' directory.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes that calculate the source emissions (default: 1).",
+    )
+    parser.add_argument("--output", type=Path, required=True, help="Output directory.")
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Enable debug logging."
+    )
+
+    return parser.parse_args(argv)
+
+
+def split_names(value: str, available: list[str]) -> list[str]:
+    if value.lower() == "all":
+        return available
+    if value.lower() == "none":
+        return []
+
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = set(names) - set(available)
+    if unknown:
+        raise ValueError(
+            f"Unknown module(s) {', '.join(sorted(unknown))}, available: {', '.join(available)}"
+        )
+
+    return names
+
+
+def default_values(settings_schema: dict[str, Any]) -> dict[str, Any]:
+    """
+    Get the initial values of a module settings schema.
+    """
+    values = {}
+    for setting_name, setting_schema in settings_schema.items():
+        value = setting_schema.get("initial_value", None)
+        if "coerce" in setting_schema:
+            value = setting_schema["coerce"](value)
+        values[setting_name] = value
+    return values
+
+
+def logging_progress_callback(step_percent: int = 5) -> Callable[[int, int], None]:
+    """
+    Build a progress callback that logs the progress every `step_percent`.
+    """
+    last_percent = [-step_percent]
+
+    def callback(count: int, total_count: int) -> None:
+        percent = int(100 * count / max(total_count, 1))
+        if percent - last_percent[0] >= step_percent:
+            last_percent[0] = percent
+            logger.info("Progress: %i%% (%i/%i periods)", percent, count, total_count)
+
+    return callback
+
+
+def save_output(name: str, result: Any, output_dir: Path) -> None:
+    from open_alaqs.core.modules.TableViewWidgetOutputModule import (
+        EmissionsTableViewDialog,
+    )
+    from open_alaqs.core.plotting.MatplotlibQtDialog import MatplotlibQtDialog
+
+    if result is None:
+        logger.warning("Output module '%s' returned no result", name)
+        return
+
+    if isinstance(result, QgsMapLayer):
+        path = output_dir / f"{name}.gpkg"
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = "GPKG"
+        QgsVectorFileWriter.writeAsVectorFormatV3(
+            result, str(path), QgsCoordinateTransformContext(), options
+        )
+    elif isinstance(result, MatplotlibQtDialog):
+        path = output_dir / f"{name}.png"
+        result.getFigure().savefig(path)
+    elif isinstance(result, EmissionsTableViewDialog):
+        # the rows are written by the output module itself
+        return
+    else:
+        logger.warning("Cannot save the result of '%s' (%s)", name, type(result))
+        return
+
+    logger.info("Saved '%s' to '%s'", name, path)
+
+
+def run(args: argparse.Namespace) -> int:
+    from open_alaqs.core.EmissionCalculation import EmissionCalculation
+    from open_alaqs.core.modules.ModuleManager import (
+        DispersionModuleRegistry,
+        OutputAnalysisModuleRegistry,
+        SourceModuleRegistry,
+    )
+    from open_alaqs.core.modules.TableViewWidgetOutputModule import (
+        TableViewWidgetOutputModule,
+    )
+    from open_alaqs.core.tools import sql_interface
+    from open_alaqs.core.tools.create_output import inventory_create_runway_time_index
+    from open_alaqs.core.tools.csv_interface import read_csv_to_geodataframe
+    from open_alaqs.core.tools.inventory_context import InventoryContext
+
+    inventory_path = str(args.inventory)
+    if not args.inventory.is_file():
+        logger.error("Inventory path `%s` is not a file!", inventory_path)
+        return 1
+
+    args.output.mkdir(parents=True, exist_ok=True)
+
+    # Upgrade older inventories before the run, so the calculation (and its
+    # workers) only read the inventory
+    inventory_create_runway_time_index(inventory_path)
+
+    source_module_names = split_names(
+        args.modules, SourceModuleRegistry().get_module_names()
+    )
+    output_module_names = split_names(
+        args.output_modules, OutputAnalysisModuleRegistry().get_module_names()
+    )
+
+    if args.method == "BFFM2" and args.nox_corrections:
+        logger.warning("Not possible to use both 'BFFM2' and 'Apply NOx correction'")
+
+    # Get the airport data
+    study_data = sql_interface.db_execute_sql(
+        inventory_path, "SELECT * FROM user_study_setup", fetchone=True
+    )
+    study_data = dict(study_data) if study_data else {}
+    ref_latitude = study_data.get("airport_latitude", 0.0)
+    ref_longitude = study_data.get("airport_longitude", 0.0)
+    ref_altitude = study_data.get("airport_elevation", 0.0)
+
+    x_cells, y_cells, z_cells = args.grid_cells
+    x_resolution, y_resolution, z_resolution = args.grid_resolution
+    grid_configuration = {
+        "x_cells": x_cells,
+        "y_cells": y_cells,
+        "z_cells": z_cells,
+        "x_resolution": x_resolution,
+        "y_resolution": y_resolution,
+        "z_resolution": z_resolution,
+        "reference_latitude": ref_latitude,
+        "reference_longitude": ref_longitude,
+        "reference_altitude": ref_altitude,
+    }
+
+    receptors = (
+        read_csv_to_geodataframe(str(args.receptors)) if args.receptors else None
+    )
+
+    em_config = {
+        "start_dt_inclusive": args.start,
+        "end_dt_inclusive": args.end,
+        "method": args.method,
+        "should_apply_nox_corrections": args.nox_corrections,
+        "source_dynamics": args.source_dynamics,
+        "time_interval": args.interval,
+        "vertical_limit_m": args.vertical_limit,
+        "reference_altitude": ref_altitude,
+        "receptors": receptors,
+    }
+
+    # the stores of the inventory are released when the run is done
+    context = InventoryContext(inventory_path)
+    try:
+        emission_calculation = EmissionCalculation(
+            db_path=inventory_path,
+            grid_config=grid_configuration,
+            start_dt=args.start,
+            end_dt=args.end,
+            time_interval=timedelta(seconds=args.interval),
+            context=context,
+        )
+
+        for module_name in source_module_names:
+            emission_calculation.add_source_module(module_name, em_config)
+
+        if args.austal:
+            for dm_module_name in DispersionModuleRegistry().get_module_names():
+                DispersionModule = DispersionModuleRegistry().get_module(dm_module_name)
+                dm_module_config = default_values(DispersionModule.settings_schema)
+                dm_module_config.update(
+                    {
+                        "is_enabled": True,
+                        "output_path": str(args.output / "austal"),
+                        "pollutants_list": ["CO2", "CO", "HC", "NOx", "SOx", "PM10"],
+                        "pollutant": args.pollutant,
+                        "receptors": receptors,
+                        "grid": emission_calculation.get3DGrid(),
+                    }
+                )
+                Path(dm_module_config["output_path"]).mkdir(parents=True, exist_ok=True)
+                emission_calculation.add_dispersion_modules(
+                    [dm_module_name], dm_module_config
+                )
+
+        # The output modules are streamed, so only a single period is in memory
+        for output_module_name in output_module_names:
+            OutputModule = OutputAnalysisModuleRegistry().get_module(output_module_name)
+
+            config = default_values(OutputModule.settings_schema)
+            config.update(em_config)
+            config.update(
+                {
+                    "parent": None,
+                    "pollutant": args.pollutant,
+                    "title": "Total emissions of '%s'" % args.pollutant,
+                    "ytitle": "Emissions of '%s' [kg]" % args.pollutant,
+                }
+            )
+
+            emission_calculation.add_output_module(output_module_name, config)
+
+        source_names = [name.strip() for name in args.sources.split(",")]
+        completed = emission_calculation.run(
+            source_names=source_names,
+            vertical_limit_m=args.vertical_limit,
+            progress_callback=logging_progress_callback(),
+            keep_emissions=False,
+            workers=args.workers,
+        )
+        if not completed:
+            logger.error("The emission calculation did not complete")
+            return 1
+
+        output_modules = emission_calculation.getOutputModules()
+        output_results = emission_calculation.getOutputResults()
+        for output_module_name, result in output_results.items():
+            output_module = output_modules[output_module_name]
+
+            if isinstance(output_module, TableViewWidgetOutputModule):
+                path = args.output / f"{output_module_name}.csv"
+                output_module.write_csv(str(path))
+                logger.info("Saved '%s' to '%s'", output_module_name, path)
+
+            save_output(output_module_name, result, args.output)
+    finally:
+        context.release()
+
+    return 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format=log_format,
+        datefmt=log_date_format,
+        stream=sys.stderr,
+    )
+
+    qgs = QgsApplication([], False)
+    qgs.initQgis()
+    try:
+        return run(args)
+    finally:
+        qgs.exitQgis()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Benchmark of MovementSourceModule.process() with synthetic movements.
+
+Reports the throughput of hourly periods. Run it from the root of the
+repository, in the Python environment of QGIS, on two revisions to compare:
+
+    PYTHONPATH=. python scripts/benchmark_movement_source_module.py --movements 20000 --days 7
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from open_alaqs.core.interfaces.Emissions import Emission
+from open_alaqs.core.modules.MovementSourceModule import MovementSourceModule
+from open_alaqs.core.tools.iterator import pairwise
+
+
+class Named:
+    def __init__(self, name: str, group: str = ""):
+        self._name = name
+        self._group = group
+
+    def getName(self) -> str:
+        return self._name
+
+    def getGroup(self) -> str:
+        return self._group
+
+    def getDefaultDepartureProfileName(self) -> str:
+        return f"{self._name}-dep"
+
+    def getDefaultArrivalProfileName(self) -> str:
+        return f"{self._name}-arr"
+
+
+def fake_emissions() -> list[dict]:
+    emission = Emission({"fuel_kg": 1.0, "co_g": 1.0, "nox_g": 1.0})
+    emission.setGeometryText("POINT (0 0)")
+    return [{"emissions": emission}]
+
+
+class FakeMovement:
+    def __init__(self, name: str, runway_time: float, rng: np.random.Generator):
+        self._name = name
+        self._runway_time = runway_time
+        self._departure = bool(rng.integers(2))
+        self._gate = Named(f"G{rng.integers(50)}")
+        self._runway = Named(f"RWY{rng.integers(4)}")
+        aircraft_name = f"AC{rng.integers(40)}"
+        self._aircraft = Named(aircraft_name, f"GROUP{rng.integers(5)}")
+        self._engine = Named(f"ENG{rng.integers(60)}")
+
+    def getName(self) -> str:
+        return self._name
+
+    def getRunwayTime(self) -> float:
+        return self._runway_time
+
+    def getGate(self) -> Named:
+        return self._gate
+
+    def getRunway(self) -> Named:
+        return self._runway
+
+    def getAircraft(self) -> Named:
+        return self._aircraft
+
+    def getAircraftEngine(self) -> Named:
+        return self._engine
+
+    def getDepartureArrivalFlag(self) -> str:
+        return "D" if self._departure else "A"
+
+    def isDeparture(self) -> bool:
+        return self._departure
+
+    def calculateGateEmissions(self, sas="none") -> list[dict]:
+        return fake_emissions()
+
+    def calculateFlightEmissions(self, atRunway, method, mode, limit) -> list[dict]:
+        return fake_emissions()
+
+    def calculateTaxiingEmissions(self, method=None, mode="TX", sas="none"):
+        return fake_emissions()
+
+
+class FakeMovementStore:
+    """
+    The movements in memory, loaded per window of runway times.
+    """
+
+    def __init__(self, movements: dict[str, FakeMovement]):
+        self._movements = movements
+        self._objects = {}
+
+    def loadMovements(
+        self, start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None
+    ) -> None:
+        if start_dt is None and end_dt is None:
+            self._objects = dict(self._movements)
+            return
+
+        self._objects = {
+            name: movement
+            for name, movement in self._movements.items()
+            if start_dt.timestamp() <= movement.getRunwayTime() < end_dt.timestamp()
+        }
+
+    def releaseMovements(self) -> None:
+        self._objects = {}
+
+    def getObjects(self) -> dict[str, FakeMovement]:
+        return self._objects
+
+    def getObject(self, key: str) -> FakeMovement:
+        return self._objects[key]
+
+    def getMovementAttributes(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "name": [mov.getName() for mov in self._objects.values()],
+                "runway_time": [mov.getRunwayTime() for mov in self._objects.values()],
+                "gate": [mov.getGate().getName() for mov in self._objects.values()],
+                "aircraft": [
+                    mov.getAircraft().getName() for mov in self._objects.values()
+                ],
+                "ac_group": [
+                    mov.getAircraft().getGroup() for mov in self._objects.values()
+                ],
+                "engine": [
+                    mov.getAircraftEngine().getName() for mov in self._objects.values()
+                ],
+                "departure_arrival": [
+                    mov.getDepartureArrivalFlag() for mov in self._objects.values()
+                ],
+                "profile_id": [
+                    (
+                        mov.getAircraft().getDefaultDepartureProfileName()
+                        if mov.isDeparture()
+                        else mov.getAircraft().getDefaultArrivalProfileName()
+                    )
+                    for mov in self._objects.values()
+                ],
+                "runway": [mov.getRunway().getName() for mov in self._objects.values()],
+            },
+            index=list(self._objects),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movements", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    start_dt = datetime(2020, 1, 1)
+    end_dt = start_dt + timedelta(days=args.days)
+    runway_times = rng.uniform(
+        start_dt.timestamp(), end_dt.timestamp(), size=args.movements
+    )
+
+    module = MovementSourceModule({"method": "bymode"})
+    module.setStore(
+        FakeMovementStore(
+            {
+                str(i): FakeMovement(str(i), runway_time, rng)
+                for i, runway_time in enumerate(runway_times)
+            }
+        )
+    )
+
+    begin = time.perf_counter()
+    module.beginJob()
+    begin_job_s = time.perf_counter() - begin
+
+    periods = list(
+        pairwise(start_dt + timedelta(hours=h) for h in range(args.days * 24 + 1))
+    )
+    begin = time.perf_counter()
+    for period_start, period_end in periods:
+        module.process(period_start, period_end, source_names=["all"])
+    process_s = time.perf_counter() - begin
+
+    print(f"movements:     {args.movements}")
+    print(f"beginJob:      {begin_job_s:.2f} s")
+    print(f"periods:       {len(periods)} in {process_s:.2f} s")
+    print(f"throughput:    {len(periods) / process_s:.1f} periods/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import numpy as np
+import shapely
+
+from open_alaqs.core.tools.allocation import CellAllocation, area_share_weights_func
+
+
+def test_cell_allocation_calculates_weights_once():
+    weights = {"a": ([0, 2], [0.5, 0.5]), "b": ([2, 5], [0.25, 0.75])}
+    calls = []
+
+    def weights_func(key):
+        calls.append(key)
+        return weights[key]
+
+    allocation = CellAllocation(6, weights_func)
+    rows = [allocation.getRow("a"), allocation.getRow("b"), allocation.getRow("a")]
+
+    values = allocation.allocate(np.array(rows), np.array([[1, 2], [4, 4], [1, 0]]))
+
+    assert calls == ["a", "b"]
+    assert len(allocation) == 2
+    np.testing.assert_allclose(values, [[1, 1], [0, 0], [2, 2], [0, 0], [0, 0], [3, 3]])
+
+
+def test_cell_allocation_sparse():
+    weights = {"a": ([10**10, 2], [0.5, 0.5]), "b": ([2, 10**10], [0.25, 0.75])}
+    allocation = CellAllocation(None, weights.get)
+    rows = [allocation.getRow("a"), allocation.getRow("b")]
+
+    cells, values = allocation.allocateSparse(np.array(rows), np.array([2.0, 4.0]))
+
+    np.testing.assert_array_equal(cells, [2, 10**10])
+    np.testing.assert_allclose(values, [[2.0], [4.0]])
+
+
+def test_area_share_weights_func():
+    cells = shapely.box([0, 1], [0, 0], [1, 2], [1, 1])
+    weights_func = area_share_weights_func(cells, shapely.STRtree(cells))
+
+    positions, weights = weights_func("LINESTRING (0.5 0.5, 1.5 0.5)")
+    np.testing.assert_array_equal(np.sort(positions), [0, 1])
+    np.testing.assert_allclose(weights, [0.5, 0.5])
+
+    positions, weights = weights_func(shapely.box(0.5, 0, 2, 1))
+    np.testing.assert_allclose(weights[np.argsort(positions)], [1 / 3, 2 / 3])
@@ -0,0 +1,205 @@
+import itertools
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from open_alaqs.core.interfaces.AmbientCondition import AmbientCondition  # noqa: E402
+from open_alaqs.core.interfaces.Emissions import Emission  # noqa: E402
+from open_alaqs.core.interfaces.Source import Source  # noqa: E402
+from open_alaqs.core.modules.AUSTALOutputModule import (  # noqa: E402
+    AUSTALDispersionModule,
+)
+from open_alaqs.core.tools import dmna  # noqa: E402
+from open_alaqs.core.tools.Grid3D import Grid3D  # noqa: E402
+
+# The cells of the grid (x, y, z)
+SHAPE = (4, 3, 2)
+
+
+def _set_reference_point(self: AUSTALDispersionModule) -> bool:
+    self._reference_x, self._reference_y, self._reference_z = 0.0, 0.0, 0.0
+    self._x_left_border_calc_grid = self._y_left_border_calc_grid = -100.0
+    self._x_left_border_em_grid = self._y_left_border_em_grid = 0.0
+    return True
+
+
+def make_module(
+    tmp_path, cell_weights: dict, binary: bool = False
+) -> AUSTALDispersionModule:
+    """
+    An AUSTAL module on a 4 x 3 x 2 grid, with the (cell ids, weights) of each
+    geometry given by `cell_weights`.
+    """
+    with mock.patch.object(Grid3D, "_calculate_origin_xy", return_value=(0.0, 0.0)):
+        grid = Grid3D(
+            grid_config={
+                "x_cells": SHAPE[0],
+                "y_cells": SHAPE[1],
+                "z_cells": SHAPE[2],
+                "x_resolution": 10,
+                "y_resolution": 10,
+                "z_resolution": 10,
+            }
+        )
+
+    module = AUSTALDispersionModule(
+        {
+            "output_path": str(tmp_path / "austal"),
+            "grid": grid,
+            "is_enabled": True,
+            "pollutant": "NOx",
+            "binary_grid_files": binary,
+        }
+    )
+    module.getCellWeights = lambda wkt, vertical_extent: cell_weights[wkt]
+    with mock.patch.object(
+        AUSTALDispersionModule, "getGridXYFromReferencePoint", _set_reference_point
+    ):
+        module.beginJob()
+    return module
+
+
+def cells(*indices: tuple[int, int, int]) -> np.ndarray:
+    return Grid3D.convertXYZIndicesToCellId(*np.array(indices).T)
+
+
+def process(module: AUSTALDispersionModule, hour: int, emissions: dict) -> None:
+    """
+    Process a period with the NOx emissions (kg) of each geometry.
+    """
+    result = []
+    for wkt, nox_kg in emissions.items():
+        emission = Emission({"nox_kg": nox_kg})
+        emission.setGeometryText(wkt)
+        result.append((Source(), [emission]))
+
+    start_dt = datetime(2020, 1, 1) + timedelta(hours=hour)
+    module.process(start_dt, start_dt + timedelta(hours=1), result, AmbientCondition())
+
+
+def read_series_time_ids(path) -> list[int]:
+    with path.open() as f:
+        lines = f.read().split("\n")
+    rows = lines[lines.index("*") + 1 :]
+    return [int(float(row.split("\t")[4])) for row in rows if "\t" in row]
+
+
+def test_grid_files_of_same_distribution_are_reused(tmp_path):
+    module = make_module(
+        tmp_path,
+        {
+            "A": (cells((0, 0, 0), (1, 2, 1)), np.array([0.75, 0.25])),
+            "B": (cells((3, 1, 0)), np.array([1.0])),
+        },
+    )
+
+    process(module, 0, {"A": 1.0})
+    process(module, 1, {"A": 3.0})
+    process(module, 2, {"A": 1.0, "B": 1.0})
+    process(module, 3, {"A": 2.0})
+    assert module.endJob()
+
+    output_path = tmp_path / "austal"
+    assert read_series_time_ids(output_path / "series.dmna")[:4] == [1, 1, 2, 1]
+    assert sorted(p.name for p in (output_path / "01").iterdir()) == [
+        "e0001.dmna",
+        "e0002.dmna",
+    ]
+
+    # the reused grid file keeps the times of the first period
+    header, _, _ = dmna.read_dmna(output_path / "01" / "e0001.dmna")
+    assert header["t1"] == ["0.00:00:00"]
+    assert header["t2"] == ["0.01:00:00"]
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_grid_file_round_trip(tmp_path, binary):
+    cell_ids = cells((0, 0, 0), (1, 2, 1), (3, 0, 1), (2, 1, 0))
+    module = make_module(
+        tmp_path, {"A": (cell_ids, np.array([0.4, 0.3, 0.2, 0.1]))}, binary=binary
+    )
+
+    process(module, 0, {"A": 5.0})
+    assert module.endJob()
+
+    path = tmp_path / "austal" / "01" / "e0001.dmna"
+    header, _, values = dmna.read_dmna(path)
+
+    assert header["mode"] == ["binary" if binary else "text"]
+    assert path.with_suffix(".dmnb").exists() == binary
+
+    expected = np.zeros(SHAPE)
+    expected[tuple(Grid3D.convertCellIdToXYZIndices(cell_ids))] = [0.4, 0.3, 0.2, 0.1]
+    assert values.shape == (2, 3, 4)
+    # the cell (1, 2, 1) in the sequence "k+,j-,i+"
+    assert values[1, 0, 1] == pytest.approx(0.3)
+    np.testing.assert_allclose(values, module.toEmissionGridMatrix(expected), rtol=1e-6)
+
+
+def previous_emission_grid_matrix(cell_emissions: np.ndarray, sequ: str) -> np.ndarray:
+    """
+    The emission grid matrix as mapped before the dense accumulation: the (x,
+    y, z) indices of each cell are transformed by a 3x3 matrix and an offset.
+    """
+    sequ_split = sequ.split(",")
+    dims = [cell_emissions.shape["ijk".index(q[0])] for q in sequ_split]
+
+    _a = (
+        np.array(list("ijk")) == np.array([q[0] for q in sequ_split])[:, None]
+    ).astype(int)
+    _b = np.zeros((3, 1))
+    signs = np.array([q[1] for q in sequ_split]) == "-"
+    _b[signs] = (np.array(dims)[signs] - 1)[:, None]
+    _a[signs] *= -1
+
+    matrix = np.zeros(dims)
+    for xyz in np.argwhere(cell_emissions != 0):
+        ii, jj, kk = (_a @ xyz[:, None] + _b).T[0].astype(int).tolist()
+        matrix[ii, jj, kk] += cell_emissions[tuple(xyz)]
+    return matrix
+
+
+@pytest.mark.parametrize(
+    "sequ",
+    [
+        ",".join(axis + sign for axis, sign in zip(axes, signs))
+        for axes in itertools.permutations("ijk")
+        for signs in itertools.product("+-", repeat=3)
+    ],
+)
+def test_emission_grid_matrix_sequ(tmp_path, sequ):
+    module = make_module(tmp_path, {})
+    module._sequ = sequ
+    cell_emissions = np.random.default_rng(0).random(SHAPE)
+
+    np.testing.assert_array_equal(
+        module.toEmissionGridMatrix(cell_emissions),
+        previous_emission_grid_matrix(cell_emissions, sequ),
+    )
+
+
+def test_cells_outside_grid_are_dropped(tmp_path):
+    cell_ids = cells((0, 0, 0), (3, 2, 1), (4, 0, 0), (0, 3, 0), (0, 0, 2))
+    module = make_module(
+        tmp_path, {"A": (cell_ids, np.array([0.5, 0.25, 0.125, 0.0625, 0.0625]))}
+    )
+
+    process(module, 0, {"A": 8.0})
+    assert module.endJob()
+
+    _, _, values = dmna.read_dmna(tmp_path / "austal" / "01" / "e0001.dmna")
+
+    # the emissions in the grid are normalised by the total emissions
+    expected = np.zeros(SHAPE)
+    expected[0, 0, 0] = 0.5
+    expected[3, 2, 1] = 0.25
+    np.testing.assert_allclose(
+        values, previous_emission_grid_matrix(expected, module.getSequ())
+    )
+    assert module.getSortedResults()["2020-01-01.01:00:00"]["01"][
+        "NOx"
+    ] == pytest.approx(8.0 * 10 / 36)
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from open_alaqs.core.tools.background_writer import BackgroundWriter
+
+
+def test_background_writer_writes_all_files(tmp_path):
+    writer = BackgroundWriter(workers=2, max_pending=2)
+    for index in range(10):
+        writer.submit((tmp_path / f"{index}.txt").write_text, str(index))
+    writer.close()
+
+    assert sorted(p.read_text() for p in tmp_path.iterdir()) == [
+        str(i) for i in range(10)
+    ]
+
+
+def test_background_writer_blocks_when_full():
+    release = threading.Event()
+    writer = BackgroundWriter(workers=1, max_pending=1)
+    writer.submit(release.wait)
+
+    blocked = threading.Thread(target=writer.submit, args=(lambda: None,))
+    blocked.start()
+    blocked.join(timeout=0.2)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(timeout=5)
+    assert not blocked.is_alive()
+    writer.close()
+
+
+def test_background_writer_raises_first_error():
+    def fail():
+        raise OSError("disk full")
+
+    writer = BackgroundWriter()
+    writer.submit(fail)
+
+    with pytest.raises(OSError, match="disk full"):
+        writer.flush()
+    with pytest.raises(OSError, match="disk full"):
+        writer.submit(lambda: None)
+    with pytest.raises(OSError, match="disk full"):
+        writer.close()
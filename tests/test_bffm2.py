@@ -1,8 +1,13 @@
 from dataclasses import FrozenInstanceError
 
+import numpy as np
 import pytest
 
-from open_alaqs.core.tools.bffm2 import constants
+from open_alaqs.core.tools.bffm2 import (
+    BFFM2Model,
+    calculate_emission_index,
+    constants,
+)
 
 
 def test_epsilon():
@@ -12,3 +17,106 @@ def test_epsilon():
 def test_epsilon_change():
     with pytest.raises(FrozenInstanceError):
         constants.epsilon = 1e-5
+
+
+ICAO_EEDB = {
+    "nox": {
+        "Idle": {0.1011: 4.0},
+        "Approach": {0.291: 8.0},
+        "Climbout": {0.862: 19.6},
+        "Takeoff": {1.051: 24.6},
+    },
+    "co": {
+        "Idle": {0.1011: 17.6},
+        "Approach": {0.291: 2.5},
+        "Climbout": {0.862: 0.9},
+        "Takeoff": {1.051: 0.9},
+    },
+    "hc": {
+        "Idle": {0.1011: 1.4},
+        "Approach": {0.291: 0.0},
+        "Climbout": {0.862: 0.23},
+        "Takeoff": {1.051: 0.23},
+    },
+}
+
+
+# The emission indices at FUEL_FLOWS and TEMPERATURES (Mach 0.3), as calculated
+# by the scalar implementation of calculate_emission_index before BFFM2Model
+FUEL_FLOWS = [0.0, 0.05, 0.1011, 0.2, 0.32, 0.5, 0.9, 1.05, 1.3]
+TEMPERATURES = np.linspace(260, 300, len(FUEL_FLOWS))
+EXPECTED_EI = {
+    "nox": [
+        0.037197967144735125,
+        2.3287952151668665,
+        3.8612332095071187,
+        6.274862874241139,
+        8.725751802025252,
+        12.600960982772655,
+        20.795325926083255,
+        24.775107981643103,
+        31.0919883143893,
+    ],
+    "co": [
+        14251063.423586808,
+        118.81922716344735,
+        27.06853623840528,
+        6.4501070251709,
+        2.3468733252800558,
+        0.8963501881125899,
+        0.9192093718549252,
+        0.9725539526264726,
+        1.0280191175461273,
+    ],
+    "hc": [
+        2.9990437459516165e22,
+        3549.9072626349143,
+        12.386355728178147,
+        0.051224205829513585,
+        0.001022399406425222,
+        0.011874018972931602,
+        0.2349090616962587,
+        0.2485415656712097,
+        0.2627159967062325,
+    ],
+}
+
+
+@pytest.mark.parametrize("pollutant", ["nox", "co", "hc"])
+def test_bffm2_model_vectorized(pollutant):
+    model = BFFM2Model(ICAO_EEDB)
+    ambient_conditions = {"temperature_in_Kelvin": TEMPERATURES, "mach_number": 0.3}
+
+    values = model.calculate_emission_index(
+        pollutant, np.array(FUEL_FLOWS), ambient_conditions
+    )
+
+    assert values.shape == (len(FUEL_FLOWS),)
+    np.testing.assert_allclose(values, EXPECTED_EI[pollutant], rtol=1e-9)
+
+
+@pytest.mark.parametrize("pollutant", ["nox", "co", "hc"])
+def test_calculate_emission_index(pollutant):
+    for fuel_flow, temperature, expected in zip(
+        FUEL_FLOWS, TEMPERATURES, EXPECTED_EI[pollutant]
+    ):
+        value = calculate_emission_index(
+            pollutant,
+            fuel_flow,
+            ICAO_EEDB,
+            ambient_conditions={
+                "temperature_in_Kelvin": temperature,
+                "mach_number": 0.3,
+            },
+        )
+        assert isinstance(value, float)
+        assert value == pytest.approx(expected, rel=1e-9)
+
+
+def test_bffm2_model_reference_points():
+    model = BFFM2Model(ICAO_EEDB, {m: 1.0 for m in ICAO_EEDB["nox"]})
+
+    values = model.calculate_emission_indices(np.array([0.1011, 0.291, 1.051]))
+
+    np.testing.assert_allclose(values["nox"], [4.0, 8.0, 24.6], rtol=1e-3)
+    np.testing.assert_allclose(values["co"][[0, 1]], [17.6, 2.5], rtol=1e-6)
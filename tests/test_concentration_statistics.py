@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from open_alaqs.core.tools.concentration_statistics import ConcentrationStatistics
+
+
+def test_concentration_statistics():
+    fields = np.random.default_rng(0).lognormal(size=(240, 2, 3, 4))
+
+    statistics = ConcentrationStatistics((2, 3, 4))
+    for field in fields:
+        statistics.add(field)
+
+    assert len(statistics) == 240
+    np.testing.assert_allclose(statistics.getMean(), fields.mean(axis=0))
+
+    # the fields are reshaped to the shape of the statistics
+    statistics = ConcentrationStatistics((2, 3, 4))
+    statistics.add(fields[0].ravel())
+    np.testing.assert_array_equal(statistics.getMean(), fields[0])
+
+
+def test_concentration_statistics_empty():
+    with pytest.raises(ValueError):
+        ConcentrationStatistics((2, 3, 4)).getMean()
@@ -0,0 +1,83 @@
+import numpy as np
+
+from open_alaqs.core.tools import dmna
+
+HEADER = """-
+t1\t"0.00:00:00"
+t2\t"1.00:00:00"
+xmin\t-500.0
+ymin\t-400.0
+delta\t100.0
+sk\t0.0 3.0 6.0
+-
+mode\t"{mode}"
+form\t"Con%(*1.0e-9)10.3e"
+dims\t3
+sequ\t"k+,j-,i+"
+lowb\t1 1 1
+hghb\t4 3 2
+"""
+
+
+def write_dmna(path, data, mode="text"):
+    with path.open("w") as f:
+        f.write(HEADER.format(mode=mode))
+        if mode == "binary":
+            data.astype("<f4").tofile(path.with_suffix(".dmnb"))
+            f.write("***\n")
+            return
+        f.write("*\n")
+        for k_slice in data:
+            f.write("\n".join(" ".join(f"{v:10.3e}" for v in row) for row in k_slice))
+            f.write("\n\n")
+        f.write("***\n")
+
+
+def test_read_dmna_text(tmp_path):
+    data = np.arange(24, dtype=float).reshape(2, 3, 4)
+    write_dmna(tmp_path / "co-y00a.dmna", data)
+
+    header, index_, values = dmna.read_dmna(tmp_path / "co-y00a.dmna")
+
+    assert header["t2"] == ["1.00:00:00"]
+    assert header["sk"] == ["0.0", "3.0", "6.0"]
+    assert index_ == 14
+    np.testing.assert_allclose(values, data)
+
+
+def test_read_dmna_binary(tmp_path):
+    data = np.arange(24, dtype=float).reshape(2, 3, 4)
+    write_dmna(tmp_path / "co-y00a.dmna", data, mode="binary")
+
+    header, _, values = dmna.read_dmna(tmp_path / "co-y00a.dmna")
+
+    assert isinstance(values, np.memmap)
+    assert values.dtype == np.dtype("<f4")
+    np.testing.assert_allclose(values, data)
+
+
+def test_read_austal_output_consolidated_series(tmp_path):
+    for number in range(1, 4):
+        write_dmna(tmp_path / f"co-{number:03d}a.dmna", np.full((2, 3, 4), number))
+
+    # the files are read directly, without side effects
+    header, _, values = dmna.read_austal_output(tmp_path / "co-002a.dmna")
+    np.testing.assert_allclose(values, 2)
+    assert header["xmin"] == ["-500.0"]
+    assert not (tmp_path / "co-a.cube.npy").exists()
+
+    (cube,) = dmna.consolidate_austal_output(tmp_path)
+    assert len(cube) == 3
+    assert cube.getData().shape == (3, 2, 3, 4)
+    assert (tmp_path / "co-a.cube.npy").exists()
+
+    header, _, values = dmna.read_austal_output(tmp_path / "co-002a.dmna")
+    assert np.shares_memory(values, cube.getData())
+    np.testing.assert_allclose(values, 2)
+    assert header["xmin"] == ["-500.0"]
+
+    # a changed file is read directly
+    write_dmna(tmp_path / "co-003a.dmna", np.full((2, 3, 4), 7.0))
+    _, _, values = dmna.read_austal_output(tmp_path / "co-003a.dmna")
+    np.testing.assert_allclose(values, 7)
+    np.testing.assert_allclose(cube.getData()[2], 3)
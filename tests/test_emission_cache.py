@@ -0,0 +1,82 @@
+import os
+from datetime import datetime
+
+from open_alaqs.core.interfaces.Emissions import Emission
+from open_alaqs.core.interfaces.Source import Source
+from open_alaqs.core.tools.emission_cache import EmissionCache
+
+
+class PointSource(Source):
+    def __init__(self, name):
+        super().__init__({"height": 10, "geometry": "POINT (1 2)"})
+        self._id = name
+
+
+def test_emission_cache_round_trip(tmp_path):
+    inventory_path = tmp_path / "inventory.alaqs"
+    inventory_path.write_bytes(b"inventory")
+    config = {"method": "bymode", "time_interval": "3600"}
+
+    source = PointSource("stack")
+    emission = Emission({"co_g": 1.5, "nox_g": 2.0, "fuel_kg": None})
+    emission.setGeometryText("LINESTRING (0 0, 1 1)")
+    emission.setVerticalExtent({"z_min": 0, "z_max": 100})
+    emissions = {
+        datetime(2020, 1, 1, 0): [(source, [emission, Emission({"co_g": 3.0})])],
+        datetime(2020, 1, 1, 1): [(source, [])],
+    }
+
+    cache = EmissionCache(inventory_path, config, cache_dir=tmp_path)
+    assert not cache.exists()
+    cache.save(emissions)
+    assert EmissionCache(inventory_path, config, cache_dir=tmp_path).exists()
+    assert not EmissionCache(
+        inventory_path, {**config, "method": "BFFM2"}, cache_dir=tmp_path
+    ).exists()
+
+    loaded = cache.load()
+
+    assert list(loaded) == list(emissions)
+    ((replayed_source, replayed_emissions),) = loaded[datetime(2020, 1, 1, 0)]
+    assert replayed_source.getName() == "stack"
+    assert replayed_source.getSourceType() == "PointSource"
+    assert replayed_source.getGeometryText() == "POINT (1 2)"
+    assert replayed_source.getHeight() == 10
+    assert replayed_emissions[0].getObjects() == emission.getObjects()
+    assert replayed_emissions[0].getGeometryText() == "LINESTRING (0 0, 1 1)"
+    assert replayed_emissions[0].getVerticalExtent()["delta_z"] == 100
+    assert replayed_emissions[1].getObjects() == {"co_g": 3.0}
+    assert replayed_emissions[1].getGeometryText() is None
+    assert "delta_z" not in replayed_emissions[1].getVerticalExtent()
+    assert sum(replayed_emissions).getObject("co_g") == 4.5
+    assert loaded[datetime(2020, 1, 1, 1)] == [(replayed_source, [])]
+
+
+def test_emission_cache_prune(tmp_path):
+    inventory_path = tmp_path / "inventory.alaqs"
+    inventory_path.write_bytes(b"inventory")
+    emissions = {datetime(2020, 1, 1): [(PointSource("stack"), [Emission({})])]}
+
+    caches = [
+        EmissionCache(inventory_path, {"method": method}, cache_dir=tmp_path / "cache")
+        for method in ("bymode", "BFFM2", "DLR")
+    ]
+    caches[0].save(emissions)
+    size = caches[0].getPath().stat().st_size
+    caches[1].save(emissions)
+    for i, cache in enumerate(caches[:2]):
+        os.utime(cache.getPath(), (i, i))
+
+    # the least recently used cache is removed when the size is exceeded
+    caches[0].load()
+    cache = EmissionCache(
+        inventory_path,
+        {"method": "DLR"},
+        cache_dir=tmp_path / "cache",
+        max_cache_bytes=2 * size,
+    )
+    cache.save(emissions)
+
+    assert caches[0].exists()
+    assert not caches[1].exists()
+    assert cache.exists()
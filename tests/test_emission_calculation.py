@@ -0,0 +1,324 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from open_alaqs.core.EmissionCalculation import EmissionCalculation  # noqa: E402
+from open_alaqs.core.interfaces.DispersionModule import DispersionModule  # noqa: E402
+from open_alaqs.core.interfaces.Emissions import Emission  # noqa: E402
+from open_alaqs.core.interfaces.OutputModule import OutputModule  # noqa: E402
+from open_alaqs.core.interfaces.Source import Source  # noqa: E402
+from open_alaqs.core.interfaces.SourceModule import SourceModule  # noqa: E402
+from open_alaqs.core.modules.ModuleManager import (  # noqa: E402
+    DispersionModuleRegistry,
+    OutputAnalysisModuleRegistry,
+    SourceModuleRegistry,
+)
+from open_alaqs.core.tools import sql_interface  # noqa: E402
+from open_alaqs.core.tools.emission_cache import CachedSource  # noqa: E402
+from open_alaqs.core.tools.Grid3D import Grid3D  # noqa: E402
+from open_alaqs.core.tools.inventory_context import InventoryContext  # noqa: E402
+
+GRID_CONFIG = {
+    "x_cells": 2,
+    "y_cells": 2,
+    "z_cells": 1,
+    "x_resolution": 100,
+    "y_resolution": 100,
+    "z_resolution": 100,
+    "reference_latitude": 0.0,
+    "reference_longitude": 0.0,
+    "reference_altitude": 0.0,
+}
+
+
+class StubSource(Source):
+    def __init__(self, name: str, geometry_text: str):
+        Source.__init__(self, {"geometry": geometry_text, "height": 5.0})
+        self._id = name
+
+
+class StubSourceModule(SourceModule):
+    """
+    Two sources with emissions that depend on the hour of the period, with an
+    optional key that does not fit the layout of the batches. Writes a marker
+    file per process in beginJob() and endJob().
+    """
+
+    @staticmethod
+    def getModuleName():
+        return "StubSource"
+
+    def __init__(self, values_dict=None):
+        SourceModule.__init__(self, values_dict)
+        self._marker_dir = Path(values_dict["marker_dir"])
+        self._other_key = values_dict.get("other_key")
+
+    def beginJob(self):
+        self._sources = {
+            "A": StubSource("A", "POINT (10 10)"),
+            "B": StubSource("B", "POINT (150 150)"),
+        }
+        (self._marker_dir / f"begin-{os.getpid()}").touch()
+
+    def process(
+        self, start_time, end_time, source_names=None, ambient_conditions=None, **kwargs
+    ):
+        hour = start_time.hour
+        result = []
+        for i, source in enumerate(self._sources.values()):
+            emission = Emission(
+                {"fuel_kg": (i + 1) * hour, "co_g": 0.5 * hour, "nox_g": i},
+                {"fuel_kg": 0.0, "co_g": 0.0, "nox_g": 0.0},
+            )
+            if self._other_key:
+                emission.setObject(self._other_key, hour)
+            result.append((start_time, source, [emission]))
+        return result
+
+    def endJob(self):
+        (self._marker_dir / f"end-{os.getpid()}").touch()
+
+
+class RecordingDispersionModule(DispersionModule):
+    @staticmethod
+    def getModuleName():
+        return "RecordingDispersion"
+
+    def __init__(self, values_dict=None):
+        DispersionModule.__init__(self, values_dict)
+        self.periods = []
+
+    def beginJob(self):
+        pass
+
+    def process(self, start_dt, end_dt, result, ambient_conditions, **kwargs):
+        self.periods.append((start_dt, end_dt, result))
+
+    def endJob(self):
+        pass
+
+
+class RecordingOutputModule(OutputModule):
+    @staticmethod
+    def getModuleName():
+        return "RecordingOutput"
+
+    def __init__(self, values_dict):
+        OutputModule.__init__(self, values_dict)
+        self.periods = []
+
+    def process(self, timestamp, result, **kwargs):
+        self.periods.append((timestamp, result))
+
+    def endJob(self):
+        return [timestamp for timestamp, _result in self.periods]
+
+
+class RecordingBatchOutputModule(OutputModule):
+    """
+    A sink that uses the batches directly, and is ended after a beginJob().
+    """
+
+    @staticmethod
+    def getModuleName():
+        return "RecordingBatchOutput"
+
+    def __init__(self, values_dict):
+        OutputModule.__init__(self, values_dict)
+        self.fuel_kg = None
+
+    def beginJob(self):
+        self.fuel_kg = {}
+
+    def processBatch(self, timestamp, batch, **kwargs):
+        self.fuel_kg[timestamp] = batch.sum().getObject("fuel_kg")
+
+    def endJob(self):
+        return self.fuel_kg
+
+
+@pytest.fixture
+def inventory_path(tmp_path) -> str:
+    """
+    An inventory with an (empty) time series and meteo, and a grid.
+    """
+    sql_dir = Path(__file__).parents[1] / "open_alaqs/database/sql"
+    db_path = tmp_path / "inventory.alaqs"
+    with sqlite3.connect(db_path) as conn:
+        for name in ("tbl_InvTime.sql", "tbl_InvMeteo.sql"):
+            conn.executescript((sql_dir / name).read_text())
+    conn.close()
+    Grid3D(str(db_path), GRID_CONFIG, deserialize=False).serialize()
+    return str(db_path)
+
+
+@pytest.fixture
+def registered_modules(monkeypatch):
+    for registry, module in (
+        (SourceModuleRegistry(), StubSourceModule),
+        (DispersionModuleRegistry(), RecordingDispersionModule),
+        (OutputAnalysisModuleRegistry(), RecordingOutputModule),
+        (OutputAnalysisModuleRegistry(), RecordingBatchOutputModule),
+    ):
+        monkeypatch.setitem(registry._registry, module.getModuleName(), module)
+
+
+def _summary(result: list) -> list:
+    """
+    The name, geometry and values of the emissions of a (source, emissions)
+    list, independent of the type of the sources.
+    """
+    return [
+        (
+            source.getName(),
+            source.getGeometryText(),
+            source.getHeight(),
+            [
+                {key: emission.getObject(key) for key in ("fuel_kg", "co_g", "nox_g")}
+                for emission in emissions
+            ],
+        )
+        for source, emissions in result
+    ]
+
+
+def _run(
+    db_path: str, marker_dir: Path, other_key: Optional[str] = None, **kwargs
+) -> EmissionCalculation:
+    marker_dir.mkdir()
+    calculation = EmissionCalculation(
+        db_path,
+        GRID_CONFIG,
+        datetime(2020, 1, 1, 0),
+        datetime(2020, 1, 1, 7),
+        timedelta(hours=1),
+        context=InventoryContext(db_path),
+    )
+    calculation.add_source_module(
+        "StubSource", {"marker_dir": str(marker_dir), "other_key": other_key}
+    )
+    calculation.add_dispersion_modules(["RecordingDispersion"], {})
+    calculation.add_output_module("RecordingOutput", {})
+
+    assert calculation.run(
+        [], 914.4, progress_callback=lambda count, total: None, **kwargs
+    )
+    return calculation
+
+
+def test_run_in_pool_matches_sequential(inventory_path, registered_modules, tmp_path):
+    sequential = _run(inventory_path, tmp_path / "sequential")
+    pooled = _run(inventory_path, tmp_path / "pooled", workers=2, chunk_size=3)
+
+    sequential_dispersion = sequential.getDispersionModules()["RecordingDispersion"]
+    pooled_dispersion = pooled.getDispersionModules()["RecordingDispersion"]
+    pooled_output = pooled.getOutputModules()["RecordingOutput"]
+
+    # the periods reach the dispersion and output modules in time order
+    hours = [datetime(2020, 1, 1, hour) for hour in range(7)]
+    assert [start_dt for start_dt, _end, _r in pooled_dispersion.periods] == hours
+    assert [timestamp for timestamp, _r in pooled_output.periods] == hours
+    assert pooled.getOutputResults() == {"RecordingOutput": hours}
+    assert list(pooled.getEmissions()) == hours
+
+    # the workers pass lightweight copies of the sources
+    for _start, _end, result in pooled_dispersion.periods:
+        assert all(isinstance(source, CachedSource) for source, _e in result)
+    for _timestamp, result in pooled_output.periods:
+        assert all(isinstance(source, CachedSource) for source, _e in result)
+
+    # with the same emissions as the sequential run
+    for (_s, _e, expected), (_s, _e, actual) in zip(
+        sequential_dispersion.periods, pooled_dispersion.periods
+    ):
+        assert _summary(actual) == _summary(expected)
+    for hour in hours:
+        assert _summary(pooled.getEmissions()[hour]) == _summary(
+            sequential.getEmissions()[hour]
+        )
+
+    # the source modules ran in the workers, which ended their job on exit
+    begins = {p.name[len("begin-") :] for p in (tmp_path / "pooled").glob("begin-*")}
+    ends = {p.name[len("end-") :] for p in (tmp_path / "pooled").glob("end-*")}
+    assert begins and begins == ends
+    assert str(os.getpid()) not in begins
+
+
+def test_run_streams_periods_to_sinks(inventory_path, registered_modules, tmp_path):
+    (tmp_path / "markers").mkdir()
+    calculation = EmissionCalculation(
+        inventory_path,
+        GRID_CONFIG,
+        datetime(2020, 1, 1, 0),
+        datetime(2020, 1, 1, 4),
+        timedelta(hours=1),
+        context=InventoryContext(inventory_path),
+    )
+    calculation.add_source_module(
+        "StubSource", {"marker_dir": str(tmp_path / "markers")}
+    )
+    calculation.add_output_module("RecordingOutput", {})
+    calculation.add_output_module("RecordingBatchOutput", {})
+
+    assert calculation.run(
+        [], 914.4, progress_callback=lambda count, total: None, keep_emissions=False
+    )
+
+    # each period reaches every sink, in time order
+    hours = [datetime(2020, 1, 1, hour) for hour in range(4)]
+    sink = calculation.getOutputModules()["RecordingOutput"]
+    assert [timestamp for timestamp, _result in sink.periods] == hours
+    assert [_summary(result)[1][3] for _timestamp, result in sink.periods] == [
+        [{"fuel_kg": 2.0 * hour, "co_g": 0.5 * hour, "nox_g": 1}] for hour in range(4)
+    ]
+
+    # the results of endJob() are kept, the emissions are not
+    assert calculation.getOutputResults() == {
+        "RecordingOutput": hours,
+        "RecordingBatchOutput": {
+            timestamp: 3.0 * timestamp.hour for timestamp in hours
+        },
+    }
+    assert calculation.getEmissions() == {}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_with_emissions_outside_layout(
+    inventory_path, registered_modules, tmp_path, workers
+):
+    calculation = _run(
+        inventory_path, tmp_path / "markers", other_key="other", workers=workers
+    )
+
+    # the modules get the (source, emissions) lists
+    hours = [datetime(2020, 1, 1, hour) for hour in range(7)]
+    dispersion = calculation.getDispersionModules()["RecordingDispersion"]
+    output = calculation.getOutputModules()["RecordingOutput"]
+    assert [timestamp for timestamp, _result in output.periods] == hours
+    for (_start, _end, dispersion_result), (timestamp, output_result) in zip(
+        dispersion.periods, output.periods
+    ):
+        assert dispersion_result is output_result
+        assert [
+            (source.getName(), [e.getObject("other") for e in emissions])
+            for source, emissions in output_result
+        ] == [("A", [timestamp.hour]), ("B", [timestamp.hour])]
+
+
+def test_read_only_connections(inventory_path):
+    sql_interface.set_read_only(True)
+    try:
+        assert sql_interface.db_execute_sql(
+            inventory_path, 'SELECT "x_cells" FROM "grid_3d_definition"'
+        ) == {"x_cells": 2}
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            with sql_interface.get_db_connection(inventory_path) as conn:
+                conn.execute('DELETE FROM "grid_3d_definition"')
+    finally:
+        sql_interface.set_read_only(False)
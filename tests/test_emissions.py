@@ -0,0 +1,188 @@
+import numpy as np
+import pytest
+
+from open_alaqs.core.interfaces.Emissions import (
+    EMISSION_KEYS,
+    Emission,
+    EmissionBatch,
+    EmissionVector,
+    PollutantType,
+    PollutantUnit,
+    sum_emissions,
+)
+
+
+@pytest.fixture
+def emissions():
+    return [
+        Emission({"fuel_kg": 1.0, "co_g": 2.0, "nox_g": 3.0, "nvpm_number": 1e12}),
+        Emission({"fuel_kg": 0.5, "co_g": 1.0, "nox_g": None, "nvpm_number": 2e12}),
+        Emission({"co_kg": 4.0, "hc_kg": 0.25}),
+    ]
+
+
+def test_sum_emissions(emissions):
+    expected = sum(emissions)
+    total = sum_emissions(emissions)
+
+    assert isinstance(total, Emission)
+    assert total.getObjects().keys() == expected.getObjects().keys()
+    for key, value in expected.getObjects().items():
+        assert total.getObject(key) == pytest.approx(value)
+    assert total.getObject("nox_g") is None
+
+
+def test_sum_emissions_empty():
+    assert sum_emissions([]) == 0
+
+
+def test_sum_emissions_unknown_key():
+    total = sum_emissions(
+        [Emission({"co_g": 1.0, "other": 2.0}), Emission({"co_g": 3.0})]
+    )
+    assert total.getObjects() == {"co_g": 4.0, "other": 2.0}
+
+
+def test_emission_vector(emissions):
+    vector = EmissionVector.fromEmission(emissions[0])
+    vector += EmissionVector.fromEmission(emissions[2])
+    vector = 2 * vector
+
+    assert vector.getValue("co_g") == 4.0
+    assert vector.getValue("hc_kg") == 0.5
+    assert not vector.hasKey("sox_g")
+    assert vector.get_value(PollutantType.CO, PollutantUnit.KG) == 8.0
+    emission = vector.toEmission()
+    assert vector.get_value(PollutantType.HC, PollutantUnit.GRAM) == emission.get_value(
+        PollutantType.HC, PollutantUnit.GRAM
+    )
+    with pytest.raises(KeyError):
+        vector.get_value(PollutantType.SOx, PollutantUnit.GRAM)
+    assert (
+        vector.toEmission().getObjects()
+        == (2 * (emissions[0] + emissions[2])).getObjects()
+    )
+
+
+def test_emission_vector_stack(emissions):
+    values, present = EmissionVector.stack(emissions)
+
+    assert values.shape == present.shape == (3, len(EMISSION_KEYS))
+    assert present.sum(axis=1).tolist() == [4, 4, 2]
+    assert np.isnan(values[1, EMISSION_KEYS.index("nox_g")])
+    assert EmissionVector.stack([Emission({"unknown": 1.0})]) is None
+
+
+@pytest.fixture
+def result(emissions):
+    for i, emission in enumerate(emissions):
+        emission.setGeometryText(f"POINT ({i % 2} 0)")
+        emission.setVerticalExtent({"z_min": i, "z_max": i + 10})
+    return [("a", emissions[:2]), ("b", []), ("c", emissions[2:])]
+
+
+def test_emission_batch(result, emissions):
+    batch = EmissionBatch.fromResult(result)
+
+    assert len(batch) == 3
+    assert batch.getSources() == ["a", "b", "c"]
+    assert batch.getSourceIds().tolist() == [0, 0, 2]
+    assert batch.getGeometries() == ["POINT (0 0)", "POINT (1 0)"]
+    assert batch.getGeometryIds().tolist() == [0, 1, 0]
+    assert batch.getVerticalExtents().tolist() == [[0, 10], [1, 11], [2, 12]]
+
+    for (source, emissions_), (expected_source, expected) in zip(
+        batch.toResult(), result
+    ):
+        assert source == expected_source
+        assert [e.getObjects() for e in emissions_] == [
+            e.getObjects() for e in expected
+        ]
+        assert [e.getGeometryText() for e in emissions_] == [
+            e.getGeometryText() for e in expected
+        ]
+
+    np.testing.assert_allclose(
+        batch.get_values(PollutantType.CO, PollutantUnit.GRAM),
+        [e.get_value(PollutantType.CO, PollutantUnit.GRAM) for e in emissions],
+    )
+    with pytest.raises(KeyError):
+        batch.get_values(PollutantType.HC, PollutantUnit.GRAM)
+
+
+def test_emission_batch_default(emissions):
+    batch = EmissionBatch.fromResult([("a", None), ("b", None)], emissions[0])
+    assert batch.getSourceIds().tolist() == [0, 1]
+    assert EmissionBatch.fromResult([("a", None)]).toResult() == [("a", [])]
+
+
+def test_emission_batch_sums(result):
+    batch = EmissionBatch.fromResult(result)
+
+    assert (
+        batch.sum().getObjects().keys()
+        == sum_emissions([e for _, emissions_ in result for e in emissions_])
+        .getObjects()
+        .keys()
+    )
+    sums = batch.sumBySource()
+    assert [source for source, _ in sums] == ["a", "b", "c"]
+    assert sums[0][1].getObject("co_g") == 3.0
+    assert sums[1][1] == 0
+    assert sums[2][1].getObjects() == {"co_kg": 4.0, "hc_kg": 0.25}
+
+
+def test_emission_batch_transpose_to_kilograms(result, emissions):
+    emissions[0].setObject("co_kg", 1.0)
+    emissions[1].setObject("nox_g", 1.0)
+    batch = EmissionBatch.fromResult(result).transposeToKilograms()
+
+    for emission_, expected in zip(
+        (e for _, emissions_ in batch.toResult() for e in emissions_), emissions
+    ):
+        expected = expected.transposeToKilograms().getObjects()
+        assert emission_.getObjects().keys() == expected.keys()
+        for key, value in expected.items():
+            assert emission_.getObject(key) == pytest.approx(value)
+
+
+def test_emission_batch_concatenate(result):
+    batch = EmissionBatch.fromResult(result)
+    block = EmissionBatch.fromResult([(None, result[0][1])])
+
+    concatenated = EmissionBatch.concatenate([batch, batch])
+    assert len(concatenated) == 6
+    assert concatenated.getSourceIds().tolist() == [0, 0, 2, 3, 3, 5]
+    assert len(concatenated.getGeometries()) == 2
+
+    joined = EmissionBatch.fromBlocks([("x", [block, block]), ("y", [block])])
+    assert joined.getSources() == ["x", "y"]
+    assert joined.getSourceIds().tolist() == [0, 0, 0, 0, 1, 1]
+    assert joined.getGeometryIds().tolist() == [0, 1, 0, 1, 0, 1]
+    assert joined.withSources(["u", "v"]).toResult()[1][0] == "v"
+
+
+def test_emission_batch_from_list(result, emissions):
+    emissions[2].setObject("other", 1.0)
+    with pytest.raises(ValueError):
+        EmissionBatch.fromResult(result)
+
+    batch = EmissionBatch.fromList(result + [("d", None)], emissions[0])
+    assert not batch.fitsLayout()
+    assert len(batch) == 4
+    assert batch.getSources() == ["a", "b", "c", "d"]
+    assert batch.toResult()[2] == ("c", [emissions[2]])
+    assert batch.toResult()[3] == ("d", [emissions[0]])
+    assert batch.sum().getObject("other") == 1.0
+    sums = batch.sumBySource()
+    assert sums[1][1] == 0
+    assert sums[2][1].getObjects() == {"co_kg": 4.0, "hc_kg": 0.25, "other": 1.0}
+
+    # the batch is kept as a list when concatenated
+    concatenated = EmissionBatch.concatenate(
+        [EmissionBatch.fromResult(result[:2]), batch]
+    )
+    assert not concatenated.fitsLayout()
+    assert [source for source, _ in concatenated.toResult()] == list("ababcd")
+    assert concatenated.sum().getObject("co_g") == 8.0
+    assert batch.withSources(list("wxyz")).toResult()[2] == ("y", [emissions[2]])
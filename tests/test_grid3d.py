@@ -0,0 +1,171 @@
+from unittest import mock
+
+import numpy as np
+import shapely
+
+from open_alaqs.core.tools.Grid3D import Grid3D, traverse_segments
+
+
+def test_traverse_segments_matches_intersection_lengths():
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(-5, 25, (20, 2))
+    ends = rng.uniform(-5, 25, (20, 2))
+    resolution = np.array([2.0, 3.0])
+
+    segments, indices, fractions = traverse_segments(
+        starts, ends, np.zeros(2), resolution
+    )
+
+    np.testing.assert_allclose(np.bincount(segments, fractions), 1)
+    for segment, (x_idx, y_idx), fraction in zip(segments, indices, fractions):
+        line = shapely.LineString([starts[segment], ends[segment]])
+        cell = shapely.box(
+            x_idx * resolution[0],
+            y_idx * resolution[1],
+            (x_idx + 1) * resolution[0],
+            (y_idx + 1) * resolution[1],
+        )
+        assert np.isclose(line.intersection(cell).length / line.length, fraction)
+
+
+def make_grid() -> Grid3D:
+    with mock.patch.object(Grid3D, "_calculate_origin_xy", return_value=(0.0, 0.0)):
+        return Grid3D(
+            grid_config={
+                "x_cells": 10,
+                "y_cells": 10,
+                "z_cells": 5,
+                "x_resolution": 10,
+                "y_resolution": 10,
+                "z_resolution": 10,
+            }
+        )
+
+
+def test_get_line_cell_weights():
+    grid = make_grid()
+
+    cell_ids, weights = grid.get_line_cell_weights([[5, 5, 0], [25, 5, 20]])
+    np.testing.assert_array_equal(
+        cell_ids,
+        Grid3D.convertXYZIndicesToCellId([0, 1, 1, 2], [0, 0, 0, 0], [0, 0, 1, 1]),
+    )
+    np.testing.assert_allclose(weights, 0.25)
+
+    cell_ids, weights = grid.get_line_cell_weights([[5, 5], [25, 5]], delta_z=15)
+    assert len(cell_ids) == 6
+    assert np.isclose(weights.sum(), 1)
+
+
+def test_get_polygon_cell_weights():
+    grid = make_grid()
+    polygon = shapely.Polygon([(5, 5), (35, 5), (35, 15), (5, 15)])
+
+    cell_ids, weights = grid.get_polygon_cell_weights(polygon, 0, 15)
+
+    x_idx, y_idx, z_idx = Grid3D.convertCellIdToXYZIndices(cell_ids)
+    assert set(zip(x_idx, y_idx)) == {(x, y) for x in range(4) for y in range(2)}
+    assert set(z_idx) == {0, 1}
+    assert np.isclose(weights.sum(), 1)
+
+    # the covered share of each (x, y) column
+    columns = {}
+    for x, y, weight in zip(x_idx, y_idx, weights):
+        columns[x, y] = columns.get((x, y), 0) + weight
+    assert np.isclose(columns[1, 0], 50 / 300)
+    assert np.isclose(columns[0, 0], 25 / 300)
+
+
+def previous_3d_grid_cells(grid: Grid3D) -> list:
+    """
+    The cells of get_3d_grid_cells() as built cell by cell before the
+    vectorisation.
+    """
+    cell_coordinates = []
+    for x_idx in range(grid._x_cells):
+        for y_idx in range(grid._y_cells):
+            for z_idx in range(grid._z_cells):
+                cell = grid.convertXYZIndicesToGridCellMinMax(x_idx, y_idx, z_idx)
+                cell_coordinates.append(
+                    [
+                        grid.convertXYZIndicesToCellHash(x_idx, y_idx, z_idx),
+                        cell["x_min"],
+                        cell["x_max"],
+                        cell["y_min"],
+                        cell["y_max"],
+                        cell["z_min"],
+                        cell["z_max"],
+                    ]
+                )
+    return cell_coordinates
+
+
+def make_small_grid() -> Grid3D:
+    with mock.patch.object(
+        Grid3D, "_calculate_origin_xy", return_value=(-150.5, 2000.25)
+    ):
+        return Grid3D(
+            grid_config={
+                "x_cells": 3,
+                "y_cells": 4,
+                "z_cells": 2,
+                "x_resolution": 100,
+                "y_resolution": 50,
+                "z_resolution": 12.5,
+            }
+        )
+
+
+def test_cell_ids_match_cell_hashes():
+    x_idx = np.array([0, 1, 0, 99999, 12, 3])
+    y_idx = np.array([0, 0, 1, 99999, 34, 2])
+    z_idx = np.array([0, 0, 0, 99999, 5, 1])
+    hashes = [
+        make_small_grid().convertXYZIndicesToCellHash(x, y, z)
+        for x, y, z in zip(x_idx, y_idx, z_idx)
+    ]
+
+    cell_ids = Grid3D.convertXYZIndicesToCellId(x_idx, y_idx, z_idx)
+
+    assert [int(cell_hash) for cell_hash in hashes] == cell_ids.tolist()
+    assert Grid3D.convertCellIdsToCellHashes(cell_ids) == hashes
+    assert hashes[4] == "000120003400005"
+    for indices in (
+        Grid3D.convertCellIdToXYZIndices(cell_ids),
+        np.array([Grid3D.convertCellHashToXYZIndices(h) for h in hashes]).T,
+    ):
+        np.testing.assert_array_equal(indices, [x_idx, y_idx, z_idx])
+
+
+def test_get_3d_grid_cells_matches_previous_cells():
+    grid = make_small_grid()
+    expected = previous_3d_grid_cells(grid)
+
+    assert grid.get_3d_grid_cells() == expected
+
+    cells_df = grid.get_cells_df()
+    assert cells_df["cell_id"].tolist() == [int(cell[0]) for cell in expected]
+    assert cells_df["hash"].tolist() == [cell[0] for cell in expected]
+
+
+def test_grid_cell_geometries_match_previous_cells():
+    grid = make_small_grid()
+    expected = previous_3d_grid_cells(grid)
+
+    gdf_3d = grid.get_df_from_3d_grid_cells()
+    gdf_2d = grid.get_df_from_2d_grid_cells()
+
+    # the 2D grid has the cells of the ground level
+    expected_2d = [cell for cell in expected if cell[5] == grid._grid_origin_z]
+    for gdf, cells in ((gdf_3d, expected), (gdf_2d, expected_2d)):
+        assert gdf["hash"].tolist() == [cell[0] for cell in cells]
+        for geometry, (_hash, x_min, x_max, y_min, y_max, *_z) in zip(
+            gdf.geometry, cells
+        ):
+            assert geometry.equals_exact(
+                shapely.Polygon(
+                    [(x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max)]
+                ),
+                0,
+            )
+    assert gdf_3d[["zmin", "zmax"]].values.tolist() == [cell[5:] for cell in expected]
@@ -0,0 +1,41 @@
+from open_alaqs.core.tools.inventory_context import InventoryContext
+from open_alaqs.core.tools.Singleton import InventorySingleton
+
+
+class DummyStore(metaclass=InventorySingleton):
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+
+def test_inventory_context_owns_its_stores():
+    first = InventoryContext("first.alaqs")
+    second = InventoryContext("second.alaqs")
+
+    with first:
+        first_store = DummyStore("first.alaqs")
+        assert DummyStore("first.alaqs") is first_store
+        assert InventoryContext.getCurrent() is first
+
+    second_store = second.getStore(DummyStore)
+
+    assert InventoryContext.getCurrent() is None
+    assert first_store.db_path == "first.alaqs"
+    assert second_store.db_path == "second.alaqs"
+    assert first.getStore(DummyStore) is first_store
+
+
+def test_inventory_context_release():
+    context = InventoryContext("inventory.alaqs")
+    store = context.getStore(DummyStore)
+
+    context.release()
+
+    assert not context.hasInstance(DummyStore)
+    assert context.getStore(DummyStore) is not store
+
+
+def test_inventory_singleton_without_context():
+    store = DummyStore("process.alaqs")
+
+    assert DummyStore("other.alaqs") is store
+    assert InventoryContext("inventory.alaqs").getStore(DummyStore) is not store
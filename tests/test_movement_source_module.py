@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from open_alaqs.core.interfaces.AmbientCondition import AmbientCondition  # noqa: E402
+from open_alaqs.core.modules.MovementSourceModule import (  # noqa: E402
+    MovementSourceModule,
+)
+
+
+class FakeEmission:
+    def isZero(self) -> bool:
+        return False
+
+
+class FakeMovement:
+    def __init__(self):
+        self.flight_emission_calls = 0
+
+    def calculateGateEmissions(self, sas="none") -> list[dict]:
+        return [{"emissions": FakeEmission()}]
+
+    def calculateFlightEmissions(self, atRunway, method, mode, limit) -> list[dict]:
+        self.flight_emission_calls += 1
+        return [{"emissions": FakeEmission()}]
+
+    def calculateTaxiingEmissions(self, method=None, mode="TX", sas="none"):
+        return []
+
+
+class FakeMovementStore:
+    """
+    The movements of a single group (gate, aircraft, engine, profile, runway)
+    at the given runway times, by oid.
+    """
+
+    def __init__(self, runway_times: dict[int, str]):
+        self._runway_times = runway_times
+        self._movements = {oid: FakeMovement() for oid in runway_times}
+        self._window = None
+
+    def loadMovements(
+        self, start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None
+    ) -> None:
+        self._window = (start_dt, end_dt)
+
+    def releaseMovements(self) -> None:
+        self._window = None
+
+    def getObject(self, oid: int) -> FakeMovement:
+        return self._movements[oid]
+
+    def getMovementAttributes(self) -> pd.DataFrame:
+        if self._window is None:
+            return pd.DataFrame(columns=["name", "runway_time"])
+
+        runway_times = {
+            oid: datetime.fromisoformat(runway_time).timestamp()
+            for oid, runway_time in self._runway_times.items()
+        }
+        return pd.DataFrame(
+            {
+                "name": [f"id {oid}" for oid in runway_times],
+                "runway_time": list(runway_times.values()),
+                "gate": "G1",
+                "aircraft": "A320",
+                "ac_group": "JET LARGE",
+                "engine": "CFM56",
+                "departure_arrival": "D",
+                "profile_id": "A320-D",
+                "runway": "09/27",
+            },
+            index=list(runway_times),
+        )
+
+
+def _module(runway_times: dict[int, str]) -> MovementSourceModule:
+    module = MovementSourceModule()
+    module.setStore(FakeMovementStore(runway_times))
+    module.beginJob()
+    return module
+
+
+def test_movements_positions_in_period():
+    module = _module(
+        {
+            1: "2020-01-01 01:30:00",
+            2: "2020-01-01 01:00:00",
+            3: "2020-01-01 02:00:00",
+            4: "2020-01-01 01:00:00",
+            5: "2020-01-01 00:59:59",
+        }
+    )
+    module.loadMovementWindow(datetime(2020, 1, 1), datetime(2020, 1, 2))
+
+    # the movements in [start, end), in the order of the dataframe
+    positions = module._getMovementsPositionsInPeriod(
+        datetime(2020, 1, 1, 1), datetime(2020, 1, 1, 2)
+    )
+    assert module.getDataframe()["oid"].iloc[positions].tolist() == [1, 2, 4]
+
+    positions = module._getMovementsPositionsInPeriod(
+        datetime(2020, 1, 1, 2), datetime(2020, 1, 1, 3)
+    )
+    assert module.getDataframe()["oid"].iloc[positions].tolist() == [3]
+
+    positions = module._getMovementsPositionsInPeriod(
+        datetime(2020, 1, 1, 1, 30, 1), datetime(2020, 1, 1, 2)
+    )
+    assert positions.tolist() == []
+
+
+def test_flight_emissions_cache_across_periods():
+    module = _module(
+        {
+            1: "2020-01-01 01:30:00",
+            2: "2020-01-01 02:30:00",
+            3: "2020-01-01 03:30:00",
+        }
+    )
+    store = module.getStore()
+
+    def calculate(hour: int, temperature: float) -> list[dict]:
+        ((_movement, _te, _ge, fe),) = module._calculatePeriodEmissions(
+            datetime(2020, 1, 1, hour),
+            datetime(2020, 1, 1, hour + 1),
+            [],
+            [],
+            AmbientCondition({"Temperature": temperature}),
+            914.4,
+        )
+        return fe
+
+    first = calculate(1, 288.1)
+    assert store.getObject(1).flight_emission_calls == 1
+
+    # the same group in another period in the same ambient bin
+    assert calculate(2, 288.2) is first
+    assert store.getObject(2).flight_emission_calls == 0
+
+    # the same group in another ambient bin
+    assert calculate(3, 290.0) is not first
+    assert store.getObject(3).flight_emission_calls == 1
+
+    assert module._flightEmissionsCache.hits == 1
+    assert module._flightEmissionsCache.misses == 2
@@ -0,0 +1,402 @@
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from open_alaqs.core.interfaces import Movement as movement_module  # noqa: E402
+from open_alaqs.core.interfaces.Movement import (  # noqa: E402
+    Movement,
+    MovementDatabase,
+    MovementStore,
+)
+from open_alaqs.core.interfaces.Store import Store  # noqa: E402
+from open_alaqs.core.modules.MovementSourceModule import (  # noqa: E402
+    MovementSourceModule,
+)
+from open_alaqs.core.tools import conversion  # noqa: E402
+from open_alaqs.core.tools.create_output import (  # noqa: E402
+    inventory_create_runway_time_index,
+)
+from open_alaqs.core.tools.inventory_context import InventoryContext  # noqa: E402
+
+
+class FakeProgressBar:
+    def minimum(self) -> int:
+        return 0
+
+    def maximum(self) -> int:
+        return 99
+
+    def setValue(self, val: int):
+        pass
+
+    def wasCanceled(self) -> bool:
+        return False
+
+
+class FakeObject:
+    def __init__(self, name: str):
+        self._name = name
+
+    def getName(self) -> str:
+        return self._name
+
+
+class FakeTrajectory(FakeObject):
+    def setIsCartesian(self, val: bool):
+        pass
+
+
+class FakeAircraft(FakeObject):
+    def __init__(self, name: str, group: str, default_engine: FakeObject):
+        super().__init__(name)
+        self._group = group
+        self._default_engine = default_engine
+
+    def getGroup(self) -> str:
+        return self._group
+
+    def getICAOIdentifier(self) -> str:
+        return self._name
+
+    def getDefaultEngine(self) -> FakeObject:
+        return self._default_engine
+
+    def getDefaultDepartureProfileName(self) -> str:
+        return f"{self._name}-D"
+
+    def getDefaultArrivalProfileName(self) -> str:
+        return f"{self._name}-A"
+
+
+class FakeMovementDatabase:
+    """
+    The movements table in memory, with the runway times as text.
+    """
+
+    def __init__(self, rows: dict):
+        self._rows = rows
+        self._entries = {}
+
+    def getEntries(self) -> dict:
+        return self._entries
+
+    def clearEntries(self):
+        self._entries = {}
+
+    def deserialize(self):
+        self._entries = dict(self._rows)
+
+    def deserializeRunwayTimeWindow(self, start_dt: datetime, end_dt: datetime):
+        start, end = (dt.strftime("%Y-%m-%d %H:%M:%S") for dt in (start_dt, end_dt))
+        self._entries = {
+            key: row
+            for key, row in self._rows.items()
+            if start <= row["runway_time"] < end
+        }
+
+
+def _row(oid, aircraft, engine_name, runway, departure_arrival, **kwargs) -> dict:
+    return {
+        "oid": oid,
+        "runway_time": f"2020-01-01 0{oid}:30:00",
+        "block_time": f"2020-01-01 0{oid}:20:00",
+        "aircraft": aircraft,
+        "engine_name": engine_name,
+        "runway": runway,
+        "departure_arrival": departure_arrival,
+        "gate": kwargs.get("gate", "G1"),
+        "taxi_route": kwargs.get("taxi_route", ""),
+        "profile_id": kwargs.get("profile_id", ""),
+        "track_id": kwargs.get("track_id", ""),
+    }
+
+
+@pytest.fixture
+def movement_store(monkeypatch) -> MovementStore:
+    monkeypatch.setattr(MovementStore, "ProgressBarWidget", lambda s: FakeProgressBar())
+    monkeypatch.setattr(
+        Movement,
+        "calculateTrajectoryAtRunway",
+        lambda mov, offset_by_touchdown=True: FakeTrajectory(
+            f"{mov.getTrajectory().getName()}@{mov.getRunwayDirection()}"
+        ),
+    )
+
+    default_engine = FakeObject("CFM56-default")
+    stores = {
+        movement_module.AircraftStore: {
+            "A320": FakeAircraft("A320", "JET LARGE", default_engine),
+            "H125": FakeAircraft("H125", "HELICOPTER", FakeObject("ARRIEL")),
+        },
+        movement_module.EngineStore: {
+            "CFM56": FakeObject("CFM56"),
+            "CFM56-default": default_engine,
+        },
+        movement_module.HeliEngineStore: {"ARRIEL": FakeObject("ARRIEL")},
+        movement_module.RunwayStore: {"09/27": FakeObject("09/27")},
+        movement_module.GateStore: {"G1": FakeObject("G1")},
+        movement_module.TaxiwayRoutesStore: {
+            "G1/9/D/1": FakeObject("G1/9/D/1"),
+            "G1/27/A/1": FakeObject("G1/27/A/1"),
+        },
+        movement_module.TrackStore: {},
+        movement_module.AircraftTrajectoryStore: {
+            name: FakeTrajectory(name)
+            for name in ["A320-D", "A320-A", "A320-A-steep", "H125-D"]
+        },
+    }
+
+    rows = {
+        # the taxi route is filled with gate/runway/D/1
+        1: _row(1, "A320", "CFM56", "9", "D"),
+        2: _row(2, "B744", "CFM56", "9", "D"),
+        # the engine is replaced by the default engine of the aircraft, the
+        # unknown track by an empty track
+        3: _row(
+            3,
+            "A320",
+            "UNKNOWN",
+            "27",
+            "A",
+            taxi_route="G1/27/A/1",
+            profile_id="A320-A-steep",
+            track_id="T1",
+        ),
+        # the helicopter engine is not an engine of an airplane
+        4: _row(4, "A320", "ARRIEL", "9", "D"),
+        # the taxi route is filled with G1/27/D/1, which is unknown
+        5: _row(5, "H125", "ARRIEL", "27", "D"),
+        6: _row(6, "A320", "CFM56", "5", "D"),
+    }
+
+    context = InventoryContext("inventory.alaqs")
+    for store_class, objects in stores.items():
+        context.getInstance(store_class, lambda objects=objects: Store(objects))
+    context.getInstance(MovementDatabase, lambda: FakeMovementDatabase(rows))
+
+    yield context.getStore(MovementStore, deserialize=False)
+
+    context.release()
+
+
+@pytest.fixture
+def movement_db_path(tmp_path) -> str:
+    """
+    An inventory with the movements table as created before the index on the
+    runway time was added.
+    """
+    sql_path = (
+        Path(__file__).parents[1]
+        / "open_alaqs/database/sql/user_aircraft_movements.sql"
+    )
+    sql = sql_path.read_text().split("CREATE INDEX")[0]
+
+    db_path = tmp_path / "inventory.alaqs"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(sql)
+        conn.executemany(
+            'INSERT INTO "user_aircraft_movements" ("oid", "runway_time") VALUES (?, ?)',
+            [
+                (1, "2020-01-01 00:59:59"),
+                (2, "2020-01-01 01:00:00"),
+                (3, "2020-01-01 01:59:59"),
+                (4, "2020-01-01 02:00:00"),
+            ],
+        )
+    return str(db_path)
+
+
+def test_init_movements_resolves_attributes(movement_store):
+    movement_store.getMovementDatabase().deserialize()
+    movement_store.initMovements()
+
+    # the unknown aircraft, taxi route and runway (05) are not retained
+    assert list(movement_store.getObjects()) == [1, 3, 4]
+
+    resolved = {
+        key: values[:7] for key, values in movement_store._resolved_movements.items()
+    }
+    assert resolved == {
+        1: ("G1", "A320", "CFM56", "09/27", "09", "G1/9/D/1", ""),
+        3: ("G1", "A320", "CFM56-default", "09/27", "27", "G1/27/A/1", ""),
+        4: ("G1", "A320", "ARRIEL", "09/27", "09", "G1/9/D/1", ""),
+    }
+    trajectories = {
+        key: (values[7].getName(), values[8].getName())
+        for key, values in movement_store._resolved_movements.items()
+    }
+    assert trajectories == {
+        1: ("A320-D", "A320-D@09"),
+        3: ("A320-A-steep", "A320-A-steep@27"),
+        4: ("A320-D", "A320-D@09"),
+    }
+
+    attributes = movement_store.getMovementAttributes()
+    assert attributes.loc[[1, 3, 4], "engine"].tolist() == [
+        "CFM56",
+        "CFM56-default",
+        "CFM56-default",
+    ]
+    assert attributes.loc[[1, 3, 4], "profile_id"].tolist() == [
+        "A320-D",
+        "A320-A",
+        "A320-D",
+    ]
+    assert attributes.loc[3, "runway_time"] == conversion.convertTimeToSeconds(
+        "2020-01-01 03:30:00"
+    )
+
+
+def test_movement_attributes_match_movements(monkeypatch, movement_store):
+    created = []
+    create_movement = MovementStore._createMovement
+    monkeypatch.setattr(
+        MovementStore,
+        "_createMovement",
+        lambda store, key: created.append(key) or create_movement(store, key),
+    )
+    movement_store.loadMovements()
+
+    attributes = movement_store.getMovementAttributes()
+    assert created == []
+
+    for key, row in attributes.iterrows():
+        movement = movement_store.getObject(key)
+        assert row["name"] == movement.getName()
+        assert row["runway_time"] == movement.getRunwayTime()
+        assert row["gate"] == movement.getGate().getName()
+        assert row["aircraft"] == movement.getAircraft().getName()
+        assert row["ac_group"] == movement.getAircraft().getGroup()
+        assert row["engine"] == movement.getAircraftEngine().getName()
+        assert row["departure_arrival"] == movement.getDepartureArrivalFlag()
+        assert row["runway"] == movement.getRunway().getName()
+    assert created == [1, 3, 4]
+
+    movement_store.releaseMovements()
+    assert movement_store.getMovementAttributes().empty
+
+
+def test_module_creates_only_the_movements_of_the_period(monkeypatch, movement_store):
+    created = []
+    create_movement = MovementStore._createMovement
+    monkeypatch.setattr(
+        MovementStore,
+        "_createMovement",
+        lambda store, key: created.append(key) or create_movement(store, key),
+    )
+    module = MovementSourceModule({"end_dt_inclusive": "2020-01-02 00:00:00"})
+    module.setStore(movement_store)
+
+    module.loadMovementWindow(datetime(2020, 1, 1), datetime(2020, 1, 1, 1))
+    assert module.getDataframe()["oid"].tolist() == [1, 3, 4]
+    assert created == []
+
+    positions = module._getMovementsPositionsInPeriod(
+        datetime(2020, 1, 1, 3), datetime(2020, 1, 1, 4)
+    )
+    df = module.getPeriodMovements(module.getDataframe().iloc[positions])
+    assert df["oid"].tolist() == [3]
+    assert created == [3]
+    assert df["Sources"].iloc[0] is movement_store.getObject(3)
+
+    # the names are listed without creating the movements
+    module.loadSources()
+    assert module.getSourceNames()[0].startswith("id 1: A320-D-2020-01-01 01:30:00")
+    assert created == [3]
+
+
+def test_release_movements(movement_store):
+    movement_store.loadMovements(datetime(2020, 1, 1), datetime(2020, 1, 2))
+    assert movement_store.getWindow() == (datetime(2020, 1, 1), datetime(2020, 1, 2))
+    assert len(movement_store.getMovementDatabase().getEntries()) == 6
+    assert len(movement_store.getMovementAttributes()) == 3
+
+    movement_store.releaseMovements()
+
+    assert movement_store.getWindow() is None
+    assert movement_store.getObjects() == {}
+    assert movement_store._resolved_movements == {}
+    assert movement_store.getMovementDatabase().getEntries() == {}
+    assert movement_store.getMovementAttributes().empty
+
+
+def test_module_loads_windows_of_movements(movement_store):
+    module = MovementSourceModule({"end_dt_inclusive": "2020-01-01 04:00:00"})
+    module.movement_window_length = timedelta(hours=2)
+    module.setStore(movement_store)
+
+    module.loadMovementWindow(datetime(2020, 1, 1, 1), datetime(2020, 1, 1, 2))
+    assert module.getMovementWindow() == (
+        datetime(2020, 1, 1, 1),
+        datetime(2020, 1, 1, 3),
+    )
+    assert module.getDataframe()["oid"].tolist() == [1]
+
+    # the period is in the loaded window
+    module.loadMovementWindow(datetime(2020, 1, 1, 2), datetime(2020, 1, 1, 3))
+    assert module.getMovementWindow() == (
+        datetime(2020, 1, 1, 1),
+        datetime(2020, 1, 1, 3),
+    )
+
+    # the period crosses the end of the window, the next window is clamped to
+    # the end of the study
+    module.loadMovementWindow(datetime(2020, 1, 1, 2, 30), datetime(2020, 1, 1, 3, 30))
+    assert module.getMovementWindow() == (
+        datetime(2020, 1, 1, 2, 30),
+        datetime(2020, 1, 1, 4),
+    )
+    assert movement_store.getWindow() == module.getMovementWindow()
+    assert module.getDataframe()["oid"].tolist() == [3]
+
+    # the movement at the end of the period is not in the period
+    positions = module._getMovementsPositionsInPeriod(
+        datetime(2020, 1, 1, 2, 30), datetime(2020, 1, 1, 3, 30)
+    )
+    assert positions.tolist() == []
+
+    module.releaseMovementWindow()
+    assert module.getMovementWindow() is None
+    assert module.getDataframe().empty
+    assert movement_store.getMovementDatabase().getEntries() == {}
+
+
+def _get_indices(db_path: str) -> list[tuple[str]]:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        ).fetchall()
+
+
+def test_deserialize_runway_time_window(movement_db_path):
+    content = Path(movement_db_path).read_bytes()
+
+    context = InventoryContext(movement_db_path)
+    movement_db = context.getStore(MovementDatabase, deserialize=False)
+
+    movement_db.deserializeRunwayTimeWindow(
+        datetime(2020, 1, 1, 1), datetime(2020, 1, 1, 2)
+    )
+    assert sorted(movement_db.getEntries()) == [2, 3]
+
+    movement_db.deserializeRunwayTimeWindow(
+        datetime(2020, 1, 1, 2), datetime(2020, 1, 1, 3)
+    )
+    assert sorted(movement_db.getEntries()) == [4]
+
+    # the inventory is only read
+    assert Path(movement_db_path).read_bytes() == content
+
+
+def test_inventory_create_runway_time_index(movement_db_path):
+    inventory_create_runway_time_index(movement_db_path)
+    assert _get_indices(movement_db_path) == [("user_aircraft_movements_runway_time",)]
+
+    # the inventory is not changed once it has the index
+    content = Path(movement_db_path).read_bytes()
+    inventory_create_runway_time_index(movement_db_path)
+    assert Path(movement_db_path).read_bytes() == content
@@ -0,0 +1,268 @@
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("qgis.core")
+
+from open_alaqs import run  # noqa: E402
+from open_alaqs.core import EmissionCalculation  # noqa: E402
+from open_alaqs.core.interfaces.OutputModule import OutputModule  # noqa: E402
+from open_alaqs.core.interfaces.SourceModule import SourceModule  # noqa: E402
+from open_alaqs.core.modules.ModuleManager import (  # noqa: E402
+    DispersionModuleRegistry,
+    OutputAnalysisModuleRegistry,
+    SourceModuleRegistry,
+)
+from open_alaqs.core.tools import create_output  # noqa: E402
+
+
+class StubSourceModule(SourceModule):
+    @staticmethod
+    def getModuleName():
+        return "StubSource"
+
+
+class OtherSourceModule(SourceModule):
+    @staticmethod
+    def getModuleName():
+        return "OtherSource"
+
+
+class StubOutputModule(OutputModule):
+    settings_schema = {
+        "threshold": {"initial_value": "2", "coerce": float},
+    }
+
+    @staticmethod
+    def getModuleName():
+        return "StubOutput"
+
+
+class FakeEmissionCalculation:
+    """
+    Records the configuration of the run, which completes if `completed`.
+    """
+
+    completed = True
+
+    def __init__(self, db_path, grid_config, start_dt, end_dt, time_interval, context):
+        self.db_path = db_path
+        self.grid_config = grid_config
+        self.start_dt = start_dt
+        self.end_dt = end_dt
+        self.time_interval = time_interval
+        self.source_modules = {}
+        self.output_modules = {}
+        self.run_kwargs = None
+
+    def add_source_module(self, name, config):
+        self.source_modules[name] = config
+
+    def add_output_module(self, name, config):
+        self.output_modules[name] = config
+
+    def run(self, **kwargs):
+        self.run_kwargs = kwargs
+        return self.completed
+
+    def getOutputModules(self):
+        return {
+            name: OutputAnalysisModuleRegistry().get_module(name)(config)
+            for name, config in self.output_modules.items()
+        }
+
+    def getOutputResults(self):
+        return {name: None for name in self.output_modules}
+
+
+@pytest.fixture
+def inventory_path(tmp_path) -> Path:
+    sql_path = (
+        Path(__file__).parents[1] / "open_alaqs/database/sql/user_study_setup.sql"
+    )
+    db_path = tmp_path / "inventory.alaqs"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(sql_path.read_text())
+        conn.execute(
+            'UPDATE "user_study_setup" SET "airport_latitude" = 47.5, '
+            '"airport_longitude" = 8.5, "airport_elevation" = 400'
+        )
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def calculations(monkeypatch) -> list[FakeEmissionCalculation]:
+    """
+    The emission calculations of the runs, with stub module registries.
+    """
+    monkeypatch.setattr(
+        SourceModuleRegistry(),
+        "_registry",
+        {"StubSource": StubSourceModule, "OtherSource": OtherSourceModule},
+    )
+    monkeypatch.setattr(
+        OutputAnalysisModuleRegistry(), "_registry", {"StubOutput": StubOutputModule}
+    )
+    monkeypatch.setattr(DispersionModuleRegistry(), "_registry", {})
+    monkeypatch.setattr(
+        create_output, "inventory_create_runway_time_index", lambda path: None
+    )
+
+    instances = []
+
+    def create(*args, **kwargs):
+        instances.append(FakeEmissionCalculation(*args, **kwargs))
+        return instances[-1]
+
+    monkeypatch.setattr(EmissionCalculation, "EmissionCalculation", create)
+    return instances
+
+
+def parse_args(inventory_path, tmp_path, *argv):
+    return run.parse_args(
+        [
+            str(inventory_path),
+            "--start",
+            "2020-01-01 00:00:00",
+            "--end",
+            "2020-01-02 00:00:00",
+            "--output",
+            str(tmp_path / "out"),
+            *argv,
+        ]
+    )
+
+
+def test_parse_args(tmp_path):
+    args = parse_args("inventory.alaqs", tmp_path)
+
+    assert args.inventory == Path("inventory.alaqs")
+    assert args.start == datetime(2020, 1, 1)
+    assert args.end == datetime(2020, 1, 2)
+    assert args.interval == 3600
+    assert args.modules == args.sources == args.output_modules == "all"
+    assert args.grid_cells == [100, 100, 1]
+    assert args.grid_resolution == [100, 100, 100]
+    assert args.workers == 1
+
+    args = parse_args(
+        "inventory.alaqs",
+        tmp_path,
+        "--grid-cells",
+        "40",
+        "30",
+        "5",
+        "--grid-resolution",
+        "250",
+        "200",
+        "50",
+        "--workers",
+        "4",
+    )
+    assert args.grid_cells == [40, 30, 5]
+    assert args.grid_resolution == [250, 200, 50]
+    assert args.workers == 4
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--start", "01/01/2020"],
+        ["--grid-cells", "40", "30"],
+        ["--method", "unknown"],
+    ],
+)
+def test_parse_args_invalid(tmp_path, argv):
+    with pytest.raises(SystemExit):
+        parse_args("inventory.alaqs", tmp_path, *argv)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("all", ["A", "B", "C"]),
+        ("ALL", ["A", "B", "C"]),
+        ("none", []),
+        ("C, A", ["C", "A"]),
+        ("B,", ["B"]),
+    ],
+)
+def test_split_names(value, expected):
+    assert run.split_names(value, ["A", "B", "C"]) == expected
+
+
+def test_split_names_unknown():
+    with pytest.raises(ValueError, match="Unknown module\\(s\\) D, E"):
+        run.split_names("A,E,D", ["A", "B", "C"])
+
+
+def test_run_module_wiring(inventory_path, tmp_path, calculations):
+    args = parse_args(
+        inventory_path,
+        tmp_path,
+        "--modules",
+        "OtherSource",
+        "--sources",
+        "a, b",
+        "--grid-cells",
+        "40",
+        "30",
+        "5",
+        "--grid-resolution",
+        "250",
+        "200",
+        "50",
+        "--workers",
+        "2",
+    )
+
+    assert run.run(args) == 0
+    assert (tmp_path / "out").is_dir()
+
+    (calculation,) = calculations
+    assert calculation.db_path == str(inventory_path)
+    assert calculation.grid_config == {
+        "x_cells": 40,
+        "y_cells": 30,
+        "z_cells": 5,
+        "x_resolution": 250,
+        "y_resolution": 200,
+        "z_resolution": 50,
+        "reference_latitude": 47.5,
+        "reference_longitude": 8.5,
+        "reference_altitude": 400,
+    }
+    assert (calculation.start_dt, calculation.end_dt) == (
+        datetime(2020, 1, 1),
+        datetime(2020, 1, 2),
+    )
+    assert calculation.time_interval == timedelta(hours=1)
+
+    # the selected source modules, and all output modules with their defaults
+    assert list(calculation.source_modules) == ["OtherSource"]
+    assert calculation.source_modules["OtherSource"]["method"] == "bymode"
+    assert list(calculation.output_modules) == ["StubOutput"]
+    output_config = calculation.output_modules["StubOutput"]
+    assert output_config["threshold"] == 2.0
+    assert output_config["pollutant"] == "NOx"
+    assert output_config["start_dt_inclusive"] == datetime(2020, 1, 1)
+
+    assert calculation.run_kwargs["source_names"] == ["a", "b"]
+    assert calculation.run_kwargs["vertical_limit_m"] == 914.4
+    assert calculation.run_kwargs["workers"] == 2
+    assert not calculation.run_kwargs["keep_emissions"]
+
+
+def test_run_incomplete(inventory_path, tmp_path, calculations, monkeypatch):
+    monkeypatch.setattr(FakeEmissionCalculation, "completed", False)
+
+    assert run.run(parse_args(inventory_path, tmp_path)) == 1
+    assert list(calculations[0].source_modules) == ["StubSource", "OtherSource"]
+
+
+def test_run_missing_inventory(tmp_path, calculations):
+    assert run.run(parse_args(tmp_path / "missing.alaqs", tmp_path)) == 1
+    assert calculations == []
@@ -0,0 +1,24 @@
+from open_alaqs.core.tools.SizeLimitedDict import LRUCache, SizeLimitedDict
+
+
+def test_size_limited_dict_evicts_oldest():
+    d = SizeLimitedDict(size=2)
+    d["a"] = 1
+    d["b"] = 2
+    d["c"] = 3
+
+    assert list(d) == ["b", "c"]
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(size=2)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    assert cache.lookup("a") == 1
+    cache["c"] = 3
+
+    assert list(cache) == ["a", "c"]
+    assert cache.lookup("b") is None
+    assert cache.lookup("c") == 3
+    assert (cache.hits, cache.misses) == (2, 1)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("osgeo.ogr")
+
+from open_alaqs.core.tools import spatial  # noqa: E402
+
+LINE_WKT = "LINESTRING Z (111319.49 0 5, 222638.98 111325.14 10, 300000 200000 0)"
+
+
+def _previous_distance_of_line_string_xy(geometry_wkt: str) -> float:
+    geometry_wkt, swap = spatial.reproject_geometry(geometry_wkt, 3857, 4326)
+    points = spatial.getAllPoints(geometry_wkt, swap)
+    return sum(
+        spatial.getInverseDistance(p1[0], p1[1], p2[0], p2[1])["s12"]
+        for p1, p2 in zip(points, points[1:])
+    )
+
+
+@pytest.mark.parametrize(
+    "epsg_id_source, epsg_id_target, swap",
+    [(3857, 4326, True), (4326, 3857, True), (3857, 3857, False)],
+)
+def test_reproject_coordinates_matches_reproject_geometry(
+    epsg_id_source, epsg_id_target, swap
+):
+    wkt = (
+        LINE_WKT
+        if epsg_id_source == 3857
+        else "LINESTRING Z (1 0 5, 2 1 10, 2.7 1.8 0)"
+    )
+    expected_wkt, expected_swap = spatial.reproject_geometry(
+        wkt, epsg_id_source, epsg_id_target
+    )
+    points = np.array(spatial.getAllPoints(wkt))
+
+    coordinates, actual_swap = spatial.reproject_coordinates(
+        points[:, 0], points[:, 1], points[:, 2], epsg_id_source, epsg_id_target
+    )
+
+    assert actual_swap == expected_swap == swap
+    np.testing.assert_allclose(
+        coordinates, spatial.getAllPoints(expected_wkt), rtol=1e-12, atol=1e-9
+    )
+
+
+def test_reproject_coordinates_axis_order():
+    # 1 degree east of (0, 0), in the (lat, lon) order of EPSG:4326
+    coordinates, swap = spatial.reproject_coordinates([111319.49], [0.0])
+
+    assert swap
+    np.testing.assert_allclose(coordinates, [[0.0, 1.0, 0.0]], atol=1e-6)
+
+    coordinates, swap = spatial.reproject_coordinates([], [])
+    assert coordinates.shape == (0, 3)
+
+
+def test_reproject_points():
+    points, swap = spatial.reproject_points(LINE_WKT)
+
+    assert swap
+    np.testing.assert_allclose(
+        points,
+        spatial.getAllPoints(*spatial.reproject_geometry(LINE_WKT)),
+        rtol=1e-12,
+        atol=1e-9,
+    )
+    # swapped back to (lon, lat, z)
+    np.testing.assert_allclose(points[0], (1.0, 0.0, 5.0), atol=1e-6)
+
+
+def test_distance_of_line_string_xy():
+    assert spatial.getDistanceOfLineStringXY(LINE_WKT) == pytest.approx(
+        _previous_distance_of_line_string_xy(LINE_WKT)
+    )
@@ -1,4 +1,8 @@
+import numpy as np
+import pytest
+
 from open_alaqs.core.tools.twin_quadratic_fit_method import (
+    TwinQuadraticFuelFlow,
     calculate_fuel_flow_from_power_setting,
 )
 
@@ -53,3 +57,31 @@ def test_example_calculation_2():
     fuel_flow_2_ref = 1.853  # kg/s
 
     assert round(fuel_flow_2, 3) == fuel_flow_2_ref
+
+
+def test_fuel_flow_curve_array():
+    """
+    The curve gives the same fuel flows for an array of power settings
+    """
+
+    # ICAO EEDB fuel flow data
+    eedb = {
+        1.0: 2.11,  # Takeoff
+        0.85: 1.73,  # Climbout
+        0.30: 0.6,  # Approach
+        0.07: 0.23,  # Idle
+    }
+    power_settings = np.array([0.0, 0.07, 0.3, 0.7, 0.85, 0.9, 1.0])
+
+    fuel_flows = TwinQuadraticFuelFlow(eedb).fuel_flow(power_settings)
+
+    np.testing.assert_array_equal(
+        fuel_flows,
+        [calculate_fuel_flow_from_power_setting(p, eedb) for p in power_settings],
+    )
+    np.testing.assert_allclose(fuel_flows[[1, 2, 4, 6]], [0.23, 0.6, 1.73, 2.11])
+
+    with pytest.raises(ValueError):
+        TwinQuadraticFuelFlow(eedb).fuel_flow(np.array([0.5, 1.1]))
+    with pytest.raises(ValueError):
+        TwinQuadraticFuelFlow({1.0: 2.11})